@@ -0,0 +1,37 @@
+"""transaction indexes for analytics queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_transactions_user_date", ["user_id", "date"]),
+    ("ix_transactions_user_recurring_date", ["user_id", "is_recurring", "date"]),
+    ("ix_transactions_merchant_id", ["merchant_id"]),
+    ("ix_transactions_subcategory_id", ["subcategory_id"]),
+    ("ix_transactions_csv_import_id", ["csv_import_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, "transactions", columns, if_not_exists=True)
+    # Refresh planner statistics so the new indexes are picked up immediately
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="transactions", if_exists=True)
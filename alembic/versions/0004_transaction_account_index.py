@@ -0,0 +1,33 @@
+"""index transactions by account for per-account list aggregates
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_account_id",
+        "transactions",
+        ["account_id"],
+        if_not_exists=True,
+    )
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_transactions_account_id", table_name="transactions", if_exists=True
+    )
@@ -1,19 +1,58 @@
-import csv
-import io
+import asyncio
+import atexit
+import json
 import logging
+import os
+import re
 import time
+from collections.abc import AsyncIterator
 from datetime import date
+from functools import cache, cached_property, lru_cache
 from typing import Any
 
 import anthropic
 
 logger = logging.getLogger(__name__)
 
+# One connection pool per client flavour, shared by every wrapper below so TLS
+# handshakes and keep-alive connections are reused across calls. Built on first
+# use so importing this module (migrations, workers, tests) costs nothing.
+
+
+@cache
+def get_client() -> anthropic.Anthropic:
+    client = anthropic.Anthropic()
+    atexit.register(client.close)
+    return client
+
+
+@cache
+def get_async_client() -> anthropic.AsyncAnthropic:
+    return anthropic.AsyncAnthropic()
+
+
 SAMPLE_ROWS = 5
 
 KNOWN_COLUMNS = ["description", "date", "amount"]
 
-PROMPT_TEMPLATE = """You are a CSV column mapping assistant. Given a sample of CSV data, your job is to map the CSV's columns to a set of known target columns.
+# Normalized header names that unambiguously identify a target column, in
+# priority order: when several headers match (Chase exports carry both
+# "Details" and "Description"), the earliest synonym wins. Split debit/credit
+# layouts are deliberately absent so they still go to Claude.
+COLUMN_SYNONYMS = {
+    "description": (
+        "description",
+        "transaction description",
+        "payee",
+        "narrative",
+        "memo",
+        "details",
+    ),
+    "date": ("date", "transaction date", "post date", "posting date", "posted"),
+    "amount": ("amount", "transaction amount", "amt"),
+}
+
+COLUMN_DETECT_SYSTEM = """You are a CSV column mapping assistant. Given a sample of CSV data, your job is to map the CSV's columns to a set of known target columns.
 
 Target columns:
 - description: A text description or memo of the transaction
@@ -25,10 +64,9 @@ Instructions:
 2. For each target column, identify the best matching CSV column
 3. If no match exists for a target column, set it to null
 4. A single CSV column can only map to one target column
-5. Return your answer as a JSON object mapping target columns to CSV column index, zero based
+5. Return your answer as a JSON object mapping target columns to CSV column index, zero based"""
 
-CSV Data:
-{csv_sample}"""
+COLUMN_DETECT_PROMPT_PREFIX = "CSV Data:\n"
 
 COLUMN_MAPPING_SCHEMA = {
     "type": "object",
@@ -50,24 +88,77 @@ COLUMN_MAPPING_SCHEMA = {
 }
 
 
+def _csv_field(value: Any) -> str:
+    """Render one CSV field with minimal quoting (same output as csv.QUOTE_MINIMAL)."""
+    text = "" if value is None else str(value)
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+# Claude's column mappings keyed by the exact header row. A bank's export keeps
+# the same header from month to month, so re-imports skip the call.
+DETECT_CACHE_MAXSIZE = 256
+_detect_cache: dict[tuple[str, ...], dict[str, int | None]] = {}
+
+
+def clear_detect_cache() -> None:
+    _detect_cache.clear()
+
+
+def _first_tool_use(content: list) -> Any:
+    for block in content:
+        if block.type == "tool_use":
+            return block
+    raise RuntimeError("No tool_use block in model response")
+
+
 class ColumnDetector:
-    def __init__(self):
-        self.client = anthropic.Anthropic()
+    @cached_property
+    def client(self) -> anthropic.Anthropic:
+        return get_client()
 
     def _build_csv_sample(self, fieldnames: list[str], rows: list[dict]) -> str:
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(rows[:SAMPLE_ROWS])
-        return output.getvalue()
+        lines = [",".join(_csv_field(f) for f in fieldnames)]
+        lines.extend(
+            ",".join(_csv_field(r.get(f)) for f in fieldnames)
+            for r in rows[:SAMPLE_ROWS]
+        )
+        return "\n".join(lines) + "\n"
+
+    def _match_headers(self, fieldnames: list[str]) -> dict[str, int | None]:
+        norm = [f.strip().lower() for f in fieldnames]
+        return {
+            col: next(
+                (norm.index(syn) for syn in COLUMN_SYNONYMS[col] if syn in norm), None
+            )
+            for col in KNOWN_COLUMNS
+        }
+
+    def detect(
+        self, fieldnames: list[str], rows: list[dict], force_llm: bool = False
+    ) -> dict[str, int | None]:
+        key = tuple(fieldnames)
+        if not force_llm:
+            mapping = self._match_headers(fieldnames)
+            if all(idx is not None for idx in mapping.values()):
+                return mapping
+            if key in _detect_cache:
+                return dict(_detect_cache[key])
 
-    def detect(self, fieldnames: list[str], rows: list[dict]) -> dict[str, int | None]:
         csv_sample = self._build_csv_sample(fieldnames, rows)
-        prompt = PROMPT_TEMPLATE.format(csv_sample=csv_sample)
+        prompt = COLUMN_DETECT_PROMPT_PREFIX + csv_sample
 
-        message = self.client.messages.create(
+        message = self.client.messages.create(  # type: ignore[call-overload]
             model="claude-haiku-4-5-20251001",
             max_tokens=256,
+            system=[
+                {
+                    "type": "text",
+                    "text": COLUMN_DETECT_SYSTEM,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
             messages=[{"role": "user", "content": prompt}],
             tools=[
                 {
@@ -79,10 +170,15 @@ class ColumnDetector:
             tool_choice={"type": "tool", "name": "map_columns"},
         )
 
-        tool_use = next(block for block in message.content if block.type == "tool_use")
+        tool_use = _first_tool_use(message.content)
         mapping = tool_use.input
 
-        return {col: mapping.get(col) for col in KNOWN_COLUMNS}
+        result = {col: mapping.get(col) for col in KNOWN_COLUMNS}
+        if len(_detect_cache) >= DETECT_CACHE_MAXSIZE:
+            # Drop the oldest entry (dicts preserve insertion order)
+            _detect_cache.pop(next(iter(_detect_cache)))
+        _detect_cache[key] = result
+        return dict(result)
 
 
 detector = ColumnDetector()
@@ -146,7 +242,6 @@ Field rules:
   purchase=card/ACH at merchant; fee=bank/service fee; atm=cash withdrawal (not ATM fee)
 - merchant_location: "City, ST" or "City, Country" only if explicitly in description; null otherwise.
 - merchant_website: Bare domain e.g. "netflix.com"; null if unknown.
-- card_number: Digits from "CARD XXXX NNNN" pattern; null if absent.
 - suggested_tags: 0–3 lowercase tags if clearly applicable: work-expense, tax-deductible, \
   reimbursable, home-office, travel, health, gift, subscription, cash. Empty array otherwise.
 - need_want: "need" (groceries, utilities, rent, healthcare, insurance, commuting, childcare, \
@@ -157,7 +252,9 @@ Field rules:
 - Return a result for every transaction index — do not skip any.\
 """
 
-ENRICHMENT_PROMPT = "Transactions:\n{transactions}"
+# Only the transaction list varies per call; the static instructions live in
+# ENRICHMENT_SYSTEM so they form a cacheable prefix.
+ENRICHMENT_PROMPT_PREFIX = "Transactions:\n"
 
 ENRICHMENT_SCHEMA = {
     "type": "object",
@@ -195,7 +292,6 @@ ENRICHMENT_SCHEMA = {
                     "description": {"type": "string"},
                     "category": {"type": ["string", "null"]},
                     "subcategory": {"type": ["string", "null"]},
-                    "card_number": {"type": ["string", "null"]},
                     "need_want": {
                         "type": "string",
                         "enum": ["need", "want"],
@@ -215,7 +311,6 @@ ENRICHMENT_SCHEMA = {
                     "description",
                     "category",
                     "subcategory",
-                    "card_number",
                     "need_want",
                 ],
             },
@@ -225,13 +320,243 @@ ENRICHMENT_SCHEMA = {
 }
 
 ENRICH_BATCH_SIZE = 50
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "8"))
+ENRICH_RATE_LIMIT_ATTEMPTS = 3
+# Output budget scales with batch size; each enriched row is ~150 output tokens.
+ENRICH_OUTPUT_TOKENS_PER_ROW = 200
+ENRICH_MIN_OUTPUT_TOKENS = 1024
+ENRICH_MAX_OUTPUT_TOKENS = 16384
+# Batch size adapts to API health: grows by a step per successful call and
+# halves on a 429/5xx or a truncated response, within these bounds. Past the
+# maximum a batch's rows would no longer fit in ENRICH_MAX_OUTPUT_TOKENS and
+# every call would stop at max_tokens and be split.
+ENRICH_MIN_BATCH_SIZE = 8
+ENRICH_MAX_BATCH_SIZE = ENRICH_MAX_OUTPUT_TOKENS // 150
+ENRICH_BATCH_SIZE_STEP = 8
+# Message Batches API (opt-in): half-price enrichment for background imports
+ENRICH_USE_BATCH_API = os.getenv("ENRICH_USE_BATCH_API", "") == "1"
+ENRICH_BATCH_POLL_INITIAL_SECONDS = 30
+ENRICH_BATCH_POLL_MAX_SECONDS = 300
+ENRICH_BATCH_API_JOB_TIMEOUT = 25 * 60 * 60  # batches expire after 24h
+
+
+# Lexical fields derived after enrichment. card_number comes only from the
+# descriptor, so the model is not asked for it; a recurring keyword forces
+# is_recurring on, while the model still flags keyword-less subscriptions.
+_CARD_RE = re.compile(r"\bCARD\s*(?:X+\s*)?(\d{4})\b", re.IGNORECASE)
+_RECURRING_RE = re.compile(
+    r"\b(RECURRING|AUTOPAY|AUTO-?RENEW|SUBSCRIPTION|MEMBERSHIP)\b", re.IGNORECASE
+)
+
+
+_NORMALIZE_DIGITS_RE = re.compile(r"[#*]?\d+")
+
+
+def enrichment_key(row: dict) -> tuple[str, bool]:
+    """Rows with the same key get the same enrichment: description with store
+    numbers/reference digits removed, plus the sign of the amount (a refund and
+    a purchase at the same merchant enrich differently)."""
+    desc = _NORMALIZE_DIGITS_RE.sub(" ", (row["description"] or "").upper())
+    amount = str(row["amount"]).strip()
+    return " ".join(desc.split()), amount.startswith(("-", "("))
+
+
+def dedupe_for_enrichment(
+    rows: list[dict],
+) -> tuple[list[dict], dict[int, list[dict]]]:
+    """Split rows into those to send to the model and repeats of an earlier row.
+
+    Returns (unique_rows, copies) where copies maps a unique row's index to the
+    rows that should reuse its enrichment.
+    """
+    first_by_key: dict[tuple[str, bool], dict] = {}
+    unique: list[dict] = []
+    copies: dict[int, list[dict]] = {}
+    for row in rows:
+        key = enrichment_key(row)
+        first = first_by_key.get(key)
+        if first is None:
+            first_by_key[key] = row
+            unique.append(row)
+        else:
+            copies.setdefault(first["index"], []).append(row)
+    return unique, copies
+
+
+def expand_duplicate_results(
+    results: list[dict], copies: dict[int, list[dict]]
+) -> list[dict]:
+    """Fan enriched results back out to the repeat rows dropped by dedupe_for_enrichment."""
+    if not copies:
+        return results
+    expanded = list(results)
+    for r in results:
+        for row in copies.get(r["index"], ()):
+            dup = {**r, "index": row["index"]}
+            if m := _CARD_RE.search(row["description"] or ""):
+                dup["card_number"] = m.group(1)
+            expanded.append(dup)
+    return expanded
+
+
+def split_cached_enrichment(
+    rows: list[dict], cached: dict[tuple, dict]
+) -> tuple[list[dict], list[dict]]:
+    """Split rows into (rows still to send to the model, results for cache hits).
+
+    Cached results carry no row-specific fields, so card numbers and the
+    recurring flag are re-derived from each hit's own description.
+    """
+    misses: list[dict] = []
+    hits: list[dict] = []
+    for row in rows:
+        result = cached.get(enrichment_key(row))
+        if result is None:
+            misses.append(row)
+        else:
+            hits.append({**result, "index": row["index"]})
+    _apply_fast_fields(hits, rows)
+    return misses, hits
+
+
+def cacheable_enrichment(
+    results: list[dict], rows_by_index: dict[int, dict]
+) -> dict[tuple, dict]:
+    """Key model results by enrichment_key for the enrichment cache, dropping
+    the fields that belong to one row rather than the merchant."""
+    return {
+        enrichment_key(rows_by_index[r["index"]]): {
+            k: v for k, v in r.items() if k not in ("index", "card_number")
+        }
+        for r in results
+    }
+
+
+def _apply_fast_fields(results: list[dict], batch: list[dict]) -> None:
+    descriptions = {r["index"]: r["description"] or "" for r in batch}
+    for r in results:
+        desc = descriptions[r["index"]]
+        if m := _CARD_RE.search(desc):
+            r["card_number"] = m.group(1)
+        if _RECURRING_RE.search(desc):
+            r["is_recurring"] = True
+
+
+def _check_result_indices(results: list, batch: list[dict]) -> None:
+    """Reject results whose index isn't in the batch — callers use it to look up rows."""
+    expected = {r["index"] for r in batch}
+    for r in results:
+        if not isinstance(r, dict) or r.get("index") not in expected:
+            raise RuntimeError(f"enrich_transactions returned an unknown row: {r!r}")
 
 
 class TransactionEnricher:
-    def __init__(self):
-        self.client = anthropic.Anthropic()
+    # Current rows per batch; see _record_success / _record_failure
+    batch_size: int = ENRICH_BATCH_SIZE
+
+    @cached_property
+    def client(self) -> anthropic.AsyncAnthropic:
+        return get_async_client()
+
+    def _record_success(self) -> None:
+        self.batch_size = min(
+            ENRICH_MAX_BATCH_SIZE, self.batch_size + ENRICH_BATCH_SIZE_STEP
+        )
+
+    def _record_failure(self) -> None:
+        self.batch_size = max(ENRICH_MIN_BATCH_SIZE, self.batch_size // 2)
+
+    async def enrich_all(
+        self, rows: list[dict], concurrency: int = ENRICH_CONCURRENCY
+    ) -> list[tuple[list[dict], int, int]]:
+        """Enrich all rows in batch_size batches, at most `concurrency` in flight.
+
+        Returns one (results, input_tokens, output_tokens) tuple per batch, in batch order.
+        """
+        sem = asyncio.Semaphore(concurrency)
+        size = self.batch_size
+        batches = [rows[i : i + size] for i in range(0, len(rows), size)]
+
+        async def _guarded(batch: list[dict], batch_num: int):
+            async with sem:
+                return await self._enrich_batch(batch, batch_num)
+
+        return await asyncio.gather(*(_guarded(b, i) for i, b in enumerate(batches)))
+
+    async def _create_with_backoff(self, **kwargs) -> Any:
+        for attempt in range(1, ENRICH_RATE_LIMIT_ATTEMPTS + 1):
+            try:
+                response = await self.client.messages.create(**kwargs)
+            except (anthropic.RateLimitError, anthropic.InternalServerError) as e:
+                self._record_failure()
+                if (
+                    not isinstance(e, anthropic.RateLimitError)
+                    or attempt == ENRICH_RATE_LIMIT_ATTEMPTS
+                ):
+                    raise
+                logger.warning(
+                    "Enrichment rate limited (attempt %d/%d), backing off",
+                    attempt,
+                    ENRICH_RATE_LIMIT_ATTEMPTS,
+                )
+                await asyncio.sleep(2**attempt)
+            else:
+                # A truncated response means the batch outgrew its output budget
+                if response.stop_reason == "max_tokens":
+                    self._record_failure()
+                else:
+                    self._record_success()
+                return response
+
+    def _request_params(self, batch: list[dict]) -> dict[str, Any]:
+        tx_text = "\n".join(
+            f"{r['index']}. [{r['date']}] {r['description']}  (amount: {r['amount']})"
+            for r in batch
+        )
+        prompt = ENRICHMENT_PROMPT_PREFIX + tx_text
+        # cache_control marks the system prompt and tool schema as cacheable.
+        # The API silently skips caching if content is below the minimum token threshold.
+        return {
+            "model": "claude-sonnet-4-6",
+            "max_tokens": max(
+                ENRICH_MIN_OUTPUT_TOKENS,
+                min(
+                    ENRICH_MAX_OUTPUT_TOKENS, ENRICH_OUTPUT_TOKENS_PER_ROW * len(batch)
+                ),
+            ),
+            "system": [
+                {
+                    "type": "text",
+                    "text": ENRICHMENT_SYSTEM,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "tools": [
+                {
+                    "name": "enrich_transactions",
+                    "description": "Return enriched data for each transaction",
+                    "input_schema": ENRICHMENT_SCHEMA,
+                    "cache_control": {"type": "ephemeral"},
+                },
+            ],
+            "tool_choice": {"type": "any"},
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+    def _extract_results(self, content: list, batch: list[dict]) -> list[dict] | None:
+        for block in content:
+            if block.type == "tool_use" and block.name == "enrich_transactions":
+                results = block.input.get("results")
+                if results is None:
+                    raise RuntimeError(
+                        f"enrich_transactions tool input missing 'results' key: {block.input}"
+                    )
+                _check_result_indices(results, batch)
+                _apply_fast_fields(results, batch)
+                return results
+        return None
 
-    def _enrich_batch(
+    async def _enrich_batch(
         self, batch: list[dict], batch_num: int
     ) -> tuple[list[dict], int, int]:
         start = time.perf_counter()
@@ -242,57 +567,43 @@ class TransactionEnricher:
             batch[0]["index"],
             batch[-1]["index"],
         )
-        tx_text = "\n".join(
-            f"{r['index']}. [{r['date']}] {r['description']}  (amount: {r['amount']})"
-            for r in batch
-        )
-        prompt = ENRICHMENT_PROMPT.format(transactions=tx_text)
-        messages: list[dict[str, Any]] = [{"role": "user", "content": prompt}]
-        # cache_control marks the system prompt and tool schema as cacheable.
-        # The API silently skips caching if content is below the minimum token threshold.
-        system = [
-            {
-                "type": "text",
-                "text": ENRICHMENT_SYSTEM,
-                "cache_control": {"type": "ephemeral"},
-            }
-        ]
-        tools = [
-            {
-                "name": "enrich_transactions",
-                "description": "Return enriched data for each transaction",
-                "input_schema": ENRICHMENT_SCHEMA,
-                "cache_control": {"type": "ephemeral"},
-            },
-        ]
+        params = self._request_params(batch)
+        messages: list[dict[str, Any]] = params["messages"]
         total_input = 0
         total_output = 0
 
         while True:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=16384,
-                system=system,
-                tools=tools,
-                tool_choice={"type": "any"},
-                messages=messages,
-            )
+            response = await self._create_with_backoff(**params)
             total_input += response.usage.input_tokens
             total_output += response.usage.output_tokens
 
+            # Truncated tool input is unusable — retry each half separately
+            if response.stop_reason == "max_tokens" and len(batch) > 1:
+                logger.warning(
+                    "Enrichment batch %d hit max_tokens=%d, splitting %d rows",
+                    batch_num,
+                    params["max_tokens"],
+                    len(batch),
+                )
+                mid = len(batch) // 2
+                left, left_in, left_out = await self._enrich_batch(
+                    batch[:mid], batch_num
+                )
+                right, right_in, right_out = await self._enrich_batch(
+                    batch[mid:], batch_num
+                )
+                return (
+                    left + right,
+                    total_input + left_in + right_in,
+                    total_output + left_out + right_out,
+                )
+
             # Done — extract structured result
-            for block in response.content:
-                if block.type == "tool_use" and block.name == "enrich_transactions":
-                    results = block.input.get("results")
-                    if results is None:
-                        raise RuntimeError(
-                            f"enrich_transactions tool input missing 'results' key: {block.input}"
-                        )
-                    elapsed = time.perf_counter() - start
-                    logger.info(
-                        "Enrichment batch %d complete in %.2fs", batch_num, elapsed
-                    )
-                    return results, total_input, total_output
+            results = self._extract_results(response.content, batch)
+            if results is not None:
+                elapsed = time.perf_counter() - start
+                logger.info("Enrichment batch %d complete in %.2fs", batch_num, elapsed)
+                return results, total_input, total_output
 
             # Model used web_search or other tool — continue the loop
             if response.stop_reason != "tool_use":
@@ -306,6 +617,56 @@ class TransactionEnricher:
             ]
             messages.append({"role": "user", "content": tool_results})
 
+    async def enrich_via_message_batches(
+        self, batches: list[list[dict]]
+    ) -> AsyncIterator[tuple[int, list[dict] | Exception, int, int]]:
+        """Submit every batch as one Message Batches request and yield
+        (batch_num, results or error, input_tokens, output_tokens) once it ends.
+
+        Batch requests are billed at half price but complete asynchronously
+        (minutes, up to 24h), so this suits background imports, not re-enrich.
+        """
+        message_batch = await self.client.messages.batches.create(
+            requests=[
+                {"custom_id": f"batch-{i}", "params": self._request_params(b)}  # type: ignore[typeddict-item]
+                for i, b in enumerate(batches)
+            ]
+        )
+        logger.info(
+            "Submitted message batch %s with %d requests",
+            message_batch.id,
+            len(batches),
+        )
+        delay = ENRICH_BATCH_POLL_INITIAL_SECONDS
+        while message_batch.processing_status != "ended":
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ENRICH_BATCH_POLL_MAX_SECONDS)
+            message_batch = await self.client.messages.batches.retrieve(
+                message_batch.id
+            )
+
+        async for entry in await self.client.messages.batches.results(message_batch.id):
+            batch_num = int(entry.custom_id.removeprefix("batch-"))
+            if entry.result.type != "succeeded":
+                yield batch_num, RuntimeError(
+                    f"Message batch request {entry.custom_id} {entry.result.type}"
+                ), 0, 0
+                continue
+            message = entry.result.message
+            usage = message.usage
+            try:
+                results = self._extract_results(message.content, batches[batch_num])
+            except RuntimeError as e:
+                yield batch_num, e, usage.input_tokens, usage.output_tokens
+                continue
+            if results is None:
+                yield batch_num, RuntimeError(
+                    f"Message batch request {entry.custom_id} stopped with "
+                    f"{message.stop_reason} before calling enrich_transactions"
+                ), usage.input_tokens, usage.output_tokens
+                continue
+            yield batch_num, results, usage.input_tokens, usage.output_tokens
+
 
 enricher = TransactionEnricher()
 
@@ -314,11 +675,9 @@ PARSE_QUERY_SYSTEM = """\
 You are a personal finance query parser. Given a natural language query about transactions, \
 extract filter criteria to pass to a transaction search API.
 
-Today's date: {today}
-
 Available filter fields:
 - date_from, date_to: Date range (YYYY-MM-DD). Resolve relative terms ("last month", \
-"last quarter", "this year", "January", etc.) using today's date.
+"last quarter", "this year", "January", etc.) using today's date, given at the end.
 - merchant: Substring match on merchant name (e.g. "Starbucks")
 - description: Substring match on transaction description text
 - category: Category name — must match one of the known categories listed below
@@ -391,14 +750,29 @@ PARSE_QUERY_TOOL_SCHEMA = {
 }
 
 
+@lru_cache(maxsize=64)
+def _parse_query_system(categories_text: str) -> str:
+    return PARSE_QUERY_SYSTEM.format(categories=categories_text)
+
+
 class QueryParser:
-    def __init__(self):
-        self.client = anthropic.Anthropic()
+    @cached_property
+    def client(self) -> anthropic.AsyncAnthropic:
+        return get_async_client()
 
-    def parse(self, query: str, categories_text: str) -> dict:
-        today = date.today().isoformat()
-        system = PARSE_QUERY_SYSTEM.format(today=today, categories=categories_text)
-        message = self.client.messages.create(
+    async def parse(self, query: str, categories_text: str) -> dict:
+        # Same categories → identical prefix, so mark it cacheable; the date goes
+        # in a trailing block so the cached prefix survives past midnight.
+        # The API silently skips caching if content is below the minimum token threshold.
+        system = [
+            {
+                "type": "text",
+                "text": _parse_query_system(categories_text),
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": f"Today's date: {date.today().isoformat()}"},
+        ]
+        message = await self.client.messages.create(  # type: ignore[call-overload]
             model="claude-haiku-4-5-20251001",
             max_tokens=512,
             system=system,
@@ -412,7 +786,7 @@ class QueryParser:
             ],
             tool_choice={"type": "tool", "name": "set_filters"},
         )
-        tool_use = next(b for b in message.content if b.type == "tool_use")
+        tool_use = _first_tool_use(message.content)
         return tool_use.input
 
 
@@ -458,11 +832,12 @@ Rules:
 
 
 class MerchantDuplicateFinder:
-    def __init__(self):
-        self.client = anthropic.Anthropic()
+    @cached_property
+    def client(self) -> anthropic.AsyncAnthropic:
+        return get_async_client()
 
-    def find(self, merchants_text: str) -> dict:
-        message = self.client.messages.create(
+    async def find(self, merchants_text: str) -> dict:
+        message = await self.client.messages.create(  # type: ignore[call-overload]
             model="claude-haiku-4-5-20251001",
             max_tokens=4096,
             system=FIND_DUPLICATES_SYSTEM,
@@ -476,7 +851,7 @@ class MerchantDuplicateFinder:
             ],
             tool_choice={"type": "tool", "name": "report_duplicate_groups"},
         )
-        tool_use = next(b for b in message.content if b.type == "tool_use")
+        tool_use = _first_tool_use(message.content)
         return tool_use.input
 
 
@@ -527,20 +902,21 @@ SUMMARIZE_INPUT_SCHEMA = {
 class ReportSummarizer:
     model = "claude-haiku-4-5-20251001"
 
+    @cached_property
+    def client(self) -> anthropic.Anthropic:
+        return get_client()
+
     def summarize(self, period_label: str, report_data: dict) -> dict:
         """
         period_label: human-readable string e.g. "February 2026" or "2025"
         report_data:  the full monthly/yearly report dict (summary + category_breakdown)
         Returns: { narrative, insights, recommendations }
         """
-        import json
-
-        client = anthropic.Anthropic()
         user_content = (
             f"Period: {period_label}\n\n"
-            f"Financial data:\n{json.dumps(report_data, indent=2)}"
+            f"Financial data:\n{json.dumps(report_data, separators=(',', ':'))}"
         )
-        response = client.messages.create(  # type: ignore[call-overload]
+        response = self.client.messages.create(  # type: ignore[call-overload]
             model=self.model,
             max_tokens=1024,
             system=SUMMARIZE_SYSTEM,
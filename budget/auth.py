@@ -1,11 +1,13 @@
+import asyncio
 import os
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .database import get_db
@@ -14,12 +16,56 @@ from .models import User
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 30
+BCRYPT_ROUNDS = 12
+
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAXSIZE = 4096
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# token → (expires_at epoch, user column values). Entries never outlive the JWT's
+# own exp. Only plain values are kept: each request gets its own transient User
+# built from them, so nothing a handler does to it leaks into other requests.
+_user_cache: dict[str, tuple[float, dict]] = {}
+
+_CACHED_USER_FIELDS = ("id", "email", "name", "google_id", "created_at")
+
+
+def clear_user_cache() -> None:
+    _user_cache.clear()
+    _decode_token.cache_clear()
+
+
+def forget_user(user_id: int) -> None:
+    """Drop cached entries for a user whose row has just been changed."""
+    for token in [t for t, (_, f) in _user_cache.items() if f["id"] == user_id]:
+        del _user_cache[token]
+
+
+@lru_cache(maxsize=8192)
+def _decode_token(token: str) -> tuple[int, float]:
+    """Verify a token once and remember (user_id, exp). Failures aren't cached."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id_str: str | None = payload.get("sub")
+    if user_id_str is None:
+        raise ValueError("token has no subject")
+    exp = payload.get("exp")
+    return int(user_id_str), float(exp) if exp is not None else float("inf")
+
+
+def _cache_user(token: str, user: User, token_exp: float) -> None:
+    if len(_user_cache) >= USER_CACHE_MAXSIZE:
+        # Drop the oldest entry (dicts preserve insertion order)
+        _user_cache.pop(next(iter(_user_cache)))
+    fields = {name: getattr(user, name) for name in _CACHED_USER_FIELDS}
+    _user_cache[token] = (
+        min(token_exp, time.time() + USER_CACHE_TTL_SECONDS),
+        fields,
+    )
+
 
 def hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
@@ -29,6 +75,11 @@ def verify_password(plain: str, hashed: str) -> bool:
         return False
 
 
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password in a worker thread — bcrypt is ~100ms of CPU per check."""
+    return await asyncio.to_thread(verify_password, plain, hashed)
+
+
 def create_access_token(user_id: int) -> str:
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
     payload = {"sub": str(user_id), "exp": expire}
@@ -44,17 +95,21 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    hit = _user_cache.get(token)
+    if hit is not None:
+        if hit[0] > time.time():
+            return User(**hit[1])
+        _user_cache.pop(token, None)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id_str: str | None = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exc
-        user_id = int(user_id_str)
+        user_id, exp = _decode_token(token)
     except (JWTError, ValueError):
         raise credentials_exc
+    if exp <= time.time():
+        raise credentials_exc
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await db.get(User, user_id)
     if user is None:
         raise credentials_exc
+    _cache_user(token, user, exp)
     return user
@@ -1,12 +1,48 @@
 import os
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./budget.db")
 
-engine = create_async_engine(DATABASE_URL)
+# Applied to every new SQLite connection. WAL lets readers proceed while a writer
+# (e.g. an enrichment job) holds the lock; synchronous=NORMAL is durable under WAL.
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+)
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+_connect_args: dict = {}
+if _is_sqlite:
+    _connect_args["timeout"] = 30
+
+# The compiled-statement cache is shared engine-wide; size it for every filter
+# shape the list endpoints can produce rather than the default 500.
+QUERY_CACHE_SIZE = 2048
+
+engine = create_async_engine(
+    DATABASE_URL,
+    query_cache_size=QUERY_CACHE_SIZE,
+    connect_args=_connect_args,
+)
+
+if _is_sqlite:
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -3,27 +3,46 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import logging
+import re
+from collections.abc import Coroutine, Iterable, Iterator
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any
 
 from sqlalchemy import func, select
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from .ai import ENRICH_BATCH_SIZE, enricher
+from .ai import (
+    ENRICH_CONCURRENCY,
+    ENRICH_USE_BATCH_API,
+    cacheable_enrichment,
+    dedupe_for_enrichment,
+    enricher,
+    enrichment_key,
+    expand_duplicate_results,
+    split_cached_enrichment,
+)
 from .database import AsyncSessionLocal
-from .models import Tag, Transaction, transaction_tags
+from .models import Transaction, transaction_tags
 from .query import (
     AiSummaryCacheQueries,
     CardHolderQueries,
     CategoryQueries,
     CsvImportQueries,
     EnrichmentBatchQueries,
+    EnrichmentCacheQueries,
     MerchantQueries,
     TransactionQueries,
 )
 
 logger = logging.getLogger(__name__)
 
+try:
+    import uvloop  # type: ignore[import-not-found]
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
+
 
 def _setup_worker_logging() -> None:
     """Configure logging for the RQ worker entry points.
@@ -43,9 +62,35 @@ def _setup_worker_logging() -> None:
 
 DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%B %d, %Y"]
 
+# Numeric slash dates, matched directly rather than by trying %m/%d/%Y,
+# %m/%d/%y and %d/%m/%Y through strptime in turn.
+_SLASH_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})")
 
+
+@lru_cache(maxsize=4096)
 def parse_date(value: str) -> date:
+    # Statements repeat the same few dates on every row, and each row is parsed
+    # twice per import (duplicate pre-count, then the write loop).
     value = value.strip()
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    m = _SLASH_DATE_RE.fullmatch(value)
+    if m:
+        first, second, year = int(m[1]), int(m[2]), int(m[3])
+        if len(m[3]) == 2:
+            # Same pivot as strptime's %y; day-first is only tried with %Y
+            candidates = [(year + (2000 if year < 69 else 1900), first, second)]
+        else:
+            candidates = [(year, first, second), (year, second, first)]
+        for y, month, day in candidates:
+            try:
+                return date(y, month, day)
+            except ValueError:
+                continue
+        raise ValueError(f"Unrecognised date format: {value!r}")
     for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(value, fmt).date()
@@ -54,8 +99,16 @@ def parse_date(value: str) -> date:
     raise ValueError(f"Unrecognised date format: {value!r}")
 
 
+@lru_cache(maxsize=4096)
 def parse_amount(value: str) -> Decimal:
-    cleaned = value.strip().lstrip("$").replace(",", "").replace(" ", "")
+    value = value.strip()
+    # Plain "123.45" / "-123.45" needs none of the clean-up below
+    if value[:1].isdigit() or (value[:1] == "-" and value[1:2].isdigit()):
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            pass
+    cleaned = value.lstrip("$").replace(",", "").replace(" ", "")
     if cleaned.startswith("(") and cleaned.endswith(")"):
         cleaned = "-" + cleaned[1:-1]
     return Decimal(cleaned)
@@ -78,6 +131,139 @@ def _make_fingerprint(
     return hashlib.sha256(base.encode()).hexdigest()[:16]
 
 
+def _adaptive_batches(rows: list[dict]) -> Iterator[list[dict]]:
+    """Slice rows into batches lazily, reading enricher.batch_size before each
+    slice so batches cut later reflect rate limits or successes seen so far."""
+    start = 0
+    while start < len(rows):
+        size = enricher.batch_size
+        yield rows[start : start + size]
+        start += size
+
+
+async def _stream_batches(batches: Iterable[list[dict]], fetch_batch, workers: int):
+    """Run fetch_batch over batches on a fixed worker pool, yielding each outcome
+    (results list or the exception raised) as it finishes.
+
+    Finished batches wait in a bounded queue, so when the DB consumer falls
+    behind the workers block rather than buffering every batch in memory.
+    Batches are pulled only as a worker frees up, so they may be generated lazily.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    pending = enumerate(batches)
+    done = object()
+
+    async def worker():
+        for batch_num, batch in pending:
+            try:
+                outcome = await fetch_batch(batch, batch_num)
+            except Exception as e:
+                outcome = e
+            await queue.put(outcome)
+        await queue.put(done)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        running = len(tasks)
+        while running:
+            outcome = await queue.get()
+            if outcome is done:
+                running -= 1
+            else:
+                yield outcome
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def _message_batch_outcomes(batches: list[list[dict]], csv_import_id: int):
+    """_stream_batches counterpart for the Message Batches API: one submission
+    for the whole import, then each batch's outcome as results are read back."""
+    if not batches:
+        return
+    async with AsyncSessionLocal() as db:
+        ebq = EnrichmentBatchQueries(db)
+        batch_ids = [
+            (await ebq.create(csv_import_id, i, len(b))).id
+            for i, b in enumerate(batches)
+        ]
+        await db.commit()
+
+    async for (
+        batch_num,
+        outcome,
+        input_tok,
+        output_tok,
+    ) in enricher.enrich_via_message_batches(batches):
+        async with AsyncSessionLocal() as db:
+            ebq = EnrichmentBatchQueries(db)
+            if isinstance(outcome, Exception):
+                await ebq.fail(batch_ids[batch_num])
+            else:
+                await ebq.complete(batch_ids[batch_num], input_tok, output_tok)
+            await db.commit()
+        yield outcome
+
+
+async def _prepend_outcome(first: list[dict], outcomes):
+    """Yield first (when non-empty) ahead of the outcomes stream, closing the
+    stream if the consumer stops early."""
+    try:
+        if first:
+            yield first
+        async for outcome in outcomes:
+            yield outcome
+    finally:
+        await outcomes.aclose()
+
+
+async def _resolve_batch_lookups(
+    batch_results: list[dict],
+    mq: MerchantQueries,
+    cq: CategoryQueries,
+    chq: CardHolderQueries,
+    merchant_cache: dict[str, tuple[int, bool]],
+    category_cache: dict[str, int],
+    subcategory_cache: dict[tuple, int],
+    cardholder_cache: dict[str, int],
+    *,
+    category_needs_subcategory: bool = False,
+) -> None:
+    """Warm the lookup caches for a whole batch with a few set-based queries.
+
+    The per-row find_or_create calls then resolve from the caches instead of
+    issuing a select (and possibly an insert) for every transaction.
+    """
+    merchants: dict[str, tuple[str | None, str | None]] = {}
+    categories: set[str] = set()
+    card_numbers: set[str] = set()
+    for r in batch_results:
+        mname = r.get("merchant_name")
+        if mname:
+            location, website = merchants.get(mname, (None, None))
+            merchants[mname] = (
+                location or r.get("merchant_location"),
+                website or r.get("merchant_website"),
+            )
+        cname = r.get("category")
+        if cname and (r.get("subcategory") or not category_needs_subcategory):
+            categories.add(cname)
+        if r.get("card_number"):
+            card_numbers.add(r["card_number"])
+
+    await mq.resolve_for_enrichment(merchants, merchant_cache)
+    await cq.resolve_for_enrichment(categories, category_cache)
+    await chq.resolve_for_enrichment(card_numbers, cardholder_cache)
+
+    subcategories: dict[tuple, str | None] = {}
+    for r in batch_results:
+        cname, scname = r.get("category"), r.get("subcategory")
+        if cname and scname and cname in category_cache:
+            key = (category_cache[cname], scname)
+            subcategories[key] = subcategories.get(key) or r.get("need_want")
+    await cq.resolve_subcategories_for_enrichment(subcategories, subcategory_cache)
+
+
 async def _run_enrichment(
     enrich_input: list[dict],
     rows: list[dict],
@@ -88,6 +274,7 @@ async def _run_enrichment(
     csv_import_id: int,
     account_type: str | None = None,
     user_id: int | None = None,
+    use_batch_api: bool = ENRICH_USE_BATCH_API,
 ) -> None:
     logger.info(
         "Background enrichment starting for csv_import_id=%d (%d rows)",
@@ -95,24 +282,43 @@ async def _run_enrichment(
         len(rows),
     )
 
-    batches = [
-        enrich_input[i : i + ENRICH_BATCH_SIZE]
-        for i in range(0, len(enrich_input), ENRICH_BATCH_SIZE)
-    ]
-    sem = asyncio.Semaphore(3)
+    # Repeat descriptions (same merchant every visit) are enriched once
+    unique_input, copies = dedupe_for_enrichment(enrich_input)
+    unique_by_index = {r["index"]: r for r in unique_input}
 
-    # Pre-count rows whose fingerprints already exist in the DB (duplicates)
-    fp_list: list[str] = []
-    for row in rows:
+    # Descriptions already enriched by an earlier import skip the model
+    async with AsyncSessionLocal() as db:
+        cached = await EnrichmentCacheQueries(db, user_id=user_id).get_many(
+            {enrichment_key(r) for r in unique_input}
+        )
+    unique_input, cached_results = split_cached_enrichment(unique_input, cached)
+    if cached_results:
+        logger.info(
+            "csv_import_id=%d reusing cached enrichment for %d descriptions",
+            csv_import_id,
+            len(cached_results),
+        )
+    batches = _adaptive_batches(unique_input)
+
+    # Each row is parsed once up front; the write loop reuses the result by index
+    parsed: dict[int, tuple[date, Decimal, str | None, str]] = {}
+    parse_errors: dict[int, Exception] = {}
+    # Credit card statements list charges as positive amounts
+    negate = account_type == "Credit Card"
+    for i, row in enumerate(rows):
         try:
             d = parse_date(row[date_col])
             a = parse_amount(row[amount_col])
-            if account_type == "Credit Card":
-                a = -a
-            raw = row[desc_col].strip() if desc_col else None
-            fp_list.append(_make_fingerprint(account_id, d, a, raw))
-        except (ValueError, InvalidOperation):
-            pass
+        except (ValueError, InvalidOperation) as e:
+            parse_errors[i] = e
+            continue
+        if negate:
+            a = -a
+        raw = row[desc_col].strip() if desc_col else None
+        parsed[i] = (d, a, raw, _make_fingerprint(account_id, d, a, raw))
+
+    # Pre-count rows whose fingerprints already exist in the DB (duplicates)
+    fp_list = [fp for _, _, _, fp in parsed.values()]
     if fp_list:
         async with AsyncSessionLocal() as db:
             dup_count = (
@@ -138,36 +344,31 @@ async def _run_enrichment(
             await db.commit()
 
         for attempt in range(1, 4):  # attempts 1, 2, 3
-            async with sem:
-                try:
-                    results, input_tok, output_tok = await asyncio.to_thread(
-                        enricher._enrich_batch, batch, batch_num
+            try:
+                results, input_tok, output_tok = await enricher._enrich_batch(
+                    batch, batch_num
+                )
+                async with AsyncSessionLocal() as db:
+                    await EnrichmentBatchQueries(db).complete(
+                        batch_id, input_tok, output_tok
                     )
+                    await db.commit()
+                return results
+            except Exception:
+                if attempt == 3:
                     async with AsyncSessionLocal() as db:
-                        await EnrichmentBatchQueries(db).complete(
-                            batch_id, input_tok, output_tok
-                        )
+                        await EnrichmentBatchQueries(db).fail(batch_id)
                         await db.commit()
-                    return results
-                except Exception:
-                    if attempt == 3:
-                        async with AsyncSessionLocal() as db:
-                            await EnrichmentBatchQueries(db).fail(batch_id)
-                            await db.commit()
-                        raise
-                    logger.warning(
-                        "Batch %d attempt %d/%d failed for csv_import_id=%d, retrying…",
-                        batch_num,
-                        attempt,
-                        3,
-                        csv_import_id,
-                        exc_info=True,
-                    )
-            await asyncio.sleep(2**attempt)  # 2s, 4s between retries (outside sem)
-
-    tasks = [
-        asyncio.create_task(fetch_batch(batch, i)) for i, batch in enumerate(batches)
-    ]
+                    raise
+                logger.warning(
+                    "Batch %d attempt %d/%d failed for csv_import_id=%d, retrying…",
+                    batch_num,
+                    attempt,
+                    3,
+                    csv_import_id,
+                    exc_info=True,
+                )
+            await asyncio.sleep(2**attempt)  # 2s, 4s between retries
 
     async with AsyncSessionLocal() as db:
         mq = MerchantQueries(db, user_id=user_id)
@@ -178,30 +379,63 @@ async def _run_enrichment(
         category_cache: dict[str, int] = {}
         subcategory_cache: dict[tuple, int] = {}
         cardholder_cache: dict[str, int] = {}
-
-        for coro in asyncio.as_completed(tasks):
-            try:
-                batch_results = await coro
-            except Exception:
-                logger.exception("A batch failed for csv_import_id=%d", csv_import_id)
+        tag_cache: dict[str, int] = {}
+        ecq = EnrichmentCacheQueries(db, user_id=user_id)
+
+        outcomes = _prepend_outcome(
+            cached_results,
+            (
+                _message_batch_outcomes(list(batches), csv_import_id)
+                if use_batch_api
+                else _stream_batches(batches, fetch_batch, ENRICH_CONCURRENCY)
+            ),
+        )
+        async for batch_results in outcomes:
+            if isinstance(batch_results, Exception):
+                logger.error(
+                    "A batch failed for csv_import_id=%d",
+                    csv_import_id,
+                    exc_info=batch_results,
+                )
                 continue
+            if batch_results is not cached_results:
+                await ecq.put_many(cacheable_enrichment(batch_results, unique_by_index))
+            batch_results = expand_duplicate_results(batch_results, copies)
+            await _resolve_batch_lookups(
+                batch_results,
+                mq,
+                cq,
+                chq,
+                merchant_cache,
+                category_cache,
+                subcategory_cache,
+                cardholder_cache,
+            )
+            await TransactionQueries(db, user_id=user_id).resolve_tags_for_enrichment(
+                {
+                    t.strip().lower()
+                    for r in batch_results
+                    for t in (r.get("suggested_tags") or [])
+                    if t.strip()
+                },
+                tag_cache,
+            )
 
             attempted = len(batch_results)
+            tx_rows: dict[str, dict] = {}
+            tag_names_by_fp: dict[str, set[str]] = {}
 
             for r in batch_results:
                 i = r["index"]
-                row = rows[i]
-
-                try:
-                    date_val = parse_date(row[date_col])
-                    amount_val = parse_amount(row[amount_col])
-                    if account_type == "Credit Card":
-                        amount_val = -amount_val
-                except (ValueError, InvalidOperation) as e:
+                if i not in parsed:
                     logger.warning(
-                        "csv_import_id=%d row %d parse error: %s", csv_import_id, i, e
+                        "csv_import_id=%d row %d parse error: %s",
+                        csv_import_id,
+                        i,
+                        parse_errors[i],
                     )
                     continue
+                date_val, amount_val, raw_description, fp = parsed[i]
 
                 mname = r.get("merchant_name")
                 mlocation = r.get("merchant_location")
@@ -236,7 +470,6 @@ async def _run_enrichment(
                         cn, cardholder_cache
                     )
 
-                raw_description = row[desc_col].strip() if desc_col else None
                 description = r.get("description") or raw_description or ""
                 is_recurring = bool(r.get("is_recurring", False))
                 is_refund = bool(r.get("is_refund", False))
@@ -247,58 +480,60 @@ async def _run_enrichment(
                     for t in (r.get("suggested_tags") or [])
                     if t.strip()
                 ]
-                fp = _make_fingerprint(
-                    account_id, date_val, amount_val, raw_description
-                )
-                stmt = sqlite_insert(Transaction).values(
-                    account_id=account_id,
-                    csv_import_id=csv_import_id,
-                    date=date_val,
-                    description=description,
-                    raw_description=raw_description,
-                    amount=amount_val,
-                    merchant_id=merchant_id,
-                    subcategory_id=subcategory_id,
-                    cardholder_id=cardholder_id,
-                    is_recurring=is_recurring,
-                    is_refund=is_refund,
-                    is_international=is_international,
-                    payment_channel=payment_channel,
-                    fingerprint=fp,
-                    user_id=user_id,
-                )
-                stmt = stmt.on_conflict_do_update(
+                # Same-fingerprint rows within a batch collapse onto the last one,
+                # matching what sequential upserts would have left behind.
+                tx_rows[fp] = {
+                    "account_id": account_id,
+                    "csv_import_id": csv_import_id,
+                    "date": date_val,
+                    "description": description,
+                    "raw_description": raw_description,
+                    "amount": amount_val,
+                    "merchant_id": merchant_id,
+                    "subcategory_id": subcategory_id,
+                    "cardholder_id": cardholder_id,
+                    "is_recurring": is_recurring,
+                    "is_refund": is_refund,
+                    "is_international": is_international,
+                    "payment_channel": payment_channel,
+                    "fingerprint": fp,
+                    "user_id": user_id,
+                }
+                tag_names_by_fp.setdefault(fp, set()).update(tag_names)
+
+            tag_links: list[dict] = []
+            if tx_rows:
+                # One multi-row upsert per batch; RETURNING maps fingerprints back
+                # to ids since row order is not guaranteed.
+                insert_stmt = sqlite_insert(Transaction).values(list(tx_rows.values()))
+                upsert_stmt = insert_stmt.on_conflict_do_update(
                     index_elements=["user_id", "fingerprint"],
                     set_={
-                        "description": stmt.excluded.description,
-                        "merchant_id": stmt.excluded.merchant_id,
-                        "subcategory_id": stmt.excluded.subcategory_id,
-                        "cardholder_id": stmt.excluded.cardholder_id,
-                        "is_recurring": stmt.excluded.is_recurring,
-                        "is_refund": stmt.excluded.is_refund,
-                        "is_international": stmt.excluded.is_international,
-                        "payment_channel": stmt.excluded.payment_channel,
-                        "csv_import_id": stmt.excluded.csv_import_id,
+                        "description": insert_stmt.excluded.description,
+                        "merchant_id": insert_stmt.excluded.merchant_id,
+                        "subcategory_id": insert_stmt.excluded.subcategory_id,
+                        "cardholder_id": insert_stmt.excluded.cardholder_id,
+                        "is_recurring": insert_stmt.excluded.is_recurring,
+                        "is_refund": insert_stmt.excluded.is_refund,
+                        "is_international": insert_stmt.excluded.is_international,
+                        "payment_channel": insert_stmt.excluded.payment_channel,
+                        "csv_import_id": insert_stmt.excluded.csv_import_id,
                     },
-                ).returning(Transaction.id)
-                result = await db.execute(stmt)
-                tx_id = result.scalar_one()
-                for tag_name in tag_names:
-                    tag = await db.scalar(
-                        select(Tag).where(Tag.user_id == user_id, Tag.name == tag_name)
+                ).returning(Transaction.id, Transaction.fingerprint)
+                for inserted in (await db.execute(upsert_stmt)).all():
+                    tag_links.extend(
+                        {"transaction_id": inserted.id, "tag_id": tag_cache[name]}
+                        for name in sorted(tag_names_by_fp[inserted.fingerprint])
+                        if name in tag_cache
                     )
-                    if not tag:
-                        tag = Tag(user_id=user_id, name=tag_name)
-                        db.add(tag)
-                        await db.flush()
-                    await db.execute(
-                        sqlite_insert(transaction_tags)
-                        .values(transaction_id=tx_id, tag_id=tag.id)
-                        .on_conflict_do_nothing()
-                    )
-
-            await db.commit()
 
+            if tag_links:
+                await db.execute(
+                    sqlite_insert(transaction_tags)
+                    .values(tag_links)
+                    .on_conflict_do_nothing()
+                )
+            # Rows, tag links and the progress counter land in one transaction
             await csq.increment_enriched(csv_import_id, attempted)
             await db.commit()
 
@@ -306,30 +541,21 @@ async def _run_enrichment(
             async with AsyncSessionLocal() as abort_check:
                 imp_check = await CsvImportQueries(abort_check).get_by_id(csv_import_id)
                 if imp_check and imp_check.status == "aborted":
-                    for t in tasks:
-                        if not t.done():
-                            t.cancel()
+                    await outcomes.aclose()
                     logger.info(
                         "Background enrichment aborted for csv_import_id=%d",
                         csv_import_id,
                     )
                     return  # Do NOT mark complete
 
-    if user_id is not None:
-        async with AsyncSessionLocal() as db:
-            tq = TransactionQueries(db, user_id=user_id)
-            await tq.match_transfers()
-            await db.commit()
-
+    # Transfer matching, completion and summary invalidation commit together
     async with AsyncSessionLocal() as db:
-        csq = CsvImportQueries(db)
-        await csq.mark_complete(csv_import_id)
-        await db.commit()
-
-    if user_id is not None:
-        async with AsyncSessionLocal() as db:
+        if user_id is not None:
+            await TransactionQueries(db, user_id=user_id).match_transfers()
+        await CsvImportQueries(db).mark_complete(csv_import_id)
+        if user_id is not None:
             await AiSummaryCacheQueries(db, user_id=user_id).invalidate_all()
-            await db.commit()
+        await db.commit()
 
     logger.info("Background enrichment complete for csv_import_id=%d", csv_import_id)
 
@@ -370,11 +596,10 @@ async def _run_reenrichment_for_import(
     ]
     tx_ids = [r.id for r in rows]
 
-    batches = [
-        enrich_input[i : i + ENRICH_BATCH_SIZE]
-        for i in range(0, len(enrich_input), ENRICH_BATCH_SIZE)
-    ]
-    sem = asyncio.Semaphore(3)
+    # Repeat descriptions (same merchant every visit) are enriched once
+    unique_input, copies = dedupe_for_enrichment(enrich_input)
+    unique_by_index = {r["index"]: r for r in unique_input}
+    batches = _adaptive_batches(unique_input)
 
     async def fetch_batch(batch, batch_num):
         async with AsyncSessionLocal() as db:
@@ -385,36 +610,31 @@ async def _run_reenrichment_for_import(
             await db.commit()
 
         for attempt in range(1, 4):
-            async with sem:
-                try:
-                    results, input_tok, output_tok = await asyncio.to_thread(
-                        enricher._enrich_batch, batch, batch_num
+            try:
+                results, input_tok, output_tok = await enricher._enrich_batch(
+                    batch, batch_num
+                )
+                async with AsyncSessionLocal() as db:
+                    await EnrichmentBatchQueries(db).complete(
+                        batch_id, input_tok, output_tok
                     )
+                    await db.commit()
+                return results
+            except Exception:
+                if attempt == 3:
                     async with AsyncSessionLocal() as db:
-                        await EnrichmentBatchQueries(db).complete(
-                            batch_id, input_tok, output_tok
-                        )
+                        await EnrichmentBatchQueries(db).fail(batch_id)
                         await db.commit()
-                    return results
-                except Exception:
-                    if attempt == 3:
-                        async with AsyncSessionLocal() as db:
-                            await EnrichmentBatchQueries(db).fail(batch_id)
-                            await db.commit()
-                        raise
-                    logger.warning(
-                        "Re-enrich batch %d attempt %d failed for csv_import_id=%d",
-                        batch_num,
-                        attempt,
-                        csv_import_id,
-                        exc_info=True,
-                    )
+                    raise
+                logger.warning(
+                    "Re-enrich batch %d attempt %d failed for csv_import_id=%d",
+                    batch_num,
+                    attempt,
+                    csv_import_id,
+                    exc_info=True,
+                )
             await asyncio.sleep(2**attempt)
 
-    tasks = [
-        asyncio.create_task(fetch_batch(batch, i)) for i, batch in enumerate(batches)
-    ]
-
     async with AsyncSessionLocal() as db:
         mq = MerchantQueries(db, user_id=user_id)
         cq = CategoryQueries(db, user_id=user_id)
@@ -424,56 +644,74 @@ async def _run_reenrichment_for_import(
         category_cache: dict[str, int] = {}
         subcategory_cache: dict[tuple, int] = {}
         cardholder_cache: dict[str, int] = {}
-
-        for coro in asyncio.as_completed(tasks):
-            try:
-                batch_results = await coro
-            except Exception:
-                logger.exception(
-                    "Re-enrich batch failed for csv_import_id=%d", csv_import_id
+        ecq = EnrichmentCacheQueries(db, user_id=user_id)
+
+        outcomes = _stream_batches(batches, fetch_batch, ENRICH_CONCURRENCY)
+        async for batch_results in outcomes:
+            if isinstance(batch_results, Exception):
+                logger.error(
+                    "Re-enrich batch failed for csv_import_id=%d",
+                    csv_import_id,
+                    exc_info=batch_results,
                 )
                 continue
+            # Later imports should reuse the new result, not the one it replaced
+            await ecq.put_many(
+                cacheable_enrichment(batch_results, unique_by_index), replace=True
+            )
+            batch_results = expand_duplicate_results(batch_results, copies)
+            await _resolve_batch_lookups(
+                batch_results,
+                mq,
+                cq,
+                chq,
+                merchant_cache,
+                category_cache,
+                subcategory_cache,
+                cardholder_cache,
+                category_needs_subcategory=True,
+            )
 
+            # One executemany UPDATE per batch instead of a SELECT per row
+            updates: list[dict] = []
             for r in batch_results:
-                tx = await db.get(Transaction, tx_ids[r["index"]])
-                if tx is None:
-                    continue
+                values: dict[str, Any] = {"_id": tx_ids[r["index"]]}
 
                 mname = r.get("merchant_name")
-                if mname:
-                    tx.merchant_id = await mq.find_or_create_for_enrichment(
+                values["merchant_id"] = (
+                    await mq.find_or_create_for_enrichment(
                         mname,
                         r.get("merchant_location"),
                         merchant_cache,
                         r.get("merchant_website"),
                     )
-                else:
-                    tx.merchant_id = None
+                    if mname
+                    else None
+                )
 
                 cname, scname = r.get("category"), r.get("subcategory")
+                values["subcategory_id"] = None
                 if cname and scname:
                     cid = await cq.find_or_create_for_enrichment(cname, category_cache)
-                    tx.subcategory_id = (
+                    values["subcategory_id"] = (
                         await cq.find_or_create_subcategory_for_enrichment(
                             cid, scname, subcategory_cache, r.get("need_want")
                         )
                     )
-                else:
-                    tx.subcategory_id = None
 
                 cn = r.get("card_number")
-                if cn:
-                    tx.cardholder_id = await chq.find_or_create_for_enrichment(
-                        cn, cardholder_cache
-                    )
-                else:
-                    tx.cardholder_id = None
+                values["cardholder_id"] = (
+                    await chq.find_or_create_for_enrichment(cn, cardholder_cache)
+                    if cn
+                    else None
+                )
 
-                if r.get("description"):
-                    tx.description = r["description"]
-                tx.is_recurring = bool(r.get("is_recurring", False))
+                values["_description"] = r.get("description") or None
+                values["is_recurring"] = bool(r.get("is_recurring", False))
+                updates.append(values)
 
-            await db.commit()
+            if updates:
+                await TransactionQueries(db, user_id=user_id).apply_enrichment(updates)
             await csq.increment_enriched(csv_import_id, len(batch_results))
             await db.commit()
 
@@ -481,9 +719,7 @@ async def _run_reenrichment_for_import(
             async with AsyncSessionLocal() as abort_check:
                 imp_check = await CsvImportQueries(abort_check).get_by_id(csv_import_id)
                 if imp_check and imp_check.status == "aborted":
-                    for t in tasks:
-                        if not t.done():
-                            t.cancel()
+                    await outcomes.aclose()
                     logger.info(
                         "Re-enrichment aborted for csv_import_id=%d", csv_import_id
                     )
@@ -496,6 +732,13 @@ async def _run_reenrichment_for_import(
     logger.info("Re-enrichment complete for csv_import_id=%d", csv_import_id)
 
 
+def _run_async(coro: Coroutine[Any, Any, None]) -> None:
+    """asyncio.run, on uvloop when it is installed."""
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(coro)
+
+
 def run_enrichment_job(
     enrich_input: list[dict],
     rows: list[dict],
@@ -509,7 +752,7 @@ def run_enrichment_job(
 ) -> None:
     _setup_worker_logging()
     try:
-        asyncio.run(
+        _run_async(
             _run_enrichment(
                 enrich_input=enrich_input,
                 rows=rows,
@@ -532,7 +775,7 @@ def run_enrichment_job(
 def run_reenrichment_job(csv_import_id: int, user_id: int | None = None) -> None:
     _setup_worker_logging()
     try:
-        asyncio.run(_run_reenrichment_for_import(csv_import_id, user_id))
+        _run_async(_run_reenrichment_for_import(csv_import_id, user_id))
     except Exception:
         logger.exception(
             "run_reenrichment_job failed for csv_import_id=%d", csv_import_id
@@ -4,14 +4,18 @@ import io
 import logging
 import os
 import pathlib
+import time
+from bisect import bisect_right
 from calendar import isleap, monthrange
 from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterator
 from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from statistics import median as _median
-from typing import Literal
+from operator import itemgetter
+from typing import Any, BinaryIO, Literal
 
+import orjson
 import redis as _redis  # type: ignore[import-untyped]
 from fastapi import (
     Depends,
@@ -20,6 +24,8 @@ from fastapi import (
     Form,
     HTTPException,
     Query,
+    Request,
+    Response,
     UploadFile,
     status,
 )
@@ -39,25 +45,35 @@ from alembic.config import Config as _AlembicConfig
 
 from . import models  # noqa: F401 — ensures models are registered with Base
 from .ai import (
+    ENRICH_BATCH_API_JOB_TIMEOUT,
+    ENRICH_USE_BATCH_API,
+    SAMPLE_ROWS,
+    cacheable_enrichment,
     detector,
     enricher,
     merchant_duplicate_finder,
     query_parser,
     report_summarizer,
 )
-from .auth import create_access_token, get_current_user, verify_password
+from .auth import (
+    create_access_token,
+    forget_user,
+    get_current_user,
+    verify_password_async,
+)
 from .database import get_db
 from .jobs import (  # noqa: F401 — re-exported so tests can still import from budget.main
+    _resolve_batch_lookups,
     parse_amount,
     parse_date,
     run_enrichment_job,
     run_reenrichment_job,
 )
 from .models import (
+    CardHolder,
     Category,
     Merchant,
     Subcategory,
-    Tag,
     Transaction,
     User,
     transaction_tags,
@@ -70,6 +86,7 @@ from .query import (
     CardHolderQueries,
     CategoryQueries,
     CsvImportQueries,
+    EnrichmentCacheQueries,
     MerchantQueries,
     TransactionQueries,
 )
@@ -113,23 +130,21 @@ def _build_category_breakdown(rows: list, prev_rows: list | None = None) -> list
         prev_sub[r.category][r.subcategory] += r.total
 
     result = []
-    for cat in sorted(cat_totals, key=lambda c: cat_totals[c]):
-        subs = sorted(
-            [
-                {
-                    "subcategory": sub,
-                    "total": str(total),
-                    "pct_change": _expenses_pct_change(total, prev_sub[cat][sub]),
-                }
-                for sub, total in sub_totals[cat].items()
-            ],
-            key=lambda x: Decimal(str(x["total"])),
-        )
+    for cat, cat_total in sorted(cat_totals.items(), key=itemgetter(1)):
+        # Sort on the Decimal totals before they are rendered to strings
+        subs = [
+            {
+                "subcategory": sub,
+                "total": str(total),
+                "pct_change": _expenses_pct_change(total, prev_sub[cat][sub]),
+            }
+            for sub, total in sorted(sub_totals[cat].items(), key=itemgetter(1))
+        ]
         result.append(
             {
                 "category": cat,
-                "total": str(cat_totals[cat]),
-                "pct_change": _expenses_pct_change(cat_totals[cat], prev_cat[cat]),
+                "total": str(cat_total),
+                "pct_change": _expenses_pct_change(cat_total, prev_cat[cat]),
                 "subcategories": subs,
             }
         )
@@ -208,6 +223,34 @@ def _format_month_label(month: str) -> str:
     return datetime.strptime(month, "%Y-%m").strftime("%B %Y")
 
 
+async def _release_connection(db: AsyncSession) -> None:
+    """End db's read transaction before a slow external call.
+
+    The pooled connection goes back to the pool instead of being pinned for the
+    seconds a Claude round-trip takes; the session reconnects on its next query.
+    Only call this when the session has no pending writes.
+    """
+    await db.commit()
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _json_response(content: dict) -> Response:
+    """Encode a large response body with orjson.
+
+    Returning a Response skips FastAPI's recursive jsonable_encoder pass.
+    orjson writes dates and datetimes as ISO strings itself; Decimals are
+    rendered with str() to match FastAPI's own encoding of them here.
+    """
+    return Response(
+        orjson.dumps(content, default=_json_default), media_type="application/json"
+    )
+
+
 def _build_monthly_report(
     month: str,
     stats: dict,
@@ -328,7 +371,9 @@ async def login(
 ):
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
-    if user is None or not verify_password(form_data.password, user.password_hash):
+    if user is None or not await verify_password_async(
+        form_data.password, user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -384,6 +429,7 @@ async def google_login(
         # Link Google ID to an existing password-based account
         user.google_id = google_id
         await db.commit()
+        forget_user(user.id)
 
     token = create_access_token(user.id)
     return {
@@ -409,11 +455,51 @@ MONTHLY_FACTORS: dict[str, Decimal] = {
 }
 
 
+# Lower bounds of the (sorted, non-overlapping) ranges, for bisecting
+_FREQUENCY_LOWS = [lo for _, lo, _ in FREQUENCY_RANGES]
+
+# Whole-day medians (the common case) are a direct index into this table
+_GAP_TABLE: list[str | None] = [None] * (FREQUENCY_RANGES[-1][2] + 1)
+for _name, _lo, _hi in FREQUENCY_RANGES:
+    _GAP_TABLE[_lo : _hi + 1] = [_name] * (_hi - _lo + 1)
+
+
 def _classify_gap(median_days: float) -> str | None:
-    for name, lo, hi in FREQUENCY_RANGES:
-        if lo <= median_days <= hi:
-            return name
-    return None
+    if median_days == int(median_days):
+        d = int(median_days)
+        return _GAP_TABLE[d] if 0 <= d < len(_GAP_TABLE) else None
+    # A median of an even number of gaps can land on a half day
+    i = bisect_right(_FREQUENCY_LOWS, median_days) - 1
+    if i < 0:
+        return None
+    name, _, hi = FREQUENCY_RANGES[i]
+    return name if median_days <= hi else None
+
+
+def _midpoint(lo, hi):
+    return lo if lo == hi else (lo + hi) / 2
+
+
+def _recurring_series(rows: list) -> Iterator[dict]:
+    """Classify the series from AnalyticsQueries.get_recurring_series.
+
+    Series with no recognisable cadence are dropped.
+    """
+    for r in rows:
+        median_gap = _midpoint(r.gap_lo, r.gap_hi)
+        frequency = _classify_gap(median_gap)
+        if frequency is None:
+            continue
+        median_amount = _midpoint(r.amount_lo, r.amount_hi)
+        yield {
+            "rep": r,
+            "frequency": frequency,
+            "occurrences": r.occurrences,
+            "last_charge": r.last_charge,
+            "median_gap": median_gap,
+            "median_amount": median_amount,
+            "monthly_cost": median_amount * MONTHLY_FACTORS[frequency],
+        }
 
 
 @app.get("/recurring")
@@ -423,36 +509,18 @@ async def get_recurring(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    rows = await AnalyticsQueries(
-        db, user_id=current_user.id
-    ).get_recurring_transactions(date_from=date_from, date_to=date_to)
-
-    groups: dict[object, list] = defaultdict(list)
-    for r in rows:
-        key = (
-            r.merchant_id
-            if r.merchant_id is not None
-            else f"desc:{r.description.strip().lower()}"
-        )
-        groups[key].append(r)
+    rows = await AnalyticsQueries(db, user_id=current_user.id).get_recurring_series(
+        date_from=date_from, date_to=date_to
+    )
 
+    # Sort on the Decimal monthly cost before it is rendered to a string
+    all_series = sorted(
+        _recurring_series(rows), key=itemgetter("monthly_cost"), reverse=True
+    )
     results = []
-    for txns in groups.values():
-        if len(txns) < 2:
-            continue
-        dates = sorted(t.date for t in txns)
-        gaps = [(dates[i + 1] - dates[i]).days for i in range(len(dates) - 1)]
-        median_gap = _median(gaps)
-        frequency = _classify_gap(median_gap)
-        if frequency is None:
-            continue
-
-        amounts = [abs(t.amount) for t in txns]
-        median_amount = _median(amounts)
-        monthly_cost = median_amount * MONTHLY_FACTORS[frequency]
-        next_estimated = dates[-1] + timedelta(days=round(median_gap))
-
-        rep = txns[0]
+    for series in all_series:
+        rep, last_charge = series["rep"], series["last_charge"]
+        next_estimated = last_charge + timedelta(days=round(series["median_gap"]))
         results.append(
             {
                 "merchant": rep.merchant_name or rep.description,
@@ -460,16 +528,14 @@ async def get_recurring(
                 "website": rep.merchant_website,
                 "category": rep.category_name,
                 "subcategory": rep.subcategory_name,
-                "amount": str(median_amount.quantize(Decimal("0.01"))),
-                "frequency": frequency,
-                "occurrences": len(txns),
-                "last_charge": dates[-1].isoformat(),
+                "amount": str(series["median_amount"].quantize(Decimal("0.01"))),
+                "frequency": series["frequency"],
+                "occurrences": series["occurrences"],
+                "last_charge": last_charge.isoformat(),
                 "next_estimated": next_estimated.isoformat(),
-                "monthly_cost": str(monthly_cost.quantize(Decimal("0.01"))),
+                "monthly_cost": str(series["monthly_cost"].quantize(Decimal("0.01"))),
             }
         )
-
-    results.sort(key=lambda x: Decimal(x["monthly_cost"]), reverse=True)
     return {"items": results}
 
 
@@ -488,41 +554,23 @@ async def get_recurring_summary(
         if cached is not None:
             return cached
 
-    rows = await AnalyticsQueries(
-        db, user_id=current_user.id
-    ).get_recurring_transactions(date_from=date_from, date_to=date_to)
-
-    groups: dict[object, list] = defaultdict(list)
-    for r in rows:
-        key = (
-            r.merchant_id
-            if r.merchant_id is not None
-            else f"desc:{r.description.strip().lower()}"
-        )
-        groups[key].append(r)
+    rows = await AnalyticsQueries(db, user_id=current_user.id).get_recurring_series(
+        date_from=date_from, date_to=date_to
+    )
 
     items = []
-    for txns in groups.values():
-        if len(txns) < 2:
-            continue
-        dates = sorted(t.date for t in txns)
-        gaps = [(dates[i + 1] - dates[i]).days for i in range(len(dates) - 1)]
-        median_gap = _median(gaps)
-        frequency = _classify_gap(median_gap)
-        if frequency is None:
-            continue
-        amounts = [abs(t.amount) for t in txns]
-        median_amount = _median(amounts)
-        monthly_cost = median_amount * MONTHLY_FACTORS[frequency]
-        rep = txns[0]
+    for series in _recurring_series(rows):
+        rep = series["rep"]
         if rep.category_name != "Income":
             items.append(
                 {
                     "merchant": rep.merchant_name or rep.description,
                     "category": rep.category_name,
-                    "amount": str(median_amount.quantize(Decimal("0.01"))),
-                    "frequency": frequency,
-                    "monthly_cost": float(monthly_cost.quantize(Decimal("0.01"))),
+                    "amount": str(series["median_amount"].quantize(Decimal("0.01"))),
+                    "frequency": series["frequency"],
+                    "monthly_cost": float(
+                        series["monthly_cost"].quantize(Decimal("0.01"))
+                    ),
                 }
             )
 
@@ -552,6 +600,7 @@ async def get_recurring_summary(
         ],
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize, "Recurring Charges", report
@@ -564,6 +613,78 @@ async def get_recurring_summary(
     return result
 
 
+# Dashboard aggregates are recomputed from scratch on every request, so
+# responses are memoized per user for a short while. Entries are keyed on a
+# fingerprint of the user's transactions (imports and deletions show up at
+# once) and the whole cache is dropped after any write handled by this process.
+# The cache is per process and the fingerprint is only (count, max id), so an
+# edit made through another worker or an RQ re-enrichment job is not seen until
+# the entry expires; the TTL is kept short to bound that staleness.
+STATS_CACHE_TTL_SECONDS = 10
+STATS_CACHE_MAXSIZE = 256
+
+_stats_cache: dict[tuple, tuple[float, dict]] = {}
+
+
+def clear_stats_cache() -> None:
+    _stats_cache.clear()
+    _categories_text_cache.clear()
+    _parse_cache.clear()
+
+
+# POST endpoints that only read, so they leave the caches alone
+_READ_ONLY_POSTS = frozenset(
+    {"/auth/login", "/ai/parse-query", "/ai/find-duplicate-merchants"}
+)
+
+
+@app.middleware("http")
+async def _invalidate_stats_cache(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        request.method not in ("GET", "HEAD", "OPTIONS")
+        and request.url.path not in _READ_ONLY_POSTS
+    ):
+        clear_stats_cache()
+    return response
+
+
+async def _gather_reads(
+    db: AsyncSession, *reads: Callable[[AsyncSession], Awaitable[Any]]
+) -> list:
+    """Run independent read queries concurrently, each on its own session.
+
+    An AsyncSession cannot execute statements concurrently, so gathering several
+    queries on the request session still runs them back to back. The request
+    session's connection is released first so a request holds at most
+    len(reads) pooled connections, never one more; db must have no pending
+    writes.
+    """
+    await _release_connection(db)
+
+    async def run(read):
+        async with AsyncSession(db.bind, expire_on_commit=False) as session:
+            return await read(session)
+
+    return list(await asyncio.gather(*(run(read) for read in reads)))
+
+
+async def _cached_stats(
+    db: AsyncSession, user_id: int, key: tuple, build: Callable[[], Awaitable[dict]]
+) -> dict:
+    fingerprint = await AnalyticsQueries(db, user_id=user_id).data_fingerprint()
+    cache_key = (user_id, *key, fingerprint)
+    hit = _stats_cache.get(cache_key)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+    result = await build()
+    if len(_stats_cache) >= STATS_CACHE_MAXSIZE:
+        # Drop the oldest entry (dicts preserve insertion order)
+        _stats_cache.pop(next(iter(_stats_cache)))
+    _stats_cache[cache_key] = (time.monotonic() + STATS_CACHE_TTL_SECONDS, result)
+    return result
+
+
 @app.get("/monthly")
 async def list_months(
     db: AsyncSession = Depends(get_db),
@@ -579,14 +700,22 @@ async def get_monthly_report(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    aq = AnalyticsQueries(db, user_id=current_user.id)
-    stats, prev_stats, rows, prev_rows = await asyncio.gather(
-        aq.get_month_stats(month),
-        aq.get_month_stats(_prev_month(month)),
-        aq.get_category_breakdown(month),
-        aq.get_category_breakdown(_prev_month(month)),
+    def aq(session: AsyncSession) -> AnalyticsQueries:
+        return AnalyticsQueries(session, user_id=current_user.id)
+
+    async def build():
+        stats, prev_stats, rows, prev_rows = await _gather_reads(
+            db,
+            lambda s: aq(s).get_month_stats(month),
+            lambda s: aq(s).get_month_stats(_prev_month(month)),
+            lambda s: aq(s).get_category_breakdown(month),
+            lambda s: aq(s).get_category_breakdown(_prev_month(month)),
+        )
+        return _build_monthly_report(month, stats, prev_stats, rows, prev_rows)
+
+    return _json_response(
+        await _cached_stats(db, current_user.id, ("monthly", month), build)
     )
-    return _build_monthly_report(month, stats, prev_stats, rows, prev_rows)
 
 
 @app.get("/monthly/{month}/summary")
@@ -652,6 +781,7 @@ async def get_monthly_summary(
         "days_in_month": days_in_month,
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize, _format_month_label(month), report
@@ -751,6 +881,7 @@ async def get_yearly_summary(
         "days_in_year": days_in_year,
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(report_summarizer.summarize, year, report)
     except Exception as e:
@@ -836,6 +967,7 @@ async def get_overview_summary(
     if not overview_is_complete:
         report["period_meta"] = {"is_complete": False, "date_to": date_to}
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize, period_label, report
@@ -856,8 +988,43 @@ async def get_overview(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    aq = AnalyticsQueries(db, user_id=current_user.id)
-    summary = await aq.get_overview_summary(date_from, date_to)
+    # Budget warnings depend on the current month, so it is part of the key
+    key = ("overview", date_from, date_to, date.today().isoformat())
+    return _json_response(
+        await _cached_stats(
+            db,
+            current_user.id,
+            key,
+            lambda: _build_overview(db, current_user.id, date_from, date_to),
+        )
+    )
+
+
+# Income sources shown in the overview sankey before the rest become "Other Income"
+TOP_INCOME = 8
+
+
+async def _build_overview(
+    db: AsyncSession, user_id: int, date_from: str | None, date_to: str | None
+) -> dict:
+    def aq(session: AsyncSession) -> AnalyticsQueries:
+        return AnalyticsQueries(session, user_id=user_id)
+
+    current_month = date.today().strftime("%Y-%m")
+    summary, income_rows, expense_rows, income_cat_rows, budget_rows = (
+        await _gather_reads(
+            db,
+            lambda s: aq(s).get_overview_summary(date_from, date_to),
+            lambda s: aq(s).get_income_by_merchant(
+                date_from, date_to, top_n=TOP_INCOME
+            ),
+            lambda s: aq(s).get_expenses_by_category(date_from, date_to),
+            lambda s: aq(s).get_income_by_category(date_from, date_to),
+            lambda s: BudgetQueries(s, user_id=user_id).list_with_spending(
+                current_month
+            ),
+        )
+    )
     transaction_count = summary["transaction_count"]
     net = summary["net"]
     income = summary["income"]
@@ -865,21 +1032,12 @@ async def get_overview(
     savings_rate = float(net / income * 100) if income > 0 else None
 
     # --- sankey: income by merchant ---
-    income_rows = await aq.get_income_by_merchant(date_from, date_to)
-
-    # top 8 income sources; collapse rest into "Other Income"
-    TOP_INCOME = 8
-    income_sources = [
-        {"name": r.name, "amount": str(r.total)} for r in income_rows[:TOP_INCOME]
-    ]
-    if len(income_rows) > TOP_INCOME:
-        other_income = sum(r.total for r in income_rows[TOP_INCOME:])
-        income_sources.append({"name": "Other Income", "amount": str(other_income)})
+    # The query already collapses sources past TOP_INCOME into "Other Income"
+    income_sources = [{"name": r.name, "amount": str(r.total)} for r in income_rows]
 
     # --- sankey: expenses by category ---
-    expense_rows = await aq.get_expenses_by_category(date_from, date_to)
-
-    # top 14 expense categories; collapse rest into "Other Expenses"
+    # top 14 expense categories; collapse rest into "Other Expenses". The donut
+    # below needs every category, so this tail is summed here rather than in SQL
     TOP_EXPENSES = 14
     expense_categories = [
         {"name": r.name, "amount": str(r.total)} for r in expense_rows[:TOP_EXPENSES]
@@ -889,25 +1047,15 @@ async def get_overview(
         expense_categories.append({"name": "Other Expenses", "amount": str(other_exp)})
 
     # --- donut: all expense categories (no cap) ---
-    expense_breakdown = [
-        {"name": r.name, "amount": str(r.total)}
-        for r in expense_rows
-        if float(r.total) < 0
-    ]
+    # The queries only sum rows of the matching sign, so totals need no re-check
+    expense_breakdown = [{"name": r.name, "amount": str(r.total)} for r in expense_rows]
 
     # --- income by category ---
-    income_cat_rows = await aq.get_income_by_category(date_from, date_to)
     income_breakdown = [
-        {"name": r.name, "amount": str(r.total)}
-        for r in income_cat_rows
-        if float(r.total) > 0
+        {"name": r.name, "amount": str(r.total)} for r in income_cat_rows
     ]
 
     # --- budget warnings ---
-    bq = BudgetQueries(db, user_id=current_user.id)
-    today = date.today()
-    current_month = today.strftime("%Y-%m")
-    budget_rows = await bq.list_with_spending(current_month)
     budget_warnings = []
     for brow in budget_rows:
         bspent = Decimal(brow.spent or 0)
@@ -1010,6 +1158,7 @@ async def get_trends_summary(
         ],
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize,
@@ -1049,21 +1198,23 @@ async def list_merchants(
         limit=limit,
         after_id=after,
     )
-    return {
-        "items": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "location": r.location,
-                "website": r.website,
-                "transaction_count": r.transaction_count,
-                "total_amount": str(r.total_amount),
-            }
-            for r in items
-        ],
-        "has_more": has_more,
-        "next_cursor": next_cursor,
-    }
+    return _json_response(
+        {
+            "items": [
+                {
+                    "id": r.id,
+                    "name": r.name,
+                    "location": r.location,
+                    "website": r.website,
+                    "transaction_count": r.transaction_count,
+                    "total_amount": str(r.total_amount),
+                }
+                for r in items
+            ],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 def _merchant_row(merchant: Merchant, transaction_count: int, total_amount) -> dict:
@@ -1119,10 +1270,10 @@ async def update_merchant(
     if merchant is None:
         raise HTTPException(status_code=404, detail="Merchant not found")
     await mq.update(merchant, body.name, body.location, body.website)
-    await db.commit()
     await AiSummaryCacheQueries(db, user_id=current_user.id).invalidate_all()
+    # Sessions don't expire on commit and nothing here is server-generated,
+    # so the merchant needs no refresh afterwards
     await db.commit()
-    await db.refresh(merchant)
     transaction_count, total_amount = await mq.get_stats(merchant_id)
     return _merchant_row(merchant, transaction_count, total_amount)
 
@@ -1150,21 +1301,23 @@ async def list_categories(
         sort_by=sort_by,
         sort_dir=sort_dir,
     )
-    return {
-        "items": [
-            {
-                "category": r.category,
-                "subcategory": r.subcategory,
-                "transaction_count": r.transaction_count,
-                "total_amount": str(r.total_amount),
-                "category_id": r.category_id,
-                "classification": r.classification,
-                "subcategory_id": r.subcategory_id,
-                "subcategory_classification": r.subcategory_classification,
-            }
-            for r in rows
-        ]
-    }
+    return _json_response(
+        {
+            "items": [
+                {
+                    "category": r.category,
+                    "subcategory": r.subcategory,
+                    "transaction_count": r.transaction_count,
+                    "total_amount": str(r.total_amount),
+                    "category_id": r.category_id,
+                    "classification": r.classification,
+                    "subcategory_id": r.subcategory_id,
+                    "subcategory_classification": r.subcategory_classification,
+                }
+                for r in rows
+            ]
+        }
+    )
 
 
 @app.get("/categories/summary")
@@ -1232,6 +1385,7 @@ async def get_categories_summary(
         "categories": sorted_cats[:20],
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize,
@@ -1282,22 +1436,24 @@ async def list_accounts(
         limit=limit,
         after_id=after,
     )
-    return {
-        "items": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "institution": r.institution,
-                "account_type": r.account_type,
-                "created_at": r.created_at.isoformat(),
-                "transaction_count": r.transaction_count,
-                "total_amount": str(r.total_amount),
-            }
-            for r in items
-        ],
-        "has_more": has_more,
-        "next_cursor": next_cursor,
-    }
+    return _json_response(
+        {
+            "items": [
+                {
+                    "id": r.id,
+                    "name": r.name,
+                    "institution": r.institution,
+                    "account_type": r.account_type,
+                    "created_at": r.created_at.isoformat(),
+                    "transaction_count": r.transaction_count,
+                    "total_amount": str(r.total_amount),
+                }
+                for r in items
+            ],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @app.get("/imports")
@@ -1327,24 +1483,26 @@ async def list_imports(
         limit=limit,
         after_id=after,
     )
-    return {
-        "items": [
-            {
-                "id": r.id,
-                "filename": r.filename,
-                "account": r.account,
-                "imported_at": r.imported_at.isoformat() + "Z",
-                "row_count": r.row_count,
-                "enriched_rows": r.enriched_rows,
-                "skipped_duplicates": r.skipped_duplicates,
-                "status": r.status,
-                "transaction_count": r.transaction_count,
-            }
-            for r in items
-        ],
-        "has_more": has_more,
-        "next_cursor": next_cursor,
-    }
+    return _json_response(
+        {
+            "items": [
+                {
+                    "id": r.id,
+                    "filename": r.filename,
+                    "account": r.account,
+                    "imported_at": r.imported_at.isoformat() + "Z",
+                    "row_count": r.row_count,
+                    "enriched_rows": r.enriched_rows,
+                    "skipped_duplicates": r.skipped_duplicates,
+                    "status": r.status,
+                    "transaction_count": r.transaction_count,
+                }
+                for r in items
+            ],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @app.get("/imports/{import_id}/progress")
@@ -1422,6 +1580,21 @@ async def delete_import(
     await db.commit()
 
 
+def _read_csv(raw: BinaryIO) -> tuple[list[str] | None, list[list[str]]]:
+    """Parse an uploaded CSV into (header names, rows as lists), decoding as
+    it reads rather than holding a decoded copy of the whole file."""
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        reader = csv.reader(text)
+        fieldnames = next(reader, None)
+        # Blank lines carry no row, as with csv.DictReader
+        rows = [row for row in reader if row]
+    finally:
+        # Leave the upload's file open; UploadFile closes it
+        text.detach()
+    return fieldnames, rows
+
+
 @app.post("/import-csv")
 async def import_csv(
     file: UploadFile = File(...),
@@ -1433,15 +1606,19 @@ async def import_csv(
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
-    contents = await file.read()
-    decoded = contents.decode("utf-8")
-    reader = csv.DictReader(io.StringIO(decoded))
-    rows = list(reader)
+    # Decoding/parsing a large statement and the (sync) column detection call
+    # would otherwise stall every other request on the event loop
+    await file.seek(0)
+    fieldnames, rows = await asyncio.to_thread(_read_csv, file.file)
 
-    if reader.fieldnames is None:
+    if fieldnames is None:
         raise HTTPException(status_code=422, detail="CSV has no headers")
-    fieldnames = list(reader.fieldnames)
-    column_mapping = detector.detect(fieldnames, rows)
+    # Only the detector's sample needs header-keyed rows
+    sample = [dict(zip(fieldnames, row)) for row in rows[:SAMPLE_ROWS]]
+    try:
+        column_mapping = await asyncio.to_thread(detector.detect, fieldnames, sample)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Column detection failed: {e}")
 
     date_idx = column_mapping["date"]
     amount_idx = column_mapping["amount"]
@@ -1470,23 +1647,38 @@ async def import_csv(
     desc_idx = column_mapping["description"]
     desc_col = fieldnames[desc_idx] if desc_idx is not None else None
 
-    # Build enrichment input
-    enrich_input = [
-        {
-            "index": i,
-            "description": row[desc_col].strip() if desc_col else "",
-            "amount": row[amount_col],
-            "date": row[date_col],
-        }
-        for i, row in enumerate(rows)
-    ]
+    # Short rows read as empty cells
+    width = 1 + max(i for i in (date_idx, amount_idx, desc_idx) if i is not None)
+    for row in rows:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+
+    # The job reads only these three columns, so it is sent just those rather
+    # than every column of every row
+    job_rows: list[dict[str, str]]
+    if desc_col is not None and desc_idx is not None:
+        cells = list(map(itemgetter(date_idx, amount_idx, desc_idx), rows))
+        job_rows = [
+            {date_col: d, amount_col: a, desc_col: desc} for d, a, desc in cells
+        ]
+        enrich_input = [
+            {"index": i, "description": desc.strip(), "amount": a, "date": d}
+            for i, (d, a, desc) in enumerate(cells)
+        ]
+    else:
+        cells = list(map(itemgetter(date_idx, amount_idx), rows))
+        job_rows = [{date_col: d, amount_col: a} for d, a in cells]
+        enrich_input = [
+            {"index": i, "description": "", "amount": a, "date": d}
+            for i, (d, a) in enumerate(cells)
+        ]
 
     await db.commit()
 
     _enrichment_queue.enqueue(
         run_enrichment_job,
         enrich_input,
-        rows,
+        job_rows,
         date_col,
         amount_col,
         desc_col,
@@ -1494,7 +1686,8 @@ async def import_csv(
         csv_import.id,
         account_type,
         current_user.id,
-        job_timeout=1800,
+        # Message Batches can take hours to come back; interactive calls can't
+        job_timeout=ENRICH_BATCH_API_JOB_TIMEOUT if ENRICH_USE_BATCH_API else 1800,
     )
 
     return {
@@ -1567,6 +1760,11 @@ async def list_transactions(
         "date", "amount", "description", "merchant", "category", "account"
     ] = Query("date"),
     sort_dir: Literal["asc", "desc"] = Query("desc"),
+    include_totals: bool = Query(
+        True,
+        description="Return total_count/total_amount on the first page; "
+        "false skips the aggregate over every matching row",
+    ),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -1590,49 +1788,43 @@ async def list_transactions(
         cardholder=cardholder,
         tag=tag,
     )
-    total_count, total_amount = await asyncio.gather(
-        txq.count(conditions),
-        txq.sum(conditions),
-    )
-    items, has_more, next_cursor = await txq.list(
-        conditions,
-        sort_by=sort_by,
-        sort_dir=sort_dir,
-        limit=limit,
-        after_id=after,
+
+    def page(session: AsyncSession):
+        return TransactionQueries(session, user_id=current_user.id).list(
+            conditions,
+            sort_by=sort_by,
+            sort_dir=sort_dir,
+            limit=limit,
+            after_id=after,
+        )
+
+    # Totals don't change between pages; the client reads them from the first.
+    # That first page runs both queries side by side on separate connections.
+    total_count: int | None = None
+    total_amount: Decimal | None = None
+    if after is None and include_totals:
+        (total_count, total_amount), (items, has_more, next_cursor) = (
+            await _gather_reads(
+                db,
+                lambda s: TransactionQueries(s, user_id=current_user.id).totals(
+                    conditions
+                ),
+                page,
+            )
+        )
+    else:
+        items, has_more, next_cursor = await page(db)
+    tags = await txq.tag_names_for([r.id for r in items])
+    return _json_response(
+        {
+            # orjson renders the dates natively and the Decimals via _json_default
+            "items": [{**r._asdict(), "tags": tags.get(r.id, [])} for r in items],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "total_count": total_count,
+            "total_amount": total_amount,
+        }
     )
-    return {
-        "items": [
-            {
-                "id": tx.id,
-                "date": tx.date.isoformat(),
-                "description": tx.description,
-                "amount": str(tx.amount),
-                "account_id": tx.account_id,
-                "account": tx.account.name,
-                "merchant": tx.merchant.name if tx.merchant else None,
-                "merchant_website": tx.merchant.website if tx.merchant else None,
-                "category": tx.subcategory.category.name if tx.subcategory else None,
-                "subcategory": tx.subcategory.name if tx.subcategory else None,
-                "notes": tx.notes,
-                "is_recurring": tx.is_recurring,
-                "is_excluded": tx.is_excluded,
-                "is_refund": tx.is_refund,
-                "is_international": tx.is_international,
-                "payment_channel": tx.payment_channel,
-                "raw_description": tx.raw_description,
-                "cardholder_name": tx.cardholder.name if tx.cardholder else None,
-                "card_number": tx.cardholder.card_number if tx.cardholder else None,
-                "tags": [t.name for t in tx.tags],
-                "linked_transaction_id": tx.linked_transaction_id,
-            }
-            for tx in items
-        ],
-        "has_more": has_more,
-        "next_cursor": next_cursor,
-        "total_count": total_count,
-        "total_amount": str(total_amount),
-    }
 
 
 # ---------------------------------------------------------------------------
@@ -1670,7 +1862,11 @@ async def update_transaction(
     if body.is_excluded is not None:
         tx.is_excluded = body.is_excluded
 
+    # The related rows resolved below also build the response, so the
+    # transaction needn't be reloaded after commit
+
     # Merchant
+    merchant: Merchant | None = None
     if body.merchant_name and body.merchant_name.strip():
         merchant = await txq.find_or_create_merchant(body.merchant_name.strip())
         tx.merchant_id = merchant.id
@@ -1678,6 +1874,8 @@ async def update_transaction(
         tx.merchant_id = None
 
     # Category + Subcategory
+    category: Category | None = None
+    subcategory: Subcategory | None = None
     if (
         body.category
         and body.category.strip()
@@ -1693,10 +1891,12 @@ async def update_transaction(
         tx.subcategory_id = None
 
     # CardHolder
+    cardholder: CardHolder | None = None
     if body.card_number and body.card_number.strip():
         chq = CardHolderQueries(db, user_id=current_user.id)
         ch_id = await chq.find_or_create_for_enrichment(body.card_number.strip(), {})
         tx.cardholder_id = ch_id
+        cardholder = await db.get(CardHolder, ch_id)
     else:
         tx.cardholder_id = None
 
@@ -1724,19 +1924,11 @@ async def update_transaction(
                 old_other.linked_transaction_id = None
         tx.linked_transaction_id = None
 
-    month_key = tx.date.strftime("%Y-%m")
-    year_key = str(tx.date.year)
-    await db.commit()
     cache = AiSummaryCacheQueries(db, user_id=current_user.id)
-    await cache.invalidate_period("monthly", month_key)
-    await cache.invalidate_period("yearly", year_key)
+    await cache.invalidate_period("monthly", tx.date.strftime("%Y-%m"))
+    await cache.invalidate_period("yearly", str(tx.date.year))
     await db.commit()
 
-    db.expire(tx)
-    tx = await txq.get_by_id(transaction_id)
-    if tx is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-
     return {
         "id": tx.id,
         "date": tx.date.isoformat(),
@@ -1744,10 +1936,10 @@ async def update_transaction(
         "amount": str(tx.amount),
         "account_id": tx.account_id,
         "account": tx.account.name,
-        "merchant": tx.merchant.name if tx.merchant else None,
-        "merchant_website": tx.merchant.website if tx.merchant else None,
-        "category": tx.subcategory.category.name if tx.subcategory else None,
-        "subcategory": tx.subcategory.name if tx.subcategory else None,
+        "merchant": merchant.name if merchant else None,
+        "merchant_website": merchant.website if merchant else None,
+        "category": category.name if category else None,
+        "subcategory": subcategory.name if subcategory else None,
         "notes": tx.notes,
         "is_recurring": tx.is_recurring,
         "is_excluded": tx.is_excluded,
@@ -1755,8 +1947,8 @@ async def update_transaction(
         "is_international": tx.is_international,
         "payment_channel": tx.payment_channel,
         "raw_description": tx.raw_description,
-        "cardholder_name": tx.cardholder.name if tx.cardholder else None,
-        "card_number": tx.cardholder.card_number if tx.cardholder else None,
+        "cardholder_name": cardholder.name if cardholder else None,
+        "card_number": cardholder.card_number if cardholder else None,
         "tags": [t.name for t in tx.tags],
         "linked_transaction_id": tx.linked_transaction_id,
     }
@@ -1800,7 +1992,9 @@ async def list_duplicate_transactions(
 ):
     txq = TransactionQueries(db, user_id=current_user.id)
     groups = await txq.find_duplicates()
-    return {"groups": [[_serialize_tx(tx) for tx in group] for group in groups]}
+    return _json_response(
+        {"groups": [[_serialize_tx(tx) for tx in group] for group in groups]}
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -1850,9 +2044,8 @@ async def re_enrich_transactions(
     ]
 
     try:
-        results, _in_tok, _out_tok = await asyncio.to_thread(
-            enricher._enrich_batch, enrich_input, 0
-        )
+        batch_outputs = await enricher.enrich_all(enrich_input)
+        results = [r for batch_results, _, _ in batch_outputs for r in batch_results]
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"AI enrichment failed: {e}")
 
@@ -1863,99 +2056,106 @@ async def re_enrich_transactions(
     category_cache: dict[str, int] = {}
     subcategory_cache: dict[tuple, int] = {}
     cardholder_cache: dict[str, int] = {}
+    tag_cache: dict[str, int] = {}
+
+    # Warm every lookup with a few set-wise queries so the loop below resolves
+    # from the caches rather than querying per transaction
+    await _resolve_batch_lookups(
+        results,
+        mq,
+        cq,
+        chq,
+        merchant_cache,
+        category_cache,
+        subcategory_cache,
+        cardholder_cache,
+        category_needs_subcategory=True,
+    )
+    await txq.resolve_tags_for_enrichment(
+        {
+            t.strip().lower()
+            for r in results
+            for t in (r.get("suggested_tags") or [])
+            if t.strip()
+        },
+        tag_cache,
+    )
 
+    updates: list[dict] = []
+    tag_links: list[dict] = []
     for r in results:
-        tx = eligible[r["index"]]
+        tx_id = eligible[r["index"]].id
 
         mname = r.get("merchant_name")
-        mlocation = r.get("merchant_location")
-        mwebsite = r.get("merchant_website")
-        if mname:
-            tx.merchant_id = await mq.find_or_create_for_enrichment(
-                mname, mlocation, merchant_cache, mwebsite
+        merchant_id = (
+            await mq.find_or_create_for_enrichment(
+                mname,
+                r.get("merchant_location"),
+                merchant_cache,
+                r.get("merchant_website"),
             )
-        else:
-            tx.merchant_id = None
+            if mname
+            else None
+        )
 
         cname = r.get("category")
         scname = r.get("subcategory")
+        subcategory_id = None
         if cname and scname:
             cid = await cq.find_or_create_for_enrichment(cname, category_cache)
-            tx.subcategory_id = await cq.find_or_create_subcategory_for_enrichment(
+            subcategory_id = await cq.find_or_create_subcategory_for_enrichment(
                 cid, scname, subcategory_cache, r.get("need_want")
             )
-        else:
-            tx.subcategory_id = None
 
         cn = r.get("card_number")
-        if cn:
-            tx.cardholder_id = await chq.find_or_create_for_enrichment(
-                cn, cardholder_cache
-            )
-        else:
-            tx.cardholder_id = None
-
-        if r.get("description"):
-            tx.description = r["description"]
-        tx.is_recurring = bool(r.get("is_recurring", False))
-        tx.is_refund = bool(r.get("is_refund", False))
-        tx.is_international = bool(r.get("is_international", False))
-        tx.payment_channel = r.get("payment_channel")
-
-        tag_names = [
-            t.strip().lower() for t in (r.get("suggested_tags") or []) if t.strip()
-        ]
-        if tag_names:
-            await db.flush()
-            for tag_name in tag_names:
-                tag = await db.scalar(
-                    select(Tag).where(
-                        Tag.user_id == current_user.id, Tag.name == tag_name
-                    )
-                )
-                if not tag:
-                    tag = Tag(user_id=current_user.id, name=tag_name)
-                    db.add(tag)
-                    await db.flush()
-                await db.execute(
-                    sqlite_insert(transaction_tags)
-                    .values(transaction_id=tx.id, tag_id=tag.id)
-                    .on_conflict_do_nothing()
-                )
+        cardholder_id = (
+            await chq.find_or_create_for_enrichment(cn, cardholder_cache)
+            if cn
+            else None
+        )
 
-    await db.commit()
+        updates.append(
+            {
+                "_id": tx_id,
+                "_description": r.get("description") or None,
+                "merchant_id": merchant_id,
+                "subcategory_id": subcategory_id,
+                "cardholder_id": cardholder_id,
+                "is_recurring": bool(r.get("is_recurring", False)),
+                "is_refund": bool(r.get("is_refund", False)),
+                "is_international": bool(r.get("is_international", False)),
+                "payment_channel": r.get("payment_channel"),
+            }
+        )
+        tag_links.extend(
+            {"transaction_id": tx_id, "tag_id": tag_cache[name]}
+            for name in {
+                t.strip().lower() for t in (r.get("suggested_tags") or []) if t.strip()
+            }
+            if name in tag_cache
+        )
+
+    # One executemany UPDATE instead of a flush-time UPDATE per loaded object
+    if updates:
+        await txq.apply_enrichment(updates)
+    # Later imports should reuse the new result, not the one it replaced
+    await EnrichmentCacheQueries(db, user_id=current_user.id).put_many(
+        cacheable_enrichment(results, dict(enumerate(enrich_input))),
+        replace=True,
+    )
+    if tag_links:
+        await db.execute(
+            sqlite_insert(transaction_tags).values(tag_links).on_conflict_do_nothing()
+        )
     await AiSummaryCacheQueries(db, user_id=current_user.id).invalidate_all()
     await db.commit()
 
-    updated = await txq.get_by_ids([tx.id for tx in eligible])
+    # The loaded objects predate the Core UPDATE; reload them from the rows
+    eligible_ids = [tx.id for tx in eligible]
+    db.expire_all()
+    updated = await txq.get_by_ids(eligible_ids)
 
-    return {
-        "items": [
-            {
-                "id": tx.id,
-                "date": tx.date.isoformat(),
-                "description": tx.description,
-                "amount": str(tx.amount),
-                "account_id": tx.account_id,
-                "account": tx.account.name,
-                "merchant": tx.merchant.name if tx.merchant else None,
-                "merchant_website": tx.merchant.website if tx.merchant else None,
-                "category": tx.subcategory.category.name if tx.subcategory else None,
-                "subcategory": tx.subcategory.name if tx.subcategory else None,
-                "notes": tx.notes,
-                "is_recurring": tx.is_recurring,
-                "is_excluded": tx.is_excluded,
-                "is_refund": tx.is_refund,
-                "is_international": tx.is_international,
-                "payment_channel": tx.payment_channel,
-                "raw_description": tx.raw_description,
-                "cardholder_name": tx.cardholder.name if tx.cardholder else None,
-                "card_number": tx.cardholder.card_number if tx.cardholder else None,
-                "tags": [t.name for t in tx.tags],
-            }
-            for tx in updated
-        ]
-    }
+    return _json_response({"items": [_serialize_tx(tx) for tx in updated]})
 
 
 @app.get("/tags")
@@ -2017,8 +2217,9 @@ async def find_duplicate_merchants(
         )
     merchants_text = "\n".join(lines)
 
+    await _release_connection(db)
     try:
-        result = await asyncio.to_thread(merchant_duplicate_finder.find, merchants_text)
+        result = await merchant_duplicate_finder.find(merchants_text)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"AI analysis failed: {e}")
 
@@ -2075,10 +2276,8 @@ async def merge_merchants(
     loser_ids = [m.id for m in rows if m.id != winner.id]
 
     await mq.merge(winner, loser_ids, body.canonical_name, body.canonical_location)
-    await db.commit()
     await AiSummaryCacheQueries(db, user_id=current_user.id).invalidate_all()
     await db.commit()
-    await db.refresh(winner)
 
     transaction_count, _ = await mq.get_stats(winner.id)
 
@@ -2113,20 +2312,22 @@ async def list_cardholders(
         limit=limit,
         after_id=after,
     )
-    return {
-        "items": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "card_number": r.card_number,
-                "transaction_count": r.transaction_count,
-                "total_amount": str(r.total_amount),
-            }
-            for r in items
-        ],
-        "has_more": has_more,
-        "next_cursor": next_cursor,
-    }
+    return _json_response(
+        {
+            "items": [
+                {
+                    "id": r.id,
+                    "name": r.name,
+                    "card_number": r.card_number,
+                    "transaction_count": r.transaction_count,
+                    "total_amount": str(r.total_amount),
+                }
+                for r in items
+            ],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 class CardHolderUpdate(BaseModel):
@@ -2157,30 +2358,88 @@ async def update_cardholder(
     }
 
 
-@app.post("/ai/parse-query")
-async def parse_query_endpoint(
-    body: ParseQueryRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+# Rendered category list for the parse-query prompt, per user. Writes in this
+# process clear it along with the stats cache; the TTL bounds staleness from
+# categories created by the enrichment worker.
+CATEGORIES_TEXT_CACHE_TTL_SECONDS = 60
+
+_categories_text_cache: dict[int, tuple[float, str]] = {}
+
+
+async def _categories_text(db: AsyncSession, user_id: int) -> str:
+    hit = _categories_text_cache.get(user_id)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+
     # Fetch all known categories and subcategories so Claude uses exact strings
-    rows = await CategoryQueries(db, user_id=current_user.id).list_all()
+    rows = await CategoryQueries(db, user_id=user_id).list_all()
 
     # Build a human-readable list: "Food & Drink: Restaurants, Groceries, ..."
     cat_map: dict[str, list[str]] = defaultdict(list)
     for r in rows:
         cat_map[r.cat].append(r.sub)
-    categories_text = (
+    text = (
         "\n".join(
             f"- {cat}: {', '.join(subs)}" for cat, subs in sorted(cat_map.items())
         )
         or "(no categories in database yet)"
     )
+    if len(_categories_text_cache) >= STATS_CACHE_MAXSIZE:
+        _categories_text_cache.pop(next(iter(_categories_text_cache)))
+    _categories_text_cache[user_id] = (
+        time.monotonic() + CATEGORIES_TEXT_CACHE_TTL_SECONDS,
+        text,
+    )
+    return text
 
+
+# Claude's filters for a query depend only on its wording, today's date and the
+# category list, so repeats of a question are answered from here.
+PARSE_CACHE_MAXSIZE = 512
+
+_parse_cache: dict[tuple, dict] = {}
+_parse_locks: dict[tuple, asyncio.Lock] = {}
+# Requests holding or waiting on each lock; the lock is dropped at zero
+_parse_waiters: dict[tuple, int] = {}
+
+
+async def _parse_query_cached(user_id: int, query: str, categories_text: str) -> dict:
+    key = (
+        user_id,
+        " ".join(query.lower().split()),
+        date.today().isoformat(),
+        categories_text,
+    )
+    # Concurrent identical misses wait on one Claude call instead of each making one
+    lock = _parse_locks.setdefault(key, asyncio.Lock())
+    _parse_waiters[key] = _parse_waiters.get(key, 0) + 1
     try:
-        result = await asyncio.to_thread(
-            query_parser.parse, body.query, categories_text
-        )
+        async with lock:
+            result = _parse_cache.get(key)
+            if result is None:
+                result = await query_parser.parse(query, categories_text)
+                if len(_parse_cache) >= PARSE_CACHE_MAXSIZE:
+                    _parse_cache.pop(next(iter(_parse_cache)))
+                _parse_cache[key] = result
+    finally:
+        _parse_waiters[key] -= 1
+        if not _parse_waiters[key]:
+            del _parse_waiters[key]
+            del _parse_locks[key]
+    return dict(result)
+
+
+@app.post("/ai/parse-query")
+async def parse_query_endpoint(
+    body: ParseQueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    categories_text = await _categories_text(db, current_user.id)
+
+    await _release_connection(db)
+    try:
+        result = await _parse_query_cached(current_user.id, body.query, categories_text)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"AI parsing failed: {e}")
 
@@ -2466,6 +2725,7 @@ async def get_budget_summary(
         "budgets": budget_items,
     }
 
+    await _release_connection(db)
     try:
         result = await asyncio.to_thread(
             report_summarizer.summarize,
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Column,
     Date,
     ForeignKey,
+    Index,
     Numeric,
     String,
     Table,
@@ -238,7 +239,15 @@ class Transaction(Base):
     )
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("user_id", "fingerprint"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "fingerprint"),
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_recurring_date", "user_id", "is_recurring", "date"),
+        Index("ix_transactions_account_id", "account_id"),
+        Index("ix_transactions_merchant_id", "merchant_id"),
+        Index("ix_transactions_subcategory_id", "subcategory_id"),
+        Index("ix_transactions_csv_import_id", "csv_import_id"),
+    )
 
     user: Mapped["User"] = relationship(back_populates="transactions")
     account: Mapped[Account] = relationship(back_populates="transactions")
@@ -270,3 +279,19 @@ class AiSummaryCache(Base):
     generated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     __table_args__ = (UniqueConstraint("user_id", "period_type", "period_key"),)
+
+
+class EnrichmentCache(Base):
+    """Model output for a normalized description, reused by later imports so
+    repeat merchants skip the LLM entirely."""
+
+    __tablename__ = "enrichment_cache"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    normalized: Mapped[str] = mapped_column(String(500))
+    is_debit: Mapped[bool] = mapped_column(Boolean)
+    result_json: Mapped[str] = mapped_column(String(4000))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("user_id", "normalized", "is_debit"),)
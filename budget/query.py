@@ -1,14 +1,33 @@
 from __future__ import annotations
 
 import json
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-
-from sqlalchemy import Row, and_, case, delete, func, or_, select, text, update
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Row,
+    Select,
+    String,
+    and_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, joinedload, raiseload, selectinload
 
 from .models import (
     Account,
@@ -18,6 +37,7 @@ from .models import (
     Category,
     CsvImport,
     EnrichmentBatch,
+    EnrichmentCache,
     Merchant,
     Subcategory,
     Tag,
@@ -25,6 +45,109 @@ from .models import (
     transaction_tags,
 )
 
+# Column expressions that don't depend on the request, built once at import.
+# Per-request pieces (filters, aliased joins, stats subqueries) stay local.
+_CATEGORY_STATS_COLUMNS: dict[str, ColumnElement] = {
+    "category": func.coalesce(Category.name, "Uncategorized"),
+    "subcategory": func.coalesce(Subcategory.name, "Uncategorized"),
+    "transaction_count": func.count(Transaction.id),
+    "total_amount": func.coalesce(func.sum(Transaction.amount), 0),
+}
+
+_CARDHOLDER_TXN_COUNT = (
+    select(func.count(Transaction.id))
+    .where(Transaction.cardholder_id == CardHolder.id)
+    .correlate(CardHolder)
+    .scalar_subquery()
+)
+_CARDHOLDER_TXN_TOTAL = (
+    select(func.coalesce(func.sum(Transaction.amount), 0))
+    .where(Transaction.cardholder_id == CardHolder.id)
+    .correlate(CardHolder)
+    .scalar_subquery()
+)
+
+
+def _month_filter(month: str):
+    """Half-open date range for a YYYY-MM month.
+
+    Comparing the raw date column (rather than strftime of it) lets SQLite use
+    the (user_id, date) index. Malformed months match nothing, as before.
+    """
+    try:
+        start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        return false()
+    end = (start + timedelta(days=32)).replace(day=1)
+    return and_(Transaction.date >= start, Transaction.date < end)
+
+
+def _year_filter(year: str):
+    """Half-open date range for a YYYY year; see _month_filter."""
+    try:
+        start = datetime.strptime(year, "%Y").date()
+    except ValueError:
+        return false()
+    return and_(
+        Transaction.date >= start, Transaction.date < start.replace(year=start.year + 1)
+    )
+
+
+def _keyset_page(
+    stmt,
+    sort_expr,
+    id_col,
+    sort_dir: str,
+    limit: int,
+    after_id: int | None = None,
+    cursor_stmt=None,
+):
+    """stmt ordered by (sort_expr, id_col), nulls last, limited to `limit` rows
+    and starting after row `after_id` when given.
+
+    Past the first page the query is a UNION ALL of three disjoint branches --
+    ties on the cursor's sort value, rows strictly beyond it, and the trailing
+    nulls -- each with its own ORDER BY and LIMIT, so every branch can be served
+    by an index range scan rather than one OR-heavy filter. cursor_stmt selects
+    the cursor row's sort value; it is embedded as a scalar subquery so
+    resolving the cursor costs no extra round-trip.
+    """
+    desc = sort_dir == "desc"
+
+    def ordered(sort, ident):
+        if desc:
+            return [sort.desc().nulls_last(), ident.desc()]
+        return [sort.asc().nulls_last(), ident.asc()]
+
+    if after_id is None:
+        return stmt.order_by(*ordered(sort_expr, id_col)).limit(limit)
+
+    cursor_val = cursor_stmt.correlate(None).scalar_subquery()
+    if desc:
+        beyond = sort_expr < cursor_val
+        id_cmp = id_col < after_id
+        id_order = id_col.desc()
+    else:
+        beyond = sort_expr > cursor_val
+        id_cmp = id_col > after_id
+        id_order = id_col.asc()
+
+    keyed = stmt.add_columns(sort_expr.label("_sort_key"), id_col.label("_sort_id"))
+    branches = [
+        keyed.where(sort_expr == cursor_val, id_cmp).order_by(id_order),
+        keyed.where(beyond).order_by(*ordered(sort_expr, id_col)),
+        keyed.where(sort_expr.is_(None), or_(cursor_val.is_not(None), id_cmp)).order_by(
+            id_order
+        ),
+    ]
+    # SQLite rejects ORDER BY / LIMIT on compound members, so wrap each branch
+    page = union_all(*(select(b.limit(limit).subquery()) for b in branches)).subquery()
+    return (
+        select(*(page.c[key] for key in stmt.selected_columns.keys()))
+        .order_by(*ordered(page.c._sort_key, page.c._sort_id))
+        .limit(limit)
+    )
+
 
 class AnalyticsQueries:
     def __init__(self, db: AsyncSession, user_id: int | None = None) -> None:
@@ -43,34 +166,110 @@ class AnalyticsQueries:
             stmt = stmt.where(Category.user_id == self.user_id)
         return stmt.scalar_subquery()
 
-    async def get_recurring_transactions(
+    async def data_fingerprint(self) -> tuple:
+        """Cheap change marker for cached aggregates: (row count, highest id)."""
+        row = (
+            await self.db.execute(
+                select(func.count(Transaction.id), func.max(Transaction.id)).where(
+                    *self._user_filter()
+                )
+            )
+        ).one()
+        return tuple(row)
+
+    async def get_recurring_series(
         self,
         date_from: date | None = None,
         date_to: date | None = None,
     ) -> list:
-        stmt = (
+        """One row per recurring series with at least two charges.
+
+        Charges group by merchant, or by normalised description when there is
+        none. Each row carries the earliest charge's fields plus the two middle
+        day-gaps and absolute amounts (equal when the count is odd) for the
+        caller to take medians from.
+        """
+        key = case(
+            (
+                Transaction.merchant_id.is_not(None),
+                cast(Transaction.merchant_id, String),
+            ),
+            else_="desc:" + func.lower(func.trim(Transaction.description)),
+        )
+        order = (Transaction.date, Transaction.id)
+        charges = (
             select(
+                key.label("key"),
                 Transaction.date,
-                Transaction.amount,
+                func.abs(Transaction.amount, type_=Transaction.amount.type).label(
+                    "amount"
+                ),
                 Transaction.merchant_id,
                 Transaction.description,
                 Merchant.name.label("merchant_name"),
                 Merchant.website.label("merchant_website"),
                 Category.name.label("category_name"),
                 Subcategory.name.label("subcategory_name"),
+                cast(
+                    func.julianday(Transaction.date)
+                    - func.julianday(
+                        func.lag(Transaction.date).over(
+                            partition_by=key, order_by=order
+                        )
+                    ),
+                    Integer,
+                ).label("gap"),
+                func.row_number().over(partition_by=key, order_by=order).label("seq"),
+                func.row_number()
+                .over(partition_by=key, order_by=func.abs(Transaction.amount))
+                .label("amount_rank"),
+                func.count().over(partition_by=key).label("n"),
             )
             .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
             .outerjoin(Subcategory, Transaction.subcategory_id == Subcategory.id)
             .outerjoin(Category, Subcategory.category_id == Category.id)
             .where(Transaction.is_recurring == True, *self._user_filter())  # noqa: E712
-            .order_by(Transaction.date)
         )
         if date_from is not None:
-            stmt = stmt.where(Transaction.date >= date_from)
+            charges = charges.where(Transaction.date >= date_from)
         if date_to is not None:
-            stmt = stmt.where(Transaction.date <= date_to)
-        rows = (await self.db.execute(stmt)).all()
-        return rows
+            charges = charges.where(Transaction.date <= date_to)
+        c = charges.subquery()
+
+        # The first charge's NULL gap ranks first, so gap_rank - 1 indexes the
+        # n - 1 real gaps
+        ranked = select(
+            c,
+            func.row_number()
+            .over(partition_by=c.c.key, order_by=c.c.gap.nulls_first())
+            .label("gap_rank"),
+        ).subquery()
+
+        def first(col):
+            return func.max(case((ranked.c.seq == 1, col)))
+
+        # Middle ranks of n values satisfy n <= 2 * rank <= n + 2
+        mid_amount = (2 * ranked.c.amount_rank).between(ranked.c.n, ranked.c.n + 2)
+        mid_gap = (2 * (ranked.c.gap_rank - 1)).between(ranked.c.n - 1, ranked.c.n + 1)
+        stmt = (
+            select(
+                first(ranked.c.merchant_id).label("merchant_id"),
+                first(ranked.c.description).label("description"),
+                first(ranked.c.merchant_name).label("merchant_name"),
+                first(ranked.c.merchant_website).label("merchant_website"),
+                first(ranked.c.category_name).label("category_name"),
+                first(ranked.c.subcategory_name).label("subcategory_name"),
+                func.count().label("occurrences"),
+                func.max(ranked.c.date).label("last_charge"),
+                func.min(case((mid_gap, ranked.c.gap))).label("gap_lo"),
+                func.max(case((mid_gap, ranked.c.gap))).label("gap_hi"),
+                func.min(case((mid_amount, ranked.c.amount))).label("amount_lo"),
+                func.max(case((mid_amount, ranked.c.amount))).label("amount_hi"),
+            )
+            .group_by(ranked.c.key)
+            .having(func.count() >= 2)
+        )
+        return (await self.db.execute(stmt)).all()
 
     async def list_months(self) -> list[str]:
         stmt = (
@@ -83,7 +282,7 @@ class AnalyticsQueries:
         return [r.month for r in rows]
 
     async def get_month_stats(self, month: str) -> dict:
-        month_filter = func.strftime("%Y-%m", Transaction.date) == month
+        month_filter = _month_filter(month)
         user_filters = self._user_filter()
         transfer_filter = or_(
             Subcategory.category_id.is_(None),
@@ -114,7 +313,7 @@ class AnalyticsQueries:
         }
 
     async def get_category_breakdown(self, month: str) -> list:
-        month_filter = func.strftime("%Y-%m", Transaction.date) == month
+        month_filter = _month_filter(month)
         rows = (
             await self.db.execute(
                 select(
@@ -153,7 +352,7 @@ class AnalyticsQueries:
         return [r.year for r in rows]
 
     async def get_year_stats(self, year: str) -> dict:
-        year_filter = func.strftime("%Y", Transaction.date) == year
+        year_filter = _year_filter(year)
         user_filters = self._user_filter()
         transfer_filter = or_(
             Subcategory.category_id.is_(None),
@@ -184,7 +383,7 @@ class AnalyticsQueries:
         }
 
     async def get_year_category_breakdown(self, year: str) -> list:
-        year_filter = func.strftime("%Y", Transaction.date) == year
+        year_filter = _year_filter(year)
         rows = (
             await self.db.execute(
                 select(
@@ -297,32 +496,57 @@ class AnalyticsQueries:
         self,
         date_from: str | None = None,
         date_to: str | None = None,
-    ) -> list:
+        top_n: int | None = None,
+    ) -> Sequence[Row]:
+        """Income per merchant, largest first.
+
+        With top_n, merchants past the first top_n are summed into one trailing
+        "Other Income" row by the database instead of being returned.
+        """
         date_filters = []
         if date_from:
             date_filters.append(Transaction.date >= date_from)
         if date_to:
             date_filters.append(Transaction.date <= date_to)
+        total = func.sum(Transaction.amount)
+        stmt = (
+            select(
+                func.coalesce(Merchant.name, "Other Income").label("name"),
+                total.label("total"),
+            )
+            .select_from(Transaction)
+            .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
+            .outerjoin(Subcategory, Transaction.subcategory_id == Subcategory.id)
+            .where(
+                Transaction.amount > 0,
+                *self._user_filter(),
+                *date_filters,
+                or_(
+                    Subcategory.category_id.is_(None),
+                    ~Subcategory.category_id.in_(self._transfer_cat_subq()),
+                ),
+            )
+            .group_by(Merchant.name)
+        )
+        if top_n is None:
+            rows = (await self.db.execute(stmt.order_by(total.desc()))).all()
+            return rows
+
+        ranked = stmt.add_columns(
+            func.row_number().over(order_by=total.desc()).label("rn")
+        ).subquery()
+        top = ranked.c.rn <= top_n
+        bucket = case((top, ranked.c.rn), else_=top_n + 1)
         rows = (
             await self.db.execute(
                 select(
-                    func.coalesce(Merchant.name, "Other Income").label("name"),
-                    func.sum(Transaction.amount).label("total"),
-                )
-                .select_from(Transaction)
-                .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
-                .outerjoin(Subcategory, Transaction.subcategory_id == Subcategory.id)
-                .where(
-                    Transaction.amount > 0,
-                    *self._user_filter(),
-                    *date_filters,
-                    or_(
-                        Subcategory.category_id.is_(None),
-                        ~Subcategory.category_id.in_(self._transfer_cat_subq()),
+                    func.max(case((top, ranked.c.name), else_="Other Income")).label(
+                        "name"
                     ),
+                    func.sum(ranked.c.total).label("total"),
                 )
-                .group_by(Merchant.name)
-                .order_by(func.sum(Transaction.amount).desc())
+                .group_by(bucket)
+                .order_by(bucket)
             )
         ).all()
         return rows
@@ -457,27 +681,16 @@ class CategoryQueries:
         if subcategory:
             conditions.append(Subcategory.name.ilike(f"%{subcategory}%"))
 
-        cat_expr = func.coalesce(Category.name, "Uncategorized")
-        sub_expr = func.coalesce(Subcategory.name, "Uncategorized")
-        count_expr = func.count(Transaction.id)
-        total_expr = func.coalesce(func.sum(Transaction.amount), 0)
-
-        sort_map = {
-            "category": cat_expr,
-            "subcategory": sub_expr,
-            "transaction_count": count_expr,
-            "total_amount": total_expr,
-        }
-        order_expr = sort_map[sort_by]
+        order_expr = _CATEGORY_STATS_COLUMNS[sort_by]
         order_clause = order_expr.desc() if sort_dir == "desc" else order_expr.asc()
 
         rows = (
             await self.db.execute(
                 select(
-                    cat_expr.label("category"),
-                    sub_expr.label("subcategory"),
-                    count_expr.label("transaction_count"),
-                    total_expr.label("total_amount"),
+                    *(
+                        expr.label(name)
+                        for name, expr in _CATEGORY_STATS_COLUMNS.items()
+                    ),
                     Category.id.label("category_id"),
                     Category.classification.label("classification"),
                     Subcategory.id.label("subcategory_id"),
@@ -526,6 +739,29 @@ class CategoryQueries:
             cache[name] = c.id
         return cache[name]
 
+    async def resolve_for_enrichment(
+        self, names: set[str], cache: dict[str, int]
+    ) -> None:
+        """Load or create every category in *names* with one select and one insert."""
+        missing = names - cache.keys()
+        if not missing:
+            return
+        stmt = select(Category.id, Category.name).where(Category.name.in_(missing))
+        if self.user_id is not None:
+            stmt = stmt.where(Category.user_id == self.user_id)
+        for cid, cname in (await self.db.execute(stmt)).all():
+            cache[cname] = cid
+        missing -= cache.keys()
+        if missing:
+            res = await self.db.execute(
+                insert(Category)
+                .values([{"name": n, "user_id": self.user_id} for n in missing])
+                .on_conflict_do_nothing()
+                .returning(Category.id, Category.name)
+            )
+            for cid, cname in res.all():
+                cache[cname] = cid
+
     async def update_classification(
         self, category_id: int, classification: str | None
     ) -> bool:
@@ -564,6 +800,55 @@ class CategoryQueries:
             cache[key] = sc.id
         return cache[key]
 
+    async def resolve_subcategories_for_enrichment(
+        self, wanted: dict[tuple, str | None], cache: dict[tuple, int]
+    ) -> None:
+        """Bulk counterpart of find_or_create_subcategory_for_enrichment.
+
+        *wanted* maps ``(category_id, name)`` to the need/want classification
+        reported for it, which is only applied where none is set yet.
+        """
+        missing = {k: v for k, v in wanted.items() if k not in cache}
+        if not missing:
+            return
+        res = await self.db.execute(
+            select(
+                Subcategory.id,
+                Subcategory.category_id,
+                Subcategory.name,
+                Subcategory.classification,
+            ).where(
+                Subcategory.category_id.in_({cid for cid, _ in missing}),
+                Subcategory.name.in_({name for _, name in missing}),
+            )
+        )
+        for sc_id, cid, name, classification in res.all():
+            key = (cid, name)
+            if key not in missing:
+                continue
+            need_want = missing.pop(key)
+            if classification is None and need_want is not None:
+                await self.db.execute(
+                    update(Subcategory)
+                    .where(Subcategory.id == sc_id)
+                    .values(classification=need_want)
+                )
+            cache[key] = sc_id
+        if missing:
+            inserted = await self.db.execute(
+                insert(Subcategory)
+                .values(
+                    [
+                        {"category_id": cid, "name": name, "classification": nw}
+                        for (cid, name), nw in missing.items()
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(Subcategory.id, Subcategory.category_id, Subcategory.name)
+            )
+            for sc_id, cid, name in inserted.all():
+                cache[(cid, name)] = sc_id
+
     async def update_subcategory_classification(
         self, subcategory_id: int, classification: str | None
     ) -> bool:
@@ -606,19 +891,34 @@ class CardHolderQueries:
         cache[card_number] = ch.id
         return ch.id
 
-    async def get_with_stats(self, cardholder_id: int):  # type: ignore[return]
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.cardholder_id == CardHolder.id)
-            .correlate(CardHolder)
-            .scalar_subquery()
-        )
-        txn_total_expr = (
-            select(func.coalesce(func.sum(Transaction.amount), 0))
-            .where(Transaction.cardholder_id == CardHolder.id)
-            .correlate(CardHolder)
-            .scalar_subquery()
+    async def resolve_for_enrichment(
+        self, card_numbers: set[str], cache: dict[str, int]
+    ) -> None:
+        missing = card_numbers - cache.keys()
+        if not missing:
+            return
+        stmt = select(CardHolder.id, CardHolder.card_number).where(
+            CardHolder.card_number.in_(missing)
         )
+        if self.user_id is not None:
+            stmt = stmt.where(CardHolder.user_id == self.user_id)
+        rows = (await self.db.execute(stmt)).all()
+        cache.update({cn: ch_id for ch_id, cn in rows if cn})
+        missing -= cache.keys()
+        if missing:
+            res = await self.db.execute(
+                insert(CardHolder)
+                .values(
+                    [{"card_number": cn, "user_id": self.user_id} for cn in missing]
+                )
+                .on_conflict_do_nothing()
+                .returning(CardHolder.id, CardHolder.card_number)
+            )
+            cache.update({cn: ch_id for ch_id, cn in res.all() if cn})
+
+    async def get_with_stats(self, cardholder_id: int):  # type: ignore[return]
+        txn_count_expr = _CARDHOLDER_TXN_COUNT
+        txn_total_expr = _CARDHOLDER_TXN_TOTAL
         row = (
             await self.db.execute(
                 select(
@@ -647,18 +947,8 @@ class CardHolderQueries:
         limit: int,
         after_id: int | None,
     ) -> tuple[list, bool, int | None]:
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.cardholder_id == CardHolder.id)
-            .correlate(CardHolder)
-            .scalar_subquery()
-        )
-        txn_total_expr = (
-            select(func.coalesce(func.sum(Transaction.amount), 0))
-            .where(Transaction.cardholder_id == CardHolder.id)
-            .correlate(CardHolder)
-            .scalar_subquery()
-        )
+        txn_count_expr = _CARDHOLDER_TXN_COUNT
+        txn_total_expr = _CARDHOLDER_TXN_TOTAL
         sort_expr = {
             "name": CardHolder.name,
             "card_number": CardHolder.card_number,
@@ -666,11 +956,6 @@ class CardHolderQueries:
             "total_amount": txn_total_expr,
         }[sort_by]
 
-        if sort_dir == "desc":
-            order_clauses = [sort_expr.desc().nulls_last(), CardHolder.id.desc()]
-        else:
-            order_clauses = [sort_expr.asc().nulls_last(), CardHolder.id.asc()]
-
         conditions = []
         if self.user_id is not None:
             conditions.append(CardHolder.user_id == self.user_id)
@@ -679,51 +964,37 @@ class CardHolderQueries:
         if card_number:
             conditions.append(CardHolder.card_number.ilike(f"%{card_number}%"))
 
+        cursor_stmt: Select[Any] | None = None
         if after_id is not None:
-            cur = await self.db.get(CardHolder, after_id)
             if sort_by == "transaction_count":
-                cursor_val = await self.db.scalar(
-                    select(func.count(Transaction.id)).where(
-                        Transaction.cardholder_id == after_id
-                    )
+                cursor_stmt = select(func.count(Transaction.id)).where(
+                    Transaction.cardholder_id == after_id
                 )
             elif sort_by == "total_amount":
-                cursor_val = await self.db.scalar(
-                    select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                        Transaction.cardholder_id == after_id
-                    )
-                )
+                cursor_stmt = select(
+                    func.coalesce(func.sum(Transaction.amount), 0)
+                ).where(Transaction.cardholder_id == after_id)
             else:
-                cursor_val = getattr(cur, sort_by)
-
-            id_cmp = (
-                (CardHolder.id < after_id)
-                if sort_dir == "desc"
-                else (CardHolder.id > after_id)
-            )
-            if cursor_val is None:
-                conditions.append(and_(sort_expr.is_(None), id_cmp))
-            else:
-                beyond = (
-                    (sort_expr < cursor_val)
-                    if sort_dir == "desc"
-                    else (sort_expr > cursor_val)
-                )
-                tied = and_(sort_expr == cursor_val, id_cmp)
-                conditions.append(or_(beyond, tied, sort_expr.is_(None)))
-
+                cursor_stmt = select(sort_expr).where(CardHolder.id == after_id)
+
+        stmt = select(
+            CardHolder.id,
+            CardHolder.name,
+            CardHolder.card_number,
+            txn_count_expr.label("transaction_count"),
+            txn_total_expr.label("total_amount"),
+        ).where(*conditions)
         rows = (
             await self.db.execute(
-                select(
+                _keyset_page(
+                    stmt,
+                    sort_expr,
                     CardHolder.id,
-                    CardHolder.name,
-                    CardHolder.card_number,
-                    txn_count_expr.label("transaction_count"),
-                    txn_total_expr.label("total_amount"),
+                    sort_dir,
+                    limit + 1,
+                    after_id,
+                    cursor_stmt,
                 )
-                .where(*conditions)
-                .order_by(*order_clauses)
-                .limit(limit + 1)
             )
         ).all()
 
@@ -782,18 +1053,29 @@ class AccountQueries:
         limit: int,
         after_id: int | None,
     ) -> tuple[list, bool, int | None]:
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.account_id == Account.id)
-            .correlate(Account)
-            .scalar_subquery()
-        )
-        txn_total_expr = (
-            select(func.coalesce(func.sum(Transaction.amount), 0))
-            .where(Transaction.account_id == Account.id)
-            .correlate(Account)
-            .scalar_subquery()
-        )
+        # Sorting by an aggregate needs every account's figures, so it groups
+        # all of the user's transactions once; other sorts only aggregate the
+        # listed rows
+        stats = None
+        txn_count_expr: ColumnElement[Any]
+        txn_total_expr: ColumnElement[Any]
+        if sort_by in ("transaction_count", "total_amount"):
+            stats = self._transaction_stats_subq()
+            txn_count_expr = func.coalesce(stats.c.transaction_count, 0)
+            txn_total_expr = func.coalesce(stats.c.total_amount, 0)
+        else:
+            txn_count_expr = (
+                select(func.count(Transaction.id))
+                .where(Transaction.account_id == Account.id)
+                .correlate(Account)
+                .scalar_subquery()
+            )
+            txn_total_expr = (
+                select(func.coalesce(func.sum(Transaction.amount), 0))
+                .where(Transaction.account_id == Account.id)
+                .correlate(Account)
+                .scalar_subquery()
+            )
         sort_expr = {
             "name": Account.name,
             "institution": Account.institution,
@@ -803,11 +1085,6 @@ class AccountQueries:
             "total_amount": txn_total_expr,
         }[sort_by]
 
-        if sort_dir == "desc":
-            order_clauses = [sort_expr.desc().nulls_last(), Account.id.desc()]
-        else:
-            order_clauses = [sort_expr.asc().nulls_last(), Account.id.asc()]
-
         conditions = []
         if self.user_id is not None:
             conditions.append(Account.user_id == self.user_id)
@@ -818,53 +1095,41 @@ class AccountQueries:
         if account_type:
             conditions.append(Account.account_type.ilike(f"%{account_type}%"))
 
+        cursor_stmt: Select[Any] | None = None
         if after_id is not None:
-            cur = await self.db.get(Account, after_id)
             if sort_by == "transaction_count":
-                cursor_val = await self.db.scalar(
-                    select(func.count(Transaction.id)).where(
-                        Transaction.account_id == after_id
-                    )
+                cursor_stmt = select(func.count(Transaction.id)).where(
+                    Transaction.account_id == after_id
                 )
             elif sort_by == "total_amount":
-                cursor_val = await self.db.scalar(
-                    select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                        Transaction.account_id == after_id
-                    )
-                )
+                cursor_stmt = select(
+                    func.coalesce(func.sum(Transaction.amount), 0)
+                ).where(Transaction.account_id == after_id)
             else:
-                cursor_val = getattr(cur, sort_by)
-
-            id_cmp = (
-                (Account.id < after_id)
-                if sort_dir == "desc"
-                else (Account.id > after_id)
-            )
-            if cursor_val is None:
-                conditions.append(and_(sort_expr.is_(None), id_cmp))
-            else:
-                beyond = (
-                    (sort_expr < cursor_val)
-                    if sort_dir == "desc"
-                    else (sort_expr > cursor_val)
-                )
-                tied = and_(sort_expr == cursor_val, id_cmp)
-                conditions.append(or_(beyond, tied, sort_expr.is_(None)))
-
+                cursor_stmt = select(sort_expr).where(Account.id == after_id)
+
+        stmt = select(
+            Account.id,
+            Account.name,
+            Account.institution,
+            Account.account_type,
+            Account.created_at,
+            txn_count_expr.label("transaction_count"),
+            txn_total_expr.label("total_amount"),
+        ).where(*conditions)
+        if stats is not None:
+            stmt = stmt.outerjoin(stats, stats.c.account_id == Account.id)
         rows = (
             await self.db.execute(
-                select(
+                _keyset_page(
+                    stmt,
+                    sort_expr,
                     Account.id,
-                    Account.name,
-                    Account.institution,
-                    Account.account_type,
-                    Account.created_at,
-                    txn_count_expr.label("transaction_count"),
-                    txn_total_expr.label("total_amount"),
+                    sort_dir,
+                    limit + 1,
+                    after_id,
+                    cursor_stmt,
                 )
-                .where(*conditions)
-                .order_by(*order_clauses)
-                .limit(limit + 1)
             )
         ).all()
 
@@ -873,6 +1138,17 @@ class AccountQueries:
         next_cursor = items[-1].id if has_more and items else None
         return items, has_more, next_cursor
 
+    def _transaction_stats_subq(self):
+        """Per-account transaction count and total, aggregated in one pass."""
+        stmt = select(
+            Transaction.account_id,
+            func.count(Transaction.id).label("transaction_count"),
+            func.sum(Transaction.amount).label("total_amount"),
+        )
+        if self.user_id is not None:
+            stmt = stmt.where(Transaction.user_id == self.user_id)
+        return stmt.group_by(Transaction.account_id).subquery()
+
 
 class CsvImportQueries:
     def __init__(self, db: AsyncSession, user_id: int | None = None) -> None:
@@ -905,86 +1181,78 @@ class CsvImportQueries:
         limit: int,
         after_id: int | None,
     ) -> tuple[list, bool, int | None]:
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.csv_import_id == CsvImport.id)
-            .correlate(CsvImport)
-            .scalar_subquery()
-        )
-        account_name_expr = (
-            select(Account.name)
-            .where(Account.id == CsvImport.account_id)
-            .correlate(CsvImport)
-            .scalar_subquery()
-        )
+        # Sorting by count needs every import's count, so it aggregates all of
+        # the user's transactions once; other sorts only count the listed rows
+        counts = None
+        txn_count_expr: ColumnElement[Any]
+        if sort_by == "transaction_count":
+            counts = self._transaction_count_subq()
+            txn_count_expr = func.coalesce(counts.c.transaction_count, 0)
+        else:
+            txn_count_expr = (
+                select(func.count(Transaction.id))
+                .where(Transaction.csv_import_id == CsvImport.id)
+                .correlate(CsvImport)
+                .scalar_subquery()
+            )
         sort_expr = {
             "filename": CsvImport.filename,
-            "account": account_name_expr,
+            "account": Account.name,
             "imported_at": CsvImport.imported_at,
             "row_count": CsvImport.row_count,
             "transaction_count": txn_count_expr,
         }[sort_by]
 
-        if sort_dir == "desc":
-            order_clauses = [sort_expr.desc().nulls_last(), CsvImport.id.desc()]
-        else:
-            order_clauses = [sort_expr.asc().nulls_last(), CsvImport.id.asc()]
-
         conditions = []
         if self.user_id is not None:
             conditions.append(CsvImport.user_id == self.user_id)
         if filename:
             conditions.append(CsvImport.filename.ilike(f"%{filename}%"))
         if account:
-            conditions.append(account_name_expr.ilike(f"%{account}%"))
+            conditions.append(Account.name.ilike(f"%{account}%"))
 
+        cursor_stmt: Select[Any] | None = None
         if after_id is not None:
-            cur = await self.db.get(CsvImport, after_id)
             if sort_by == "transaction_count":
-                cursor_val = await self.db.scalar(
-                    select(func.count(Transaction.id)).where(
-                        Transaction.csv_import_id == after_id
-                    )
-                )
-            elif sort_by == "account":
-                cursor_val = await self.db.scalar(
-                    select(Account.name).where(Account.id == cur.account_id)
+                cursor_stmt = select(func.count(Transaction.id)).where(
+                    Transaction.csv_import_id == after_id
                 )
             else:
-                cursor_val = getattr(cur, sort_by)
-
-            id_cmp = (
-                (CsvImport.id < after_id)
-                if sort_dir == "desc"
-                else (CsvImport.id > after_id)
-            )
-            if cursor_val is None:
-                conditions.append(and_(sort_expr.is_(None), id_cmp))
-            else:
-                beyond = (
-                    (sort_expr < cursor_val)
-                    if sort_dir == "desc"
-                    else (sort_expr > cursor_val)
+                cursor_stmt = (
+                    select(sort_expr)
+                    .select_from(CsvImport)
+                    .join(Account, Account.id == CsvImport.account_id)
+                    .where(CsvImport.id == after_id)
                 )
-                tied = and_(sort_expr == cursor_val, id_cmp)
-                conditions.append(or_(beyond, tied, sort_expr.is_(None)))
 
+        stmt = (
+            select(
+                CsvImport.id,
+                CsvImport.filename,
+                CsvImport.imported_at,
+                CsvImport.row_count,
+                CsvImport.enriched_rows,
+                CsvImport.skipped_duplicates,
+                CsvImport.status,
+                Account.name.label("account"),
+                txn_count_expr.label("transaction_count"),
+            )
+            .join(Account, Account.id == CsvImport.account_id)
+            .where(*conditions)
+        )
+        if counts is not None:
+            stmt = stmt.outerjoin(counts, counts.c.csv_import_id == CsvImport.id)
         rows = (
             await self.db.execute(
-                select(
+                _keyset_page(
+                    stmt,
+                    sort_expr,
                     CsvImport.id,
-                    CsvImport.filename,
-                    CsvImport.imported_at,
-                    CsvImport.row_count,
-                    CsvImport.enriched_rows,
-                    CsvImport.skipped_duplicates,
-                    CsvImport.status,
-                    account_name_expr.label("account"),
-                    txn_count_expr.label("transaction_count"),
+                    sort_dir,
+                    limit + 1,
+                    after_id,
+                    cursor_stmt,
                 )
-                .where(*conditions)
-                .order_by(*order_clauses)
-                .limit(limit + 1)
             )
         ).all()
 
@@ -993,6 +1261,16 @@ class CsvImportQueries:
         next_cursor = items[-1].id if has_more and items else None
         return items, has_more, next_cursor
 
+    def _transaction_count_subq(self):
+        """Per-import transaction count, aggregated in one pass."""
+        stmt = select(
+            Transaction.csv_import_id,
+            func.count(Transaction.id).label("transaction_count"),
+        ).where(Transaction.csv_import_id.is_not(None))
+        if self.user_id is not None:
+            stmt = stmt.where(Transaction.user_id == self.user_id)
+        return stmt.group_by(Transaction.csv_import_id).subquery()
+
     async def upsert(
         self,
         account_id: int,
@@ -1117,29 +1395,35 @@ class MerchantQueries:
         limit: int,
         after_id: int | None,
     ) -> tuple[list, bool, int | None]:
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.merchant_id == Merchant.id)
-            .correlate(Merchant)
-            .scalar_subquery()
-        )
-        txn_total_expr = (
-            select(func.coalesce(func.sum(Transaction.amount), 0))
-            .where(Transaction.merchant_id == Merchant.id)
-            .correlate(Merchant)
-            .scalar_subquery()
-        )
+        # Sorting by an aggregate needs every merchant's figures, so it groups
+        # all of the user's transactions once; other sorts only aggregate the
+        # listed rows
+        stats = None
+        txn_count_expr: ColumnElement[Any]
+        txn_total_expr: ColumnElement[Any]
+        if sort_by in ("transaction_count", "total_amount"):
+            stats = self._transaction_stats_subq()
+            txn_count_expr = func.coalesce(stats.c.transaction_count, 0)
+            txn_total_expr = func.coalesce(stats.c.total_amount, 0)
+        else:
+            txn_count_expr = (
+                select(func.count(Transaction.id))
+                .where(Transaction.merchant_id == Merchant.id)
+                .correlate(Merchant)
+                .scalar_subquery()
+            )
+            txn_total_expr = (
+                select(func.coalesce(func.sum(Transaction.amount), 0))
+                .where(Transaction.merchant_id == Merchant.id)
+                .correlate(Merchant)
+                .scalar_subquery()
+            )
         sort_expr = {
             "name": Merchant.name,
             "transaction_count": txn_count_expr,
             "total_amount": txn_total_expr,
         }[sort_by]
 
-        if sort_dir == "desc":
-            order_clauses = [sort_expr.desc().nulls_last(), Merchant.id.desc()]
-        else:
-            order_clauses = [sort_expr.asc().nulls_last(), Merchant.id.asc()]
-
         conditions = []
         if self.user_id is not None:
             conditions.append(Merchant.user_id == self.user_id)
@@ -1148,52 +1432,40 @@ class MerchantQueries:
         if location:
             conditions.append(Merchant.location.ilike(f"%{location}%"))
 
+        cursor_stmt: Select[Any] | None = None
         if after_id is not None:
-            cur = await self.db.get(Merchant, after_id)
             if sort_by == "transaction_count":
-                cursor_val = await self.db.scalar(
-                    select(func.count(Transaction.id)).where(
-                        Transaction.merchant_id == after_id
-                    )
+                cursor_stmt = select(func.count(Transaction.id)).where(
+                    Transaction.merchant_id == after_id
                 )
             elif sort_by == "total_amount":
-                cursor_val = await self.db.scalar(
-                    select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                        Transaction.merchant_id == after_id
-                    )
-                )
+                cursor_stmt = select(
+                    func.coalesce(func.sum(Transaction.amount), 0)
+                ).where(Transaction.merchant_id == after_id)
             else:
-                cursor_val = cur.name
-
-            id_cmp = (
-                (Merchant.id < after_id)
-                if sort_dir == "desc"
-                else (Merchant.id > after_id)
-            )
-            if cursor_val is None:
-                conditions.append(and_(sort_expr.is_(None), id_cmp))
-            else:
-                beyond = (
-                    (sort_expr < cursor_val)
-                    if sort_dir == "desc"
-                    else (sort_expr > cursor_val)
-                )
-                tied = and_(sort_expr == cursor_val, id_cmp)
-                conditions.append(or_(beyond, tied, sort_expr.is_(None)))
-
+                cursor_stmt = select(sort_expr).where(Merchant.id == after_id)
+
+        stmt = select(
+            Merchant.id,
+            Merchant.name,
+            Merchant.location,
+            Merchant.website,
+            txn_count_expr.label("transaction_count"),
+            txn_total_expr.label("total_amount"),
+        ).where(*conditions)
+        if stats is not None:
+            stmt = stmt.outerjoin(stats, stats.c.merchant_id == Merchant.id)
         rows = (
             await self.db.execute(
-                select(
+                _keyset_page(
+                    stmt,
+                    sort_expr,
                     Merchant.id,
-                    Merchant.name,
-                    Merchant.location,
-                    Merchant.website,
-                    txn_count_expr.label("transaction_count"),
-                    txn_total_expr.label("total_amount"),
+                    sort_dir,
+                    limit + 1,
+                    after_id,
+                    cursor_stmt,
                 )
-                .where(*conditions)
-                .order_by(*order_clauses)
-                .limit(limit + 1)
             )
         ).all()
 
@@ -1202,6 +1474,17 @@ class MerchantQueries:
         next_cursor = items[-1].id if has_more and items else None
         return items, has_more, next_cursor
 
+    def _transaction_stats_subq(self):
+        """Per-merchant transaction count and total, aggregated in one pass."""
+        stmt = select(
+            Transaction.merchant_id,
+            func.count(Transaction.id).label("transaction_count"),
+            func.sum(Transaction.amount).label("total_amount"),
+        ).where(Transaction.merchant_id.is_not(None))
+        if self.user_id is not None:
+            stmt = stmt.where(Transaction.user_id == self.user_id)
+        return stmt.group_by(Transaction.merchant_id).subquery()
+
     async def update(
         self,
         merchant: Merchant,
@@ -1214,12 +1497,7 @@ class MerchantQueries:
         merchant.website = website
 
     async def list_for_duplicate_detection(self) -> list:
-        txn_count_expr = (
-            select(func.count(Transaction.id))
-            .where(Transaction.merchant_id == Merchant.id)
-            .correlate(Merchant)
-            .scalar_subquery()
-        )
+        stats = self._transaction_stats_subq()
         conditions = []
         if self.user_id is not None:
             conditions.append(Merchant.user_id == self.user_id)
@@ -1229,8 +1507,11 @@ class MerchantQueries:
                     Merchant.id,
                     Merchant.name,
                     Merchant.location,
-                    txn_count_expr.label("transaction_count"),
+                    func.coalesce(stats.c.transaction_count, 0).label(
+                        "transaction_count"
+                    ),
                 )
+                .outerjoin(stats, stats.c.merchant_id == Merchant.id)
                 .where(*conditions)
                 .order_by(Merchant.id)
             )
@@ -1305,6 +1586,56 @@ class MerchantQueries:
                 cache[name] = (cached_id, True)
         return cache[name][0]
 
+    async def resolve_for_enrichment(
+        self,
+        wanted: dict[str, tuple[str | None, str | None]],
+        cache: dict[str, tuple[int, bool]],
+    ) -> None:
+        """Bulk counterpart of find_or_create_for_enrichment.
+
+        *wanted* maps merchant name to ``(location, website)``; existing merchants
+        only have those filled in where they are still empty.
+        """
+        missing = {k: v for k, v in wanted.items() if k not in cache}
+        if not missing:
+            return
+        stmt = select(
+            Merchant.id, Merchant.name, Merchant.location, Merchant.website
+        ).where(Merchant.name.in_(missing.keys()))
+        if self.user_id is not None:
+            stmt = stmt.where(Merchant.user_id == self.user_id)
+        for m_id, name, m_location, m_website in (await self.db.execute(stmt)).all():
+            location, website = missing.pop(name)
+            updates: dict = {}
+            if m_location is None and location is not None:
+                updates["location"] = location
+            if m_website is None and website is not None:
+                updates["website"] = website
+            if updates:
+                await self.db.execute(
+                    update(Merchant).where(Merchant.id == m_id).values(**updates)
+                )
+            cache[name] = (m_id, m_location is not None or location is not None)
+        if missing:
+            res = await self.db.execute(
+                insert(Merchant)
+                .values(
+                    [
+                        {
+                            "name": name,
+                            "location": location,
+                            "website": website,
+                            "user_id": self.user_id,
+                        }
+                        for name, (location, website) in missing.items()
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(Merchant.id, Merchant.name, Merchant.location)
+            )
+            for m_id, name, m_location in res.all():
+                cache[name] = (m_id, m_location is not None)
+
     async def find_mixed_category_merchants(self) -> list[dict]:
         cond = [
             Transaction.merchant_id.is_not(None),
@@ -1380,6 +1711,20 @@ class MerchantQueries:
         ]
 
 
+_transactions = Transaction.__table__
+# Core rather than ORM bulk update so a row deleted in the meantime is skipped
+# instead of raising StaleDataError; a NULL description keeps the current one.
+_ENRICHMENT_UPDATE = (
+    update(_transactions)  # type: ignore[arg-type]
+    .where(_transactions.c.id == bindparam("_id"))
+    .values(
+        description=func.coalesce(
+            bindparam("_description"), _transactions.c.description
+        )
+    )
+)
+
+
 class TransactionQueries:
     def __init__(self, db: AsyncSession, user_id: int | None = None) -> None:
         self.db = db
@@ -1474,14 +1819,22 @@ class TransactionQueries:
 
     async def count(self, conditions: list) -> int:
         return (
-            await self.db.scalar(select(func.count(Transaction.id)).where(*conditions))
+            await self.db.scalar(
+                select(func.count()).select_from(Transaction).where(*conditions)
+            )
             or 0
         )
 
-    async def sum(self, conditions: list) -> Decimal:
-        return await self.db.scalar(
-            select(func.coalesce(func.sum(Transaction.amount), 0)).where(*conditions)
-        ) or Decimal(0)
+    async def totals(self, conditions: list) -> tuple[int, Decimal]:
+        """count() and sum() of the matching rows in a single scan."""
+        row = (
+            await self.db.execute(
+                select(func.count(), func.coalesce(func.sum(Transaction.amount), 0))
+                .select_from(Transaction)
+                .where(*conditions)
+            )
+        ).one()
+        return row[0], Decimal(row[1])
 
     async def list(
         self,
@@ -1491,101 +1844,117 @@ class TransactionQueries:
         limit: int,
         after_id: int | None,
     ) -> tuple[list, bool, int | None]:
+        """One page of transactions as flat rows, related names joined in.
+
+        Tags are not included; fetch them with tag_names_for.
+        """
+        # Aliased so the IN (...) filters from build_conditions, which select
+        # from the base tables, are not auto-correlated against these joins
+        account = aliased(Account)
+        merchant = aliased(Merchant)
+        subcategory = aliased(Subcategory)
+        category = aliased(Category)
+        cardholder = aliased(CardHolder)
+
+        def joined(stmt):
+            return (
+                stmt.select_from(Transaction)
+                .join(account, account.id == Transaction.account_id)
+                .outerjoin(merchant, merchant.id == Transaction.merchant_id)
+                .outerjoin(subcategory, subcategory.id == Transaction.subcategory_id)
+                .outerjoin(category, category.id == subcategory.category_id)
+                .outerjoin(cardholder, cardholder.id == Transaction.cardholder_id)
+            )
+
         sort_expr = {
             "date": Transaction.date,
             "amount": Transaction.amount,
             "description": Transaction.description,
-            "merchant": select(Merchant.name)
-            .where(Merchant.id == Transaction.merchant_id)
-            .correlate(Transaction)
-            .scalar_subquery(),
-            "category": select(Category.name)
-            .where(
-                Category.id
-                == select(Subcategory.category_id)
-                .where(Subcategory.id == Transaction.subcategory_id)
-                .correlate(Transaction)
-                .scalar_subquery()
-            )
-            .correlate(Transaction)
-            .scalar_subquery(),
-            "account": select(Account.name)
-            .where(Account.id == Transaction.account_id)
-            .correlate(Transaction)
-            .scalar_subquery(),
+            "merchant": merchant.name,
+            "category": category.name,
+            "account": account.name,
         }[sort_by]
 
-        if sort_dir == "desc":
-            order_clauses = [sort_expr.desc().nulls_last(), Transaction.id.desc()]
-        else:
-            order_clauses = [sort_expr.asc().nulls_last(), Transaction.id.asc()]
-
-        # Copy conditions to avoid mutating the caller's list
-        conds = list(conditions)
-
+        cursor_stmt: Select[Any] | None = None
         if after_id is not None:
-            cur = await self.get_by_id(after_id)
-            assert cur is not None, f"Transaction {after_id} not found"
-            cursor_val = {
-                "date": cur.date,
-                "amount": cur.amount,
-                "description": cur.description,
-                "merchant": cur.merchant.name if cur.merchant else None,
-                "category": cur.subcategory.category.name if cur.subcategory else None,
-                "account": cur.account.name,
-            }[sort_by]
-
-            id_cmp = (
-                (Transaction.id < after_id)
-                if sort_dir == "desc"
-                else (Transaction.id > after_id)
-            )
-            if cursor_val is None:
-                conds.append(and_(sort_expr.is_(None), id_cmp))
-            else:
-                beyond = (
-                    (sort_expr < cursor_val)
-                    if sort_dir == "desc"
-                    else (sort_expr > cursor_val)
-                )
-                tied = and_(sort_expr == cursor_val, id_cmp)
-                conds.append(or_(beyond, tied, sort_expr.is_(None)))
+            cursor_stmt = joined(select(sort_expr)).where(Transaction.id == after_id)
 
-        result = await self.db.execute(
-            select(Transaction)
-            .where(*conds)
-            .options(
-                selectinload(Transaction.account),
-                selectinload(Transaction.merchant),
-                selectinload(Transaction.subcategory).selectinload(
-                    Subcategory.category
-                ),
-                selectinload(Transaction.cardholder),
-                selectinload(Transaction.tags),
+        stmt = joined(
+            select(
+                Transaction.id,
+                Transaction.date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.account_id,
+                Transaction.notes,
+                Transaction.is_recurring,
+                Transaction.is_excluded,
+                Transaction.is_refund,
+                Transaction.is_international,
+                Transaction.payment_channel,
+                Transaction.raw_description,
+                Transaction.linked_transaction_id,
+                account.name.label("account"),
+                merchant.name.label("merchant"),
+                merchant.website.label("merchant_website"),
+                category.name.label("category"),
+                subcategory.name.label("subcategory"),
+                cardholder.name.label("cardholder_name"),
+                cardholder.card_number.label("card_number"),
+            )
+        ).where(*conditions)
+        rows = (
+            await self.db.execute(
+                _keyset_page(
+                    stmt,
+                    sort_expr,
+                    Transaction.id,
+                    sort_dir,
+                    limit + 1,
+                    after_id,
+                    cursor_stmt,
+                )
             )
-            .order_by(*order_clauses)
-            .limit(limit + 1)
-        )
-        rows = result.scalars().all()
+        ).all()
 
         has_more = len(rows) > limit
         items = list(rows[:limit])
         next_cursor = items[-1].id if has_more and items else None
         return items, has_more, next_cursor
 
+    async def tag_names_for(
+        self, transaction_ids: Sequence[int]
+    ) -> Mapping[int, Sequence[str]]:
+        """Tag names per transaction id, for the ids that have any."""
+        if not transaction_ids:
+            return {}
+        rows = await self.db.execute(
+            select(transaction_tags.c.transaction_id, Tag.name)
+            .join(Tag, Tag.id == transaction_tags.c.tag_id)
+            .where(transaction_tags.c.transaction_id.in_(transaction_ids))
+            .order_by(Tag.name)
+        )
+        tags: dict[int, list[str]] = {}
+        for tx_id, name in rows:
+            tags.setdefault(tx_id, []).append(name)
+        return tags
+
     async def get_by_id(self, transaction_id: int) -> Transaction | None:
         return (
             await self.db.execute(
                 select(Transaction)
                 .where(Transaction.id == transaction_id)
                 .options(
-                    selectinload(Transaction.account),
-                    selectinload(Transaction.merchant),
-                    selectinload(Transaction.subcategory).selectinload(
+                    # One row: join the many-to-ones into the same query
+                    joinedload(Transaction.account),
+                    joinedload(Transaction.merchant),
+                    joinedload(Transaction.subcategory).joinedload(
                         Subcategory.category
                     ),
-                    selectinload(Transaction.cardholder),
+                    joinedload(Transaction.cardholder),
                     selectinload(Transaction.tags),
+                    # Anything not loaded above fails loudly instead of lazy-loading
+                    raiseload("*"),
                 )
             )
         ).scalar_one_or_none()
@@ -1602,19 +1971,31 @@ class TransactionQueries:
                 ),
                 selectinload(Transaction.cardholder),
                 selectinload(Transaction.tags),
+                raiseload("*"),
             )
         )
         return list(result.scalars().all())
 
+    async def apply_enrichment(self, updates: Sequence[Mapping[str, Any]]) -> None:
+        """Write enrichment results with one executemany UPDATE.
+
+        Each mapping carries "_id", an optional "_description", and the columns
+        to set (merchant_id, subcategory_id, ...); every mapping must have the
+        same keys.
+        """
+        await self.db.execute(_ENRICHMENT_UPDATE, list(updates))
+
     async def find_or_create_merchant(self, name: str) -> Merchant:
         stmt = select(Merchant).where(Merchant.name.ilike(name))
         if self.user_id is not None:
             stmt = stmt.where(Merchant.user_id == self.user_id)
         merchant = (await self.db.execute(stmt)).scalar_one_or_none()
         if merchant is None:
-            merchant = Merchant(name=name, user_id=self.user_id)
-            self.db.add(merchant)
-            await self.db.flush()
+            merchant = await self._upsert_returning(
+                insert(Merchant).values(name=name, user_id=self.user_id),
+                ["user_id", "name"],
+                Merchant,
+            )
         return merchant
 
     async def find_or_create_category(self, name: str) -> Category:
@@ -1623,9 +2004,11 @@ class TransactionQueries:
             stmt = stmt.where(Category.user_id == self.user_id)
         category = (await self.db.execute(stmt)).scalar_one_or_none()
         if category is None:
-            category = Category(name=name, user_id=self.user_id)
-            self.db.add(category)
-            await self.db.flush()
+            category = await self._upsert_returning(
+                insert(Category).values(name=name, user_id=self.user_id),
+                ["user_id", "name"],
+                Category,
+            )
         return category
 
     async def find_or_create_subcategory(
@@ -1640,11 +2023,24 @@ class TransactionQueries:
             )
         ).scalar_one_or_none()
         if subcategory is None:
-            subcategory = Subcategory(category_id=category_id, name=name)
-            self.db.add(subcategory)
-            await self.db.flush()
+            subcategory = await self._upsert_returning(
+                insert(Subcategory).values(category_id=category_id, name=name),
+                ["category_id", "name"],
+                Subcategory,
+            )
         return subcategory
 
+    async def _upsert_returning(self, stmt, index_elements: Sequence[str], entity):
+        """Insert a row, or take the one a concurrent request just created.
+
+        The no-op DO UPDATE makes RETURNING yield the existing row on conflict,
+        so a race between the lookup and the insert can't raise.
+        """
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, set_={"name": stmt.excluded.name}
+        ).returning(entity)
+        return await self.db.scalar(stmt, execution_options={"populate_existing": True})
+
     async def find_or_create_tag(self, name: str) -> Tag:
         stmt = select(Tag).where(Tag.name.ilike(name))
         if self.user_id is not None:
@@ -1656,6 +2052,29 @@ class TransactionQueries:
             await self.db.flush()
         return tag
 
+    async def resolve_tags_for_enrichment(
+        self, names: set[str], cache: dict[str, int]
+    ) -> None:
+        """Load or create every (lower-cased) tag in *names* in one round trip each."""
+        missing = names - cache.keys()
+        if not missing:
+            return
+        stmt = select(Tag.id, Tag.name).where(Tag.name.in_(missing))
+        if self.user_id is not None:
+            stmt = stmt.where(Tag.user_id == self.user_id)
+        for tag_id, name in (await self.db.execute(stmt)).all():
+            cache[name] = tag_id
+        missing -= cache.keys()
+        if missing:
+            res = await self.db.execute(
+                insert(Tag)
+                .values([{"name": n, "user_id": self.user_id} for n in missing])
+                .on_conflict_do_nothing()
+                .returning(Tag.id, Tag.name)
+            )
+            for tag_id, name in res.all():
+                cache[name] = tag_id
+
     async def set_transaction_tags(
         self, tx: Transaction, tag_names: Sequence[str]
     ) -> None:
@@ -1833,7 +2252,7 @@ class BudgetQueries:
 
     async def list_with_spending(self, month: str) -> list:
         """Return all budgets with their spending for the given YYYY-MM month."""
-        month_filter = func.strftime("%Y-%m", Transaction.date) == month
+        month_filter = _month_filter(month)
 
         cat_spent = (
             select(func.coalesce(func.sum(-Transaction.amount), 0))
@@ -1922,7 +2341,7 @@ class BudgetQueries:
         if not months:
             return []
         month_count = len(months)
-        month_filter = func.strftime("%Y-%m", Transaction.date).in_(months)
+        month_filter = or_(*(_month_filter(m) for m in months))
         user_filter = (
             [Transaction.user_id == self.user_id] if self.user_id is not None else []
         )
@@ -2014,6 +2433,64 @@ class AiSummaryCacheQueries:
         )
 
 
+class EnrichmentCacheQueries:
+    def __init__(self, db: AsyncSession, user_id: int | None = None) -> None:
+        self.db = db
+        self.user_id = user_id
+
+    async def get_many(self, keys: set[tuple[str, bool]]) -> dict[tuple, dict]:
+        """Cached results for (normalized description, is_debit) keys."""
+        if self.user_id is None or not keys:
+            return {}
+        result = await self.db.execute(
+            select(
+                EnrichmentCache.normalized,
+                EnrichmentCache.is_debit,
+                EnrichmentCache.result_json,
+            ).where(
+                EnrichmentCache.user_id == self.user_id,
+                EnrichmentCache.normalized.in_({k for k, _ in keys}),
+            )
+        )
+        return {
+            (row.normalized, row.is_debit): json.loads(row.result_json)
+            for row in result
+            if (row.normalized, row.is_debit) in keys
+        }
+
+    async def put_many(
+        self, entries: dict[tuple[str, bool], dict], replace: bool = False
+    ) -> None:
+        """Store results for new keys. Keys already cached are left as they are
+        unless replace is set, which re-enrichment uses so a fresh result
+        supersedes the one later imports would otherwise keep reusing."""
+        if self.user_id is None or not entries:
+            return
+        stmt = insert(EnrichmentCache).values(
+            [
+                {
+                    "user_id": self.user_id,
+                    "normalized": normalized,
+                    "is_debit": is_debit,
+                    "result_json": json.dumps(result),
+                    "created_at": datetime.utcnow(),
+                }
+                for (normalized, is_debit), result in entries.items()
+            ]
+        )
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "normalized", "is_debit"],
+                set_={
+                    "result_json": stmt.excluded.result_json,
+                    "created_at": stmt.excluded.created_at,
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+        await self.db.execute(stmt)
+
+
 class EnrichmentBatchQueries:
     def __init__(self, db: AsyncSession, user_id: int | None = None) -> None:
         self.db = db
@@ -56,8 +56,9 @@ export interface TransactionsResponse {
   items: TransactionItem[];
   has_more: boolean;
   next_cursor: number | null;
-  total_count: number;
-  total_amount: string;
+  // Only computed for the first page; null when paging with a cursor
+  total_count: number | null;
+  total_amount: string | null;
 }
 
 export interface ColumnMapping {
@@ -78,6 +78,11 @@ resource "aws_ecs_task_definition" "api" {
         {
           name  = "REDIS_URL"
           value = "redis://localhost:6379"
+        },
+        {
+          # Fargate tasks get half a vCPU; scale out with tasks, not workers
+          name  = "WEB_CONCURRENCY"
+          value = "1"
         }
       ]
       secrets = [
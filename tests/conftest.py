@@ -1,13 +1,15 @@
 from datetime import date
 from decimal import Decimal
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from budget.auth import get_current_user
+from budget.ai import clear_detect_cache
+from budget.auth import clear_user_cache, get_current_user
 from budget.database import Base, get_db
-from budget.main import app
+from budget.main import app, clear_stats_cache
 from budget.models import (
     Account,
     CardHolder,
@@ -26,6 +28,11 @@ class _AnonUser:
     name = "Test"
 
 
+@pytest.fixture(autouse=True)
+def _clear_detect_cache():
+    clear_detect_cache()
+
+
 @pytest_asyncio.fixture
 async def engine():
     eng = create_async_engine("sqlite+aiosqlite:///:memory:")
@@ -46,6 +53,8 @@ async def db_session(engine):
 
 @pytest_asyncio.fixture
 async def client(db_session):
+    clear_stats_cache()
+
     async def _override_get_db():
         yield db_session
 
@@ -65,6 +74,9 @@ async def client(db_session):
 async def unauthed_client(db_session):
     """Client that overrides only get_db — auth runs for real."""
 
+    clear_user_cache()
+    clear_stats_cache()
+
     async def _override_get_db():
         yield db_session
 
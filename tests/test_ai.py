@@ -3,11 +3,17 @@
 All tests mock client.messages.create so no real Anthropic API calls are made.
 """
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+import anthropic
 import pytest
 
 from budget.ai import (
+    ENRICH_BATCH_SIZE,
+    ENRICH_BATCH_SIZE_STEP,
+    ENRICH_MAX_BATCH_SIZE,
+    ENRICH_MAX_OUTPUT_TOKENS,
+    ENRICH_MIN_BATCH_SIZE,
     SAMPLE_ROWS,
     SUMMARIZE_SYSTEM,
     ColumnDetector,
@@ -15,6 +21,10 @@ from budget.ai import (
     QueryParser,
     ReportSummarizer,
     TransactionEnricher,
+    cacheable_enrichment,
+    dedupe_for_enrichment,
+    expand_duplicate_results,
+    split_cached_enrichment,
 )
 
 # ---------------------------------------------------------------------------
@@ -70,8 +80,62 @@ class TestColumnDetector:
         )
         fieldnames = ["Date", "Description", "Amount"]
         rows = [{"Date": "2024-01-01", "Description": "Coffee", "Amount": "-5.00"}]
-        result = detector.detect(fieldnames, rows)
+        result = detector.detect(fieldnames, rows, force_llm=True)
         assert result == {"description": 1, "date": 0, "amount": 2}
+        detector.client.messages.create.assert_called_once()
+
+    def test_detect_obvious_headers_skips_llm(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        detector.client = MagicMock()
+        fieldnames = ["Transaction Date", " Memo ", "Category", "Amount"]
+        result = detector.detect(fieldnames, [])
+        assert result == {"description": 1, "date": 0, "amount": 3}
+        detector.client.messages.create.assert_not_called()
+
+    def test_detect_prefers_description_over_details(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        detector.client = MagicMock()
+        fieldnames = [
+            "Details",
+            "Posting Date",
+            "Description",
+            "Amount",
+            "Type",
+            "Balance",
+            "Check or Slip #",
+        ]
+        result = detector.detect(fieldnames, [])
+        assert result == {"description": 2, "date": 1, "amount": 3}
+        detector.client.messages.create.assert_not_called()
+
+    def test_detect_unresolved_header_falls_back_to_llm(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        detector.client = MagicMock()
+        mapping = {"description": 1, "date": 0, "amount": 2}
+        detector.client.messages.create.return_value = _response(
+            [_tool_use_block("map_columns", mapping)]
+        )
+        fieldnames = ["Date", "Description", "Debit"]
+        rows = [{"Date": "2024-01-01", "Description": "Coffee", "Debit": "5.00"}]
+        result = detector.detect(fieldnames, rows)
+        assert result == mapping
+        detector.client.messages.create.assert_called_once()
+
+    def test_detect_reuses_mapping_for_same_header(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        detector.client = MagicMock()
+        mapping = {"description": 1, "date": 0, "amount": 2}
+        detector.client.messages.create.return_value = _response(
+            [_tool_use_block("map_columns", mapping)]
+        )
+        fieldnames = ["Posted", "Payee", "Debit"]
+        first = detector.detect(fieldnames, [{"Posted": "2024-01-01"}])
+        first["amount"] = None
+        again = detector.detect(fieldnames, [{"Posted": "2024-02-01"}])
+        assert again == mapping
+        detector.client.messages.create.assert_called_once()
+        detector.detect(fieldnames, [], force_llm=True)
+        assert detector.client.messages.create.call_count == 2
 
     def test_detect_with_null_columns(self, mocker):
         detector = ColumnDetector.__new__(ColumnDetector)
@@ -83,6 +147,23 @@ class TestColumnDetector:
         result = detector.detect(["Col1"], [{"Col1": "x"}])
         assert result == {"description": None, "date": None, "amount": None}
 
+    def test_build_csv_sample_quotes_and_ignores_extra_keys(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        rows = [{"Date": "2024-01-01", "Memo": "Coffee, large", "Extra": "x"}]
+        sample = detector._build_csv_sample(["Date", "Memo"], rows)
+        assert sample.splitlines() == ["Date,Memo", '2024-01-01,"Coffee, large"']
+
+    def test_detect_without_tool_use_raises(self):
+        detector = ColumnDetector.__new__(ColumnDetector)
+        detector.client = MagicMock()
+        text_block = MagicMock()
+        text_block.type = "text"
+        detector.client.messages.create.return_value = _response(
+            [text_block], stop_reason="end_turn"
+        )
+        with pytest.raises(RuntimeError, match="No tool_use block"):
+            detector.detect(["Col1"], [{"Col1": "x"}])
+
     def test_build_csv_sample_fewer_than_sample_rows(self):
         detector = ColumnDetector.__new__(ColumnDetector)
         fieldnames = ["Date", "Amount"]
@@ -116,9 +197,10 @@ class TestTransactionEnricher:
     def _make_enricher(self):
         e = TransactionEnricher.__new__(TransactionEnricher)
         e.client = MagicMock()
+        e.client.messages.create = AsyncMock()
         return e
 
-    def test_enrich_batch_success(self):
+    async def test_enrich_batch_success(self):
         enricher = self._make_enricher()
         results = [
             {
@@ -142,12 +224,12 @@ class TestTransactionEnricher:
                 "date": "2024-01-15",
             }
         ]
-        out, in_tok, out_tok = enricher._enrich_batch(batch, 0)
+        out, in_tok, out_tok = await enricher._enrich_batch(batch, 0)
         assert len(out) == 1
         assert out[0]["merchant_name"] == "Starbucks"
         assert out[0]["is_recurring"] is False
 
-    def test_enrich_batch_tool_loop(self):
+    async def test_enrich_batch_tool_loop(self):
         """When first response has a non-enrich_transactions tool, loop continues."""
         enricher = self._make_enricher()
 
@@ -183,12 +265,12 @@ class TestTransactionEnricher:
                 "date": "2024-01-01",
             }
         ]
-        out, in_tok, out_tok = enricher._enrich_batch(batch, 0)
+        out, in_tok, out_tok = await enricher._enrich_batch(batch, 0)
         assert out[0]["merchant_name"] == "Netflix"
         assert out[0]["is_recurring"] is True
         assert enricher.client.messages.create.call_count == 2
 
-    def test_enrich_batch_bad_stop_reason_raises(self):
+    async def test_enrich_batch_bad_stop_reason_raises(self):
         enricher = self._make_enricher()
         # stop_reason is end_turn and no enrich_transactions block
         non_tool = MagicMock()
@@ -205,9 +287,9 @@ class TestTransactionEnricher:
             }
         ]
         with pytest.raises(RuntimeError, match="did not call enrich_transactions"):
-            enricher._enrich_batch(batch, 0)
+            await enricher._enrich_batch(batch, 0)
 
-    def test_enrich_batch_multiple_results(self):
+    async def test_enrich_batch_multiple_results(self):
         enricher = self._make_enricher()
         results = [
             {
@@ -246,13 +328,233 @@ class TestTransactionEnricher:
                 "date": "2024-01-01",
             },
         ]
-        out, in_tok, out_tok = enricher._enrich_batch(batch, 0)
+        out, in_tok, out_tok = await enricher._enrich_batch(batch, 0)
         assert len(out) == 2
         assert out[0]["merchant_name"] == "Starbucks"
         assert out[0]["is_recurring"] is False
         assert out[1]["merchant_name"] == "Netflix"
         assert out[1]["is_recurring"] is True
 
+    async def test_enrich_batch_retries_rate_limit(self, mocker):
+        mocker.patch("budget.ai.asyncio.sleep", new=AsyncMock())
+        enricher = self._make_enricher()
+        rate_limited = anthropic.RateLimitError(
+            "slow down", response=MagicMock(status_code=429), body=None
+        )
+        results = [{"index": 0, "merchant_name": "Starbucks"}]
+        enricher.client.messages.create.side_effect = [
+            rate_limited,
+            _response([_tool_use_block("enrich_transactions", {"results": results})]),
+        ]
+        batch = [{"index": 0, "description": "SBUX", "amount": "-5", "date": "x"}]
+        out, _, _ = await enricher._enrich_batch(batch, 0)
+        assert out == results
+        assert enricher.client.messages.create.call_count == 2
+
+    async def test_batch_size_adapts_to_api_health(self, mocker):
+        mocker.patch("budget.ai.asyncio.sleep", new=AsyncMock())
+        enricher = self._make_enricher()
+        rate_limited = anthropic.RateLimitError(
+            "slow down", response=MagicMock(status_code=429), body=None
+        )
+        overloaded = anthropic.InternalServerError(
+            "overloaded", response=MagicMock(status_code=529), body=None
+        )
+        ok = _response([_tool_use_block("enrich_transactions", {"results": []})])
+        enricher.client.messages.create.side_effect = [rate_limited, ok, overloaded]
+
+        await enricher._create_with_backoff()
+        assert enricher.batch_size == ENRICH_BATCH_SIZE // 2 + ENRICH_BATCH_SIZE_STEP
+        with pytest.raises(anthropic.InternalServerError):
+            await enricher._create_with_backoff()
+        assert (
+            enricher.batch_size
+            == (ENRICH_BATCH_SIZE // 2 + ENRICH_BATCH_SIZE_STEP) // 2
+        )
+
+        enricher.batch_size = ENRICH_MAX_BATCH_SIZE
+        enricher._record_success()
+        assert enricher.batch_size == ENRICH_MAX_BATCH_SIZE
+        enricher.batch_size = ENRICH_MIN_BATCH_SIZE
+        enricher._record_failure()
+        assert enricher.batch_size == ENRICH_MIN_BATCH_SIZE
+
+    async def test_enrich_batch_regex_fields_override(self):
+        enricher = self._make_enricher()
+        results = [
+            {"index": 0, "card_number": "1111", "is_recurring": False},
+            {"index": 1, "is_recurring": False},
+        ]
+        enricher.client.messages.create.return_value = _response(
+            [_tool_use_block("enrich_transactions", {"results": results})]
+        )
+        batch = [
+            {
+                "index": 0,
+                "description": "GYM AUTOPAY CARD 4821",
+                "amount": "-40",
+                "date": "d",
+            },
+            {"index": 1, "description": "STARBUCKS #12", "amount": "-5", "date": "d"},
+        ]
+        out, _, _ = await enricher._enrich_batch(batch, 0)
+        assert out[0]["card_number"] == "4821"
+        assert out[0]["is_recurring"] is True
+        assert out[1].get("card_number") is None
+        assert out[1]["is_recurring"] is False
+
+    async def test_enrich_batch_unknown_index_raises(self):
+        enricher = self._make_enricher()
+        enricher.client.messages.create.return_value = _response(
+            [_tool_use_block("enrich_transactions", {"results": [{"index": 7}]})]
+        )
+        batch = [{"index": 0, "description": "x", "amount": "1", "date": "d"}]
+        with pytest.raises(RuntimeError, match="unknown row"):
+            await enricher._enrich_batch(batch, 0)
+
+    async def test_enrich_batch_max_tokens_scales_with_batch(self):
+        enricher = self._make_enricher()
+        enricher.client.messages.create.return_value = _response(
+            [_tool_use_block("enrich_transactions", {"results": []})]
+        )
+        await enricher._enrich_batch(
+            [{"index": 0, "description": "x", "amount": "1", "date": "d"}], 0
+        )
+        assert enricher.client.messages.create.call_args.kwargs["max_tokens"] == 1024
+
+    async def test_enrich_batch_truncated_splits_in_half(self):
+        enricher = self._make_enricher()
+        enricher.client.messages.create.side_effect = [
+            _response([], stop_reason="max_tokens"),
+            _response(
+                [
+                    _tool_use_block(
+                        "enrich_transactions", {"results": [{"index": 0}, {"index": 1}]}
+                    )
+                ]
+            ),
+            _response(
+                [
+                    _tool_use_block(
+                        "enrich_transactions", {"results": [{"index": 2}, {"index": 3}]}
+                    )
+                ]
+            ),
+        ]
+        batch = [
+            {"index": i, "description": "x", "amount": "1", "date": "d"}
+            for i in range(4)
+        ]
+        out, _, _ = await enricher._enrich_batch(batch, 0)
+        assert [r["index"] for r in out] == [0, 1, 2, 3]
+        assert enricher.client.messages.create.call_count == 3
+        # Halved for the truncation, then one step per successful half
+        assert (
+            enricher.batch_size == ENRICH_BATCH_SIZE // 2 + 2 * ENRICH_BATCH_SIZE_STEP
+        )
+
+    def test_max_batch_size_fits_output_budget(self):
+        assert ENRICH_MAX_BATCH_SIZE * 150 <= ENRICH_MAX_OUTPUT_TOKENS
+
+    async def test_enrich_via_message_batches(self, mocker):
+        mocker.patch("budget.ai.asyncio.sleep", new=AsyncMock())
+        enricher = self._make_enricher()
+        batches_api = enricher.client.messages.batches
+        batches_api.create = AsyncMock(
+            return_value=MagicMock(id="mb_1", processing_status="in_progress")
+        )
+        batches_api.retrieve = AsyncMock(
+            return_value=MagicMock(id="mb_1", processing_status="ended")
+        )
+
+        ok = MagicMock(custom_id="batch-0")
+        ok.result.type = "succeeded"
+        ok.result.message = _response(
+            [_tool_use_block("enrich_transactions", {"results": [{"index": 0}]})]
+        )
+        ok.result.message.usage.input_tokens = 10
+        ok.result.message.usage.output_tokens = 5
+        errored = MagicMock(custom_id="batch-1")
+        errored.result.type = "errored"
+
+        async def _entries():
+            for entry in (ok, errored):
+                yield entry
+
+        batches_api.results = AsyncMock(return_value=_entries())
+
+        batches = [
+            [{"index": 0, "description": "A", "amount": "-1", "date": "d"}],
+            [{"index": 1, "description": "B", "amount": "-2", "date": "d"}],
+        ]
+        outcomes = [o async for o in enricher.enrich_via_message_batches(batches)]
+
+        requests = batches_api.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["batch-0", "batch-1"]
+        assert outcomes[0] == (0, [{"index": 0}], 10, 5)
+        assert outcomes[1][0] == 1
+        assert isinstance(outcomes[1][1], RuntimeError)
+        batches_api.retrieve.assert_awaited_once_with("mb_1")
+
+    async def test_enrich_all_splits_into_batches(self):
+        enricher = self._make_enricher()
+        calls = []
+
+        async def fake_batch(batch, batch_num):
+            calls.append((batch_num, len(batch)))
+            return [{"index": r["index"]} for r in batch], 1, 1
+
+        enricher._enrich_batch = fake_batch
+        rows = [{"index": i} for i in range(ENRICH_BATCH_SIZE * 2 + 5)]
+        outputs = await enricher.enrich_all(rows, concurrency=2)
+        assert sorted(calls) == [
+            (0, ENRICH_BATCH_SIZE),
+            (1, ENRICH_BATCH_SIZE),
+            (2, 5),
+        ]
+        flat = [r["index"] for results, _, _ in outputs for r in results]
+        assert flat == list(range(len(rows)))
+
+
+class TestEnrichmentDedupe:
+    def test_repeat_descriptions_collapse(self):
+        rows = [
+            {"index": 0, "description": "STARBUCKS #4821 SEATTLE", "amount": "-5.00"},
+            {"index": 1, "description": "STARBUCKS #1177 SEATTLE", "amount": "-6.10"},
+            {"index": 2, "description": "STARBUCKS #4821 SEATTLE", "amount": "5.00"},
+            {"index": 3, "description": "NETFLIX.COM", "amount": "-15.99"},
+        ]
+        unique, copies = dedupe_for_enrichment(rows)
+        assert [r["index"] for r in unique] == [0, 2, 3]
+        assert copies == {0: [rows[1]]}
+
+    def test_expand_fans_out_with_own_index_and_card(self):
+        copies = {0: [{"index": 5, "description": "SHELL CARD 9999"}]}
+        results = [{"index": 0, "merchant_name": "Shell", "card_number": "1234"}]
+        expanded = expand_duplicate_results(results, copies)
+        assert expanded[1] == {
+            "index": 5,
+            "merchant_name": "Shell",
+            "card_number": "9999",
+        }
+        assert expanded[0]["index"] == 0
+
+    def test_cached_results_round_trip_without_row_fields(self):
+        first = [{"index": 0, "description": "SHELL #12 CARD 1234", "amount": "-40"}]
+        cached = cacheable_enrichment(
+            [{"index": 0, "merchant_name": "Shell", "card_number": "1234"}],
+            {0: first[0]},
+        )
+        assert cached == {("SHELL CARD", True): {"merchant_name": "Shell"}}
+
+        rows = [
+            {"index": 7, "description": "SHELL #98 CARD 5555", "amount": "-30"},
+            {"index": 8, "description": "SHELL #98 CARD 5555", "amount": "30"},
+        ]
+        misses, hits = split_cached_enrichment(rows, cached)
+        assert misses == [rows[1]]
+        assert hits == [{"index": 7, "merchant_name": "Shell", "card_number": "5555"}]
+
 
 # ---------------------------------------------------------------------------
 # QueryParser
@@ -260,9 +562,10 @@ class TestTransactionEnricher:
 
 
 class TestQueryParser:
-    def test_parse_returns_dict(self):
+    async def test_parse_returns_dict(self):
         qp = QueryParser.__new__(QueryParser)
         qp.client = MagicMock()
+        qp.client.messages.create = AsyncMock()
         tool_input = {
             "date_from": "2024-01-01",
             "date_to": "2024-01-31",
@@ -279,13 +582,14 @@ class TestQueryParser:
         qp.client.messages.create.return_value = _response(
             [_tool_use_block("set_filters", tool_input)]
         )
-        result = qp.parse("transactions in January 2024", "(no categories)")
+        result = await qp.parse("transactions in January 2024", "(no categories)")
         assert result["explanation"] == "Transactions in January 2024"
         assert result["date_from"] == "2024-01-01"
 
-    def test_parse_passes_query_to_api(self):
+    async def test_parse_passes_query_to_api(self):
         qp = QueryParser.__new__(QueryParser)
         qp.client = MagicMock()
+        qp.client.messages.create = AsyncMock()
         tool_input = {
             "merchant": "Starbucks",
             "explanation": "Transactions from Starbucks",
@@ -293,10 +597,14 @@ class TestQueryParser:
         qp.client.messages.create.return_value = _response(
             [_tool_use_block("set_filters", tool_input)]
         )
-        result = qp.parse("starbucks purchases", "Food & Drink: Restaurants")
+        result = await qp.parse("starbucks purchases", "Food & Drink: Restaurants")
         call_kwargs = qp.client.messages.create.call_args.kwargs
         assert call_kwargs["messages"][0]["content"] == "starbucks purchases"
-        assert "Food & Drink" in call_kwargs["system"]
+        assert "Food & Drink" in call_kwargs["system"][0]["text"]
+        assert call_kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert "Today's date" not in call_kwargs["system"][0]["text"]
+        assert call_kwargs["system"][1]["text"].startswith("Today's date: ")
+        assert "cache_control" not in call_kwargs["system"][1]
         assert result["merchant"] == "Starbucks"
 
 
@@ -306,9 +614,10 @@ class TestQueryParser:
 
 
 class TestMerchantDuplicateFinder:
-    def test_find_returns_groups(self):
+    async def test_find_returns_groups(self):
         finder = MerchantDuplicateFinder.__new__(MerchantDuplicateFinder)
         finder.client = MagicMock()
+        finder.client.messages.create = AsyncMock()
         tool_input = {
             "groups": [
                 {
@@ -321,30 +630,32 @@ class TestMerchantDuplicateFinder:
         finder.client.messages.create.return_value = _response(
             [_tool_use_block("report_duplicate_groups", tool_input)]
         )
-        result = finder.find(
+        result = await finder.find(
             "ID 1 | AMZN | location: none | 5 transactions\nID 2 | AMAZON.COM | location: none | 3 transactions"
         )
         assert len(result["groups"]) == 1
         assert result["groups"][0]["canonical_name"] == "Amazon"
         assert result["groups"][0]["member_ids"] == [1, 2, 3]
 
-    def test_find_empty_groups(self):
+    async def test_find_empty_groups(self):
         finder = MerchantDuplicateFinder.__new__(MerchantDuplicateFinder)
         finder.client = MagicMock()
+        finder.client.messages.create = AsyncMock()
         finder.client.messages.create.return_value = _response(
             [_tool_use_block("report_duplicate_groups", {"groups": []})]
         )
-        result = finder.find("ID 1 | Amazon | location: none | 10 transactions")
+        result = await finder.find("ID 1 | Amazon | location: none | 10 transactions")
         assert result["groups"] == []
 
-    def test_find_passes_text_to_api(self):
+    async def test_find_passes_text_to_api(self):
         finder = MerchantDuplicateFinder.__new__(MerchantDuplicateFinder)
         finder.client = MagicMock()
+        finder.client.messages.create = AsyncMock()
         finder.client.messages.create.return_value = _response(
             [_tool_use_block("report_duplicate_groups", {"groups": []})]
         )
         merchants_text = "ID 1 | AMZN | location: none | 5 transactions"
-        finder.find(merchants_text)
+        await finder.find(merchants_text)
         call_kwargs = finder.client.messages.create.call_args.kwargs
         assert call_kwargs["messages"][0]["content"] == merchants_text
 
@@ -359,7 +670,7 @@ class TestReportSummarizer:
         s = ReportSummarizer.__new__(ReportSummarizer)
         return s
 
-    def test_summarize_returns_narrative_insights_recommendations(self, mocker):
+    def test_summarize_returns_narrative_insights_recommendations(self):
         summarizer = self._make_summarizer()
         tool_input = {
             "narrative": "You spent **$2,100** this month.",
@@ -370,7 +681,7 @@ class TestReportSummarizer:
         mock_client.messages.create.return_value = _response(
             [_tool_use_block("write_summary", tool_input)]
         )
-        mocker.patch("budget.ai.anthropic.Anthropic", return_value=mock_client)
+        summarizer.client = mock_client
         result = summarizer.summarize(
             "February 2026", {"income": "3000", "expenses": "-2100"}
         )
@@ -378,7 +689,7 @@ class TestReportSummarizer:
         assert len(result["insights"]) == 2
         assert result["recommendations"] == ["Reduce dining out."]
 
-    def test_summarize_raises_when_no_tool_block(self, mocker):
+    def test_summarize_raises_when_no_tool_block(self):
         summarizer = self._make_summarizer()
         text_block = MagicMock()
         text_block.type = "text"
@@ -386,11 +697,11 @@ class TestReportSummarizer:
         mock_client.messages.create.return_value = _response(
             [text_block], stop_reason="end_turn"
         )
-        mocker.patch("budget.ai.anthropic.Anthropic", return_value=mock_client)
+        summarizer.client = mock_client
         with pytest.raises(ValueError, match="No tool use block"):
             summarizer.summarize("2025", {})
 
-    def test_summarize_includes_period_label_in_message(self, mocker):
+    def test_summarize_includes_period_label_in_message(self):
         summarizer = self._make_summarizer()
         tool_input = {
             "narrative": "Annual summary.",
@@ -401,7 +712,7 @@ class TestReportSummarizer:
         mock_client.messages.create.return_value = _response(
             [_tool_use_block("write_summary", tool_input)]
         )
-        mocker.patch("budget.ai.anthropic.Anthropic", return_value=mock_client)
+        summarizer.client = mock_client
         summarizer.summarize("2025", {"income": "60000"})
         call_kwargs = mock_client.messages.create.call_args.kwargs
         user_content = call_kwargs["messages"][0]["content"]
@@ -4,6 +4,7 @@ All tests use the `client` fixture (httpx AsyncClient with ASGITransport).
 AI endpoints use `mocker` to patch module-level singletons.
 """
 
+import asyncio
 import io
 from datetime import date
 from decimal import Decimal
@@ -11,12 +12,28 @@ from decimal import Decimal
 import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
 from sqlalchemy.pool import StaticPool
 
+from budget.ai import enrichment_key
 from budget.database import Base
 from budget.jobs import _run_enrichment
-from budget.main import _classify_gap, parse_amount, parse_date
+from budget.main import (
+    _classify_gap,
+    _gather_reads,
+    _parse_locks,
+    _parse_query_cached,
+    _parse_waiters,
+    parse_amount,
+    parse_date,
+)
 from budget.models import Account, CsvImport, Transaction
+from budget.query import (
+    AnalyticsQueries,
+    CategoryQueries,
+    EnrichmentCacheQueries,
+    TransactionQueries,
+)
 
 # ---------------------------------------------------------------------------
 # Merchants
@@ -389,17 +406,52 @@ class TestTransactions:
 
     async def test_list_with_data(self, client, make_account, make_transaction):
         acct = await make_account()
-        await make_transaction(acct.id, amount=Decimal("-50.00"), description="Coffee")
+        await make_transaction(
+            acct.id,
+            amount=Decimal("-50.00"),
+            description="Coffee",
+            txn_date=date(2024, 3, 5),
+        )
         r = await client.get("/transactions")
         assert r.status_code == 200
         items = r.json()["items"]
         assert len(items) == 1
         item = items[0]
         assert item["description"] == "Coffee"
-        assert float(item["amount"]) == pytest.approx(-50.0)
+        assert item["amount"] == "-50.00"
+        assert item["date"] == "2024-03-05"
         assert "account" in item
         assert item["raw_description"] is None
 
+    async def test_list_totals_on_first_page_only(
+        self, client, make_account, make_transaction
+    ):
+        acct = await make_account()
+        for amount in ("-10.00", "-20.00", "5.00"):
+            await make_transaction(acct.id, amount=Decimal(amount))
+        r = await client.get("/transactions", params={"limit": 2})
+        data = r.json()
+        assert data["total_count"] == 3
+        assert Decimal(data["total_amount"]) == Decimal("-25.00")
+        r = await client.get(
+            "/transactions", params={"limit": 2, "after": data["next_cursor"]}
+        )
+        data = r.json()
+        assert len(data["items"]) == 1
+        assert data["total_count"] is None
+        assert data["total_amount"] is None
+
+    async def test_list_totals_can_be_skipped(
+        self, client, make_account, make_transaction
+    ):
+        acct = await make_account()
+        await make_transaction(acct.id, amount=Decimal("-10.00"))
+        r = await client.get("/transactions", params={"include_totals": "false"})
+        data = r.json()
+        assert len(data["items"]) == 1
+        assert data["total_count"] is None
+        assert data["total_amount"] is None
+
     async def test_list_raw_description_populated(
         self, client, make_account, make_transaction
     ):
@@ -484,6 +536,32 @@ class TestTransactions:
         assert data["category"] == "Food & Drink"
         assert data["subcategory"] == "Coffee & Tea"
 
+    async def test_patch_transaction_response_without_reload(
+        self, client, make_account, make_transaction, mocker
+    ):
+        acct = await make_account("Checking")
+        tx = await make_transaction(acct.id)
+        get_by_id = mocker.spy(TransactionQueries, "get_by_id")
+        r = await client.patch(
+            f"/transactions/{tx.id}",
+            json={
+                "description": "Coffee",
+                "merchant_name": "Starbucks",
+                "category": "Food & Drink",
+                "subcategory": "Coffee & Tea",
+                "notes": "latte",
+                "card_number": "4821",
+                "tags": ["treat"],
+            },
+        )
+        assert r.status_code == 200
+        data = r.json()
+        assert data["account"] == "Checking"
+        assert data["card_number"] == "4821"
+        assert data["tags"] == ["treat"]
+        assert data["notes"] == "latte"
+        assert get_by_id.call_count == 1
+
     async def test_patch_transaction_clear_merchant(
         self, client, make_account, make_merchant, make_transaction
     ):
@@ -662,6 +740,66 @@ class TestTransactions:
         assert tx.merchant_id is not None
         assert tx.subcategory_id is not None
 
+    async def test_re_enrich_shares_lookups_and_tags(
+        self, client, db_session, make_account, make_transaction, mocker
+    ):
+        acct = await make_account()
+        txs = [
+            await make_transaction(acct.id, raw_description=f"NETFLIX {i}")
+            for i in range(2)
+        ]
+        mocker.patch(
+            "budget.main.enricher._enrich_batch",
+            return_value=(
+                [
+                    {
+                        "index": i,
+                        "merchant_name": "Netflix",
+                        "category": "Entertainment",
+                        "subcategory": "Streaming",
+                        "suggested_tags": ["Subscription", " subscription "],
+                    }
+                    for i in range(2)
+                ],
+                0,
+                0,
+            ),
+        )
+        r = await client.post(
+            "/transactions/re-enrich", json={"transaction_ids": [t.id for t in txs]}
+        )
+        assert r.status_code == 200
+        for tx in txs:
+            await db_session.refresh(tx)
+        assert txs[0].merchant_id == txs[1].merchant_id is not None
+        assert txs[0].subcategory_id == txs[1].subcategory_id is not None
+        tags = await TransactionQueries(db_session, user_id=1).tag_names_for(
+            [t.id for t in txs]
+        )
+        assert tags == {txs[0].id: ["subscription"], txs[1].id: ["subscription"]}
+
+    async def test_re_enrich_replaces_cached_enrichment(
+        self, client, db_session, make_account, make_transaction, mocker
+    ):
+        acct = await make_account()
+        tx = await make_transaction(
+            acct.id, amount=Decimal("-4.50"), raw_description="SQ *BLUE BOTTLE"
+        )
+        key = enrichment_key({"description": tx.raw_description, "amount": "-4.50"})
+        ecq = EnrichmentCacheQueries(db_session, user_id=1)
+        await ecq.put_many({key: {"description": "Stale"}})
+        await db_session.commit()
+        mocker.patch(
+            "budget.main.enricher._enrich_batch",
+            return_value=([{"index": 0, "description": "Blue Bottle Coffee"}], 0, 0),
+        )
+        r = await client.post(
+            "/transactions/re-enrich", json={"transaction_ids": [tx.id]}
+        )
+        assert r.status_code == 200
+        cached = await ecq.get_many({key})
+        assert cached[key]["description"] == "Blue Bottle Coffee"
+
     async def test_re_enrich_ai_error_returns_502(
         self, client, make_account, make_transaction, mocker
     ):
@@ -924,6 +1062,68 @@ class TestAnalytics:
         assert "sankey" in data
         assert "expense_breakdown" in data
 
+    async def test_gather_reads_uses_separate_sessions(
+        self, db_session, make_account, make_transaction
+    ):
+        acct = await make_account()
+        await make_transaction(acct.id)
+        seen = []
+
+        async def read(session):
+            seen.append(session)
+            return await AnalyticsQueries(session, user_id=1).data_fingerprint()
+
+        await db_session.scalar(select(Transaction.id))
+        assert db_session.in_transaction()
+        results = await _gather_reads(db_session, read, read)
+        assert results[0] == results[1] == (1, 1)
+        assert len({id(s) for s in seen}) == 2
+        assert db_session not in seen
+        # The request session's connection went back to the pool first
+        assert not db_session.in_transaction()
+
+    async def test_overview_cached_until_transactions_change(
+        self, client, mocker, make_account, make_transaction
+    ):
+        acct = await make_account()
+        await make_transaction(
+            acct.id, amount=Decimal("-500.00"), txn_date=date(2024, 1, 2)
+        )
+        spy = mocker.spy(AnalyticsQueries, "get_overview_summary")
+        first = (await client.get("/overview")).json()
+        assert (await client.get("/overview")).json() == first
+        assert spy.call_count == 1
+
+        await make_transaction(
+            acct.id, amount=Decimal("-20.00"), txn_date=date(2024, 1, 3)
+        )
+        r = await client.get("/overview")
+        assert spy.call_count == 2
+        assert r.json()["transaction_count"] == 2
+
+    async def test_overview_cache_dropped_after_write(
+        self, client, make_account, make_transaction
+    ):
+        acct = await make_account()
+        tx = await make_transaction(
+            acct.id, amount=Decimal("-500.00"), txn_date=date(2024, 1, 2)
+        )
+        await client.get("/overview")
+        r = await client.patch(
+            f"/transactions/{tx.id}",
+            json={
+                "description": tx.description,
+                "merchant_name": None,
+                "category": "Dining",
+                "subcategory": "Restaurants",
+                "notes": None,
+            },
+        )
+        assert r.status_code == 200
+        r = await client.get("/overview")
+        names = [c["name"] for c in r.json()["expense_breakdown"]]
+        assert names == ["Dining"]
+
     async def test_recurring(
         self, client, make_account, make_merchant, make_transaction
     ):
@@ -1117,6 +1317,39 @@ class TestImportCsv:
         assert data["status"] == "processing"
         assert data["filename"] == "test.csv"
 
+    async def test_import_csv_sends_only_mapped_columns(self, client, mocker):
+        detect = mocker.patch(
+            "budget.main.detector.detect",
+            return_value={"date": 0, "amount": 2, "description": 3},
+        )
+        enqueue = mocker.patch("budget.main._enrichment_queue.enqueue")
+
+        csv_content = (
+            "Date,Memo,Amount,Description\n"
+            "2024-01-15,x,-10.00,Coffee \n"
+            "\n"
+            "2024-01-16,y,-20.00\n"
+        )
+        r = await client.post(
+            "/import-csv",
+            files=[self._csv_file(csv_content)],
+            data={"account_name": "Checking"},
+        )
+        assert r.status_code == 200
+        assert r.json()["rows_imported"] == 2
+        assert detect.call_args.args[1][0] == {
+            "Date": "2024-01-15",
+            "Memo": "x",
+            "Amount": "-10.00",
+            "Description": "Coffee ",
+        }
+        enrich_input, rows = enqueue.call_args.args[1:3]
+        assert rows == [
+            {"Date": "2024-01-15", "Amount": "-10.00", "Description": "Coffee "},
+            {"Date": "2024-01-16", "Amount": "-20.00", "Description": ""},
+        ]
+        assert [e["description"] for e in enrich_input] == ["Coffee", ""]
+
     async def test_import_csv_non_csv_rejected(self, client):
         r = await client.post(
             "/import-csv",
@@ -1163,6 +1396,86 @@ class TestAiParseQuery:
         assert data["explanation"] == "Transactions in January 2024"
         assert data["filters"]["date_from"] == "2024-01-01"
 
+    async def test_categories_text_cached_until_write(
+        self, client, make_account, make_category, make_transaction, mocker
+    ):
+        parse = mocker.patch(
+            "budget.main.query_parser.parse", return_value={"explanation": ""}
+        )
+        list_all = mocker.spy(CategoryQueries, "list_all")
+        await make_category("Food & Drink", "Coffee")
+        for _ in range(2):
+            await client.post("/ai/parse-query", json={"query": "coffee"})
+        assert list_all.call_count == 1
+        assert "- Food & Drink: Coffee" in parse.call_args.args[1]
+
+        acct = await make_account()
+        tx = await make_transaction(acct.id)
+        await client.patch(
+            f"/transactions/{tx.id}",
+            json={
+                "description": "Tea",
+                "merchant_name": None,
+                "category": "Food & Drink",
+                "subcategory": "Tea",
+                "notes": None,
+            },
+        )
+        await client.post("/ai/parse-query", json={"query": "tea"})
+        assert list_all.call_count == 2
+        assert "- Food & Drink: Coffee, Tea" in parse.call_args.args[1]
+
+    async def test_repeat_query_answered_from_cache(self, client, mocker):
+        parse = mocker.patch(
+            "budget.main.query_parser.parse",
+            return_value={"merchant": "Starbucks", "explanation": "Starbucks"},
+        )
+        responses = await asyncio.gather(
+            client.post("/ai/parse-query", json={"query": "Starbucks  last month"}),
+            client.post("/ai/parse-query", json={"query": "starbucks last month"}),
+        )
+        again = await client.post(
+            "/ai/parse-query", json={"query": "STARBUCKS last month"}
+        )
+        assert parse.call_count == 1
+        for r in (*responses, again):
+            assert r.json() == {
+                "filters": {"merchant": "Starbucks"},
+                "explanation": "Starbucks",
+            }
+
+    async def test_parse_lock_kept_until_last_waiter_leaves(self, mocker):
+        release = asyncio.Event()
+
+        async def parse(query, categories_text):
+            await release.wait()
+            return {"explanation": ""}
+
+        mocker.patch("budget.main.query_parser.parse", side_effect=parse)
+        tasks = [
+            asyncio.create_task(_parse_query_cached(1, "coffee", "")) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert list(_parse_waiters.values()) == [2]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert _parse_locks == {} and _parse_waiters == {}
+
+    async def test_connection_released_during_ai_call(
+        self, client, db_session, make_category, mocker
+    ):
+        await make_category("Food & Drink", "Coffee")
+        in_txn = []
+
+        def parse(query, categories_text):
+            in_txn.append(db_session.in_transaction())
+            return {"explanation": ""}
+
+        mocker.patch("budget.main.query_parser.parse", side_effect=parse)
+        r = await client.post("/ai/parse-query", json={"query": "coffee"})
+        assert r.status_code == 200
+        assert in_txn == [False]
+
 
 class TestAiFindDuplicateMerchants:
     async def test_find_duplicates(
@@ -1297,6 +1610,166 @@ class TestRunEnrichment:
 
         await eng.dispose()
 
+    async def test_reuses_cached_enrichment_across_imports(self, mocker):
+        eng = await self._setup_db()
+        factory = async_sessionmaker(
+            bind=eng, class_=AsyncSession, expire_on_commit=False
+        )
+        mocker.patch("budget.jobs.AsyncSessionLocal", factory)
+        enrich = mocker.patch(
+            "budget.jobs.enricher._enrich_batch",
+            return_value=(
+                [
+                    {
+                        "index": 0,
+                        "description": "Starbucks Coffee",
+                        "merchant_name": "Starbucks",
+                        "category": "Food & Drink",
+                        "subcategory": "Coffee & Tea",
+                        "card_number": None,
+                        "is_recurring": False,
+                    }
+                ],
+                0,
+                0,
+            ),
+        )
+
+        async with factory() as session:
+            acct = Account(name="Test Account", user_id=1)
+            session.add(acct)
+            await session.flush()
+            imports = [
+                CsvImport(
+                    user_id=1,
+                    account_id=acct.id,
+                    filename=f"test{i}.csv",
+                    row_count=1,
+                    enriched_rows=0,
+                    status="in-progress",
+                )
+                for i in range(2)
+            ]
+            session.add_all(imports)
+            await session.commit()
+            account_id = acct.id
+            import_ids = [ci.id for ci in imports]
+
+        for ci_id, desc, day in [
+            (import_ids[0], "STARBUCKS #4821 SEATTLE WA", "2024-01-15"),
+            (import_ids[1], "STARBUCKS #1177 SEATTLE WA", "2024-02-03"),
+        ]:
+            await _run_enrichment(
+                enrich_input=[
+                    {"index": 0, "description": desc, "amount": "-5.00", "date": day}
+                ],
+                rows=[{"Date": day, "Amount": "-5.00", "Description": desc}],
+                date_col="Date",
+                amount_col="Amount",
+                desc_col="Description",
+                account_id=account_id,
+                csv_import_id=ci_id,
+                user_id=1,
+            )
+
+        assert enrich.call_count == 1
+        async with factory() as session:
+            txs = (
+                (await session.execute(select(Transaction).order_by(Transaction.date)))
+                .scalars()
+                .all()
+            )
+            assert [t.description for t in txs] == ["Starbucks Coffee"] * 2
+            assert txs[0].merchant_id == txs[1].merchant_id is not None
+            assert txs[1].raw_description == "STARBUCKS #1177 SEATTLE WA"
+            ci = await session.get(CsvImport, import_ids[1])
+            assert ci.enriched_rows == 1
+
+        await eng.dispose()
+
+    async def test_batch_links_tags_and_lookups(self, mocker):
+        eng = await self._setup_db()
+        factory = async_sessionmaker(
+            bind=eng, class_=AsyncSession, expire_on_commit=False
+        )
+        mocker.patch("budget.jobs.AsyncSessionLocal", factory)
+        result = {
+            "merchant_name": "Starbucks",
+            "merchant_location": None,
+            "category": "Food & Drink",
+            "subcategory": "Coffee",
+            "is_recurring": False,
+            "suggested_tags": ["Coffee", " coffee ", "Treat"],
+        }
+        mocker.patch(
+            "budget.jobs.enricher._enrich_batch",
+            return_value=(
+                [
+                    {"index": 0, "description": "Starbucks", **result},
+                    {"index": 1, "description": "Starbucks", **result},
+                ],
+                0,
+                0,
+            ),
+        )
+
+        async with factory() as session:
+            acct = Account(name="Tags Account", user_id=1)
+            session.add(acct)
+            await session.flush()
+            ci = CsvImport(
+                user_id=1,
+                account_id=acct.id,
+                filename="tags.csv",
+                row_count=2,
+                enriched_rows=0,
+                status="in-progress",
+            )
+            session.add(ci)
+            await session.commit()
+            account_id, ci_id = acct.id, ci.id
+
+        rows = [
+            {"Date": "2024-01-15", "Amount": "-5.00", "Description": "SBUX MAIN ST"},
+            {"Date": "2024-01-16", "Amount": "-6.00", "Description": "SBUX PIKE PL"},
+        ]
+        enrich_input = [
+            {"index": i, "description": r["Description"], "amount": r["Amount"]}
+            for i, r in enumerate(rows)
+        ]
+        await _run_enrichment(
+            enrich_input=enrich_input,
+            rows=rows,
+            date_col="Date",
+            amount_col="Amount",
+            desc_col="Description",
+            account_id=account_id,
+            csv_import_id=ci_id,
+            user_id=1,
+        )
+
+        async with factory() as session:
+            txs = (
+                (
+                    await session.execute(
+                        select(Transaction)
+                        .where(Transaction.account_id == account_id)
+                        .options(selectinload(Transaction.tags))
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            assert len(txs) == 2
+            assert txs[0].merchant_id == txs[1].merchant_id is not None
+            assert txs[0].subcategory_id == txs[1].subcategory_id is not None
+            for tx in txs:
+                assert sorted(t.name for t in tx.tags) == ["coffee", "treat"]
+            ci = await session.get(CsvImport, ci_id)
+            assert ci.enriched_rows == 2
+
+        await eng.dispose()
+
     async def test_raw_description_null_when_no_desc_col(self, mocker):
         eng = await self._setup_db()
         factory = async_sessionmaker(
@@ -1556,6 +2029,64 @@ class TestDeduplication:
 
         await eng.dispose()
 
+    async def test_same_fingerprint_within_batch_collapses(self, mocker):
+        """Identical rows in one batch go through a single multi-row upsert as one transaction."""
+        eng = await self._setup_db()
+        factory = async_sessionmaker(
+            bind=eng, class_=AsyncSession, expire_on_commit=False
+        )
+        mocker.patch("budget.jobs.AsyncSessionLocal", factory)
+        mocker.patch(
+            "budget.jobs.enricher._enrich_batch",
+            return_value=([self._batch_result()], 0, 0),
+        )
+
+        async with factory() as session:
+            acct = Account(name="Checking", user_id=1)
+            session.add(acct)
+            await session.flush()
+            ci = CsvImport(
+                user_id=1,
+                account_id=acct.id,
+                filename="e.csv",
+                row_count=2,
+                enriched_rows=0,
+                status="in-progress",
+            )
+            session.add(ci)
+            await session.commit()
+            acct_id, ci_id = acct.id, ci.id
+
+        row = {"Date": "2024-02-01", "Amount": "-3.00", "Description": "Coffee"}
+        await _run_enrichment(
+            enrich_input=[
+                {"index": i, "description": "Coffee", "amount": "-3.00"}
+                for i in range(2)
+            ],
+            rows=[row, dict(row)],
+            date_col="Date",
+            amount_col="Amount",
+            desc_col="Description",
+            account_id=acct_id,
+            csv_import_id=ci_id,
+            user_id=1,
+        )
+
+        async with factory() as session:
+            txs = (
+                (
+                    await session.execute(
+                        select(Transaction).where(Transaction.account_id == acct_id)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            assert len(txs) == 1
+            assert (await session.get(CsvImport, ci_id)).enriched_rows == 2
+
+        await eng.dispose()
+
     async def test_fingerprint_stored_on_transaction(self, mocker):
         """Each inserted transaction has a non-null fingerprint."""
         eng = await self._setup_db()
@@ -1633,12 +2164,28 @@ class TestParseDateAmount:
         # %m/%d/%Y fails for month=15, falls through to %d/%m/%Y
         assert parse_date("15/01/2024") == date(2024, 1, 15)
 
+    def test_parse_date_ambiguous_stays_us_after_intl(self):
+        parse_date("15/01/2024")
+        assert parse_date("01/02/2024") == date(2024, 1, 2)
+
+    def test_parse_date_two_digit_year(self):
+        assert parse_date("1/5/24") == date(2024, 1, 5)
+        assert parse_date("12/31/99") == date(1999, 12, 31)
+
+    def test_parse_date_invalid_slash_raises(self):
+        with pytest.raises(ValueError, match="Unrecognised date format"):
+            parse_date("13/13/2024")
+
     def test_parse_date_long_month(self):
         assert parse_date("January 15, 2024") == date(2024, 1, 15)
 
     def test_parse_date_strips_whitespace(self):
         assert parse_date("  2024-03-20  ") == date(2024, 3, 20)
 
+    def test_parse_date_invalid_iso_raises(self):
+        with pytest.raises(ValueError, match="Unrecognised date format"):
+            parse_date("2024-13-01")
+
     def test_parse_date_invalid_raises(self):
         with pytest.raises(ValueError, match="Unrecognised date format"):
             parse_date("not-a-date")
@@ -1836,6 +2383,13 @@ class TestClassifyGap:
         # 200 falls between quarterly (60–120) and annual (300–400)
         assert _classify_gap(200) is None
 
+    def test_above_all_ranges_returns_none(self):
+        assert _classify_gap(401) is None
+
+    def test_half_day_median(self):
+        assert _classify_gap(10.5) is None
+        assert _classify_gap(29.5) == "monthly"
+
 
 # ---------------------------------------------------------------------------
 # Auth
@@ -2051,6 +2605,58 @@ class TestAuthRequired:
         )
         assert r.status_code == 401
 
+    async def test_valid_token_user_is_cached(self, db_session, make_user, mocker):
+        from budget.auth import clear_user_cache, create_access_token, get_current_user
+
+        clear_user_cache()
+        user = await make_user()
+        token = create_access_token(user.id)
+        spy = mocker.spy(db_session, "get")
+
+        first = await get_current_user(token=token, db=db_session)
+        second = await get_current_user(token=token, db=db_session)
+
+        assert first.id == second.id == user.id
+        assert spy.call_count == 1
+        # Each hit is its own instance, so one request's changes stay local
+        second.name = "Changed"
+        third = await get_current_user(token=token, db=db_session)
+        assert third is not second and third.name == user.name
+        clear_user_cache()
+
+    async def test_forget_user_drops_cached_entry(self, db_session, make_user, mocker):
+        from budget.auth import (
+            clear_user_cache,
+            create_access_token,
+            forget_user,
+            get_current_user,
+        )
+
+        clear_user_cache()
+        user = await make_user()
+        token = create_access_token(user.id)
+        spy = mocker.spy(db_session, "get")
+
+        await get_current_user(token=token, db=db_session)
+        forget_user(user.id)
+        await get_current_user(token=token, db=db_session)
+
+        assert spy.call_count == 2
+        clear_user_cache()
+
+    async def test_token_signature_verified_once(self, mocker):
+        import budget.auth
+        from budget.auth import _decode_token, clear_user_cache, create_access_token
+
+        clear_user_cache()
+        token = create_access_token(42)
+        spy = mocker.spy(budget.auth.jwt, "decode")
+
+        assert _decode_token(token)[0] == 42
+        assert _decode_token(token)[0] == 42
+        assert spy.call_count == 1
+        clear_user_cache()
+
 
 # ---------------------------------------------------------------------------
 # Yearly analytics
@@ -1,5 +1,8 @@
 """Tests for RQ job entry points in budget/jobs.py."""
 
+import asyncio
+from datetime import date
+from decimal import Decimal
 from unittest.mock import AsyncMock
 
 from sqlalchemy import select
@@ -7,7 +10,11 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.pool import StaticPool
 
 from budget.database import Base
-from budget.jobs import run_enrichment_job, run_reenrichment_job
+from budget.jobs import (
+    _run_reenrichment_for_import,
+    run_enrichment_job,
+    run_reenrichment_job,
+)
 from budget.models import Account, CsvImport, Transaction
 
 
@@ -134,3 +141,190 @@ class TestRunReenrichmentJob:
         mock = mocker.patch("budget.jobs._run_reenrichment_for_import", new=AsyncMock())
         run_reenrichment_job(csv_import_id=5, user_id=2)
         mock.assert_awaited_once_with(5, 2)
+
+    async def test_reenrichment_updates_rows_in_bulk(self, mocker):
+        eng = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with eng.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(
+            bind=eng, class_=AsyncSession, expire_on_commit=False
+        )
+        mocker.patch("budget.jobs.AsyncSessionLocal", factory)
+
+        async with factory() as session:
+            acct = Account(name="Checking", user_id=1)
+            session.add(acct)
+            await session.flush()
+            ci = CsvImport(
+                user_id=1,
+                account_id=acct.id,
+                filename="re.csv",
+                row_count=2,
+                enriched_rows=0,
+                status="in-progress",
+            )
+            session.add(ci)
+            await session.flush()
+            txs = [
+                Transaction(
+                    user_id=1,
+                    account_id=acct.id,
+                    csv_import_id=ci.id,
+                    date=date(2024, 1, 15),
+                    description=desc,
+                    raw_description=desc,
+                    amount=Decimal("-5.00"),
+                    fingerprint=desc,
+                )
+                for desc in ("SBUX 1", "GYM")
+            ]
+            session.add_all(txs)
+            await session.commit()
+            ci_id, ids = ci.id, [t.id for t in txs]
+
+        mocker.patch(
+            "budget.jobs.enricher._enrich_batch",
+            return_value=(
+                [
+                    {
+                        "index": 0,
+                        "description": "Starbucks",
+                        "merchant_name": "Starbucks",
+                        "category": "Food & Drink",
+                        "subcategory": "Coffee",
+                        "is_recurring": False,
+                    },
+                    {"index": 1, "description": "", "is_recurring": True},
+                ],
+                0,
+                0,
+            ),
+        )
+        await _run_reenrichment_for_import(ci_id, user_id=1)
+
+        async with factory() as session:
+            coffee, gym = [await session.get(Transaction, i) for i in ids]
+            assert coffee.description == "Starbucks"
+            assert coffee.merchant_id is not None
+            assert coffee.subcategory_id is not None
+            assert gym.description == "GYM"
+            assert gym.is_recurring is True
+            assert gym.merchant_id is None
+            assert (await session.get(CsvImport, ci_id)).status == "complete"
+
+        await eng.dispose()
+
+
+class TestMessageBatchOutcomes:
+    async def test_records_batch_status_and_yields_outcomes(self, mocker):
+        from budget.jobs import _message_batch_outcomes
+        from budget.models import EnrichmentBatch
+
+        eng = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with eng.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(
+            bind=eng, class_=AsyncSession, expire_on_commit=False
+        )
+        async with factory() as session:
+            acct = Account(name="A", user_id=1)
+            session.add(acct)
+            await session.flush()
+            ci = CsvImport(
+                user_id=1,
+                account_id=acct.id,
+                filename="t.csv",
+                row_count=2,
+                enriched_rows=0,
+                status="in-progress",
+            )
+            session.add(ci)
+            await session.commit()
+            ci_id = ci.id
+
+        failure = RuntimeError("errored")
+
+        async def fake_batches(batches):
+            yield 1, failure, 0, 0
+            yield 0, [{"index": 0}], 7, 3
+
+        mocker.patch("budget.jobs.AsyncSessionLocal", factory)
+        mocker.patch(
+            "budget.jobs.enricher.enrich_via_message_batches", side_effect=fake_batches
+        )
+
+        outcomes = [
+            o async for o in _message_batch_outcomes([[{"index": 0}], [{}]], ci_id)
+        ]
+        assert outcomes == [failure, [{"index": 0}]]
+
+        async with factory() as session:
+            rows = (
+                (
+                    await session.execute(
+                        select(EnrichmentBatch).order_by(EnrichmentBatch.batch_num)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+        assert [(b.status, b.input_tokens) for b in rows] == [
+            ("success", 7),
+            ("failed", 0),
+        ]
+        await eng.dispose()
+
+
+class TestStreamBatches:
+    async def test_yields_results_and_exceptions(self):
+        from budget.jobs import _stream_batches
+
+        async def fetch(batch, batch_num):
+            if batch_num == 1:
+                raise RuntimeError("boom")
+            return [r * 10 for r in batch]
+
+        outcomes = [o async for o in _stream_batches([[1], [2], [3]], fetch, workers=2)]
+        results = sorted(o for o in outcomes if isinstance(o, list))
+        errors = [o for o in outcomes if isinstance(o, Exception)]
+        assert results == [[10], [30]]
+        assert len(errors) == 1 and str(errors[0]) == "boom"
+
+    async def test_adaptive_batches_follow_current_size(self, mocker):
+        from budget.jobs import _adaptive_batches
+
+        fake = mocker.patch("budget.jobs.enricher")
+        fake.batch_size = 4
+        rows = [{"index": i} for i in range(10)]
+        sizes = []
+        for batch in _adaptive_batches(rows):
+            sizes.append(len(batch))
+            fake.batch_size = 2
+        assert sizes == [4, 2, 2, 2]
+
+    async def test_limits_in_flight_batches(self):
+        from budget.jobs import _stream_batches
+
+        in_flight = 0
+        peak = 0
+
+        async def fetch(batch, batch_num):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return batch
+
+        batches = [[i] for i in range(10)]
+        outcomes = [o async for o in _stream_batches(batches, fetch, workers=3)]
+        assert sorted(outcomes) == batches
+        assert peak <= 3
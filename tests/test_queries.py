@@ -7,9 +7,17 @@ from datetime import date
 from decimal import Decimal
 
 import pytest
-from sqlalchemy import select
-
-from budget.models import CsvImport, EnrichmentBatch, Merchant, Transaction
+from sqlalchemy import event, select
+from sqlalchemy.exc import InvalidRequestError
+
+from budget.models import (
+    CsvImport,
+    EnrichmentBatch,
+    Merchant,
+    Subcategory,
+    Transaction,
+    transaction_tags,
+)
 from budget.query import (
     AccountQueries,
     AnalyticsQueries,
@@ -105,6 +113,100 @@ class TestAccountQueries:
         ids2 = {r.id for r in page2}
         assert ids1.isdisjoint(ids2)
 
+    async def test_list_by_total_amount(
+        self, db_session, make_account, make_transaction
+    ):
+        big = await make_account("Big")
+        small = await make_account("Small")
+        empty = await make_account("Empty")
+        await make_transaction(big.id, amount=Decimal("-50.00"))
+        await make_transaction(big.id, amount=Decimal("-25.00"))
+        await make_transaction(small.id, amount=Decimal("-5.00"))
+        aq = AccountQueries(db_session, user_id=1)
+        page, has_more, cursor = await aq.list(
+            name=None,
+            institution=None,
+            account_type=None,
+            sort_by="total_amount",
+            sort_dir="asc",
+            limit=2,
+            after_id=None,
+        )
+        assert [(r.name, r.transaction_count, r.total_amount) for r in page] == [
+            ("Big", 2, Decimal("-75.00")),
+            ("Small", 1, Decimal("-5.00")),
+        ]
+        assert has_more and cursor == small.id
+        rest, has_more, _ = await aq.list(
+            name=None,
+            institution=None,
+            account_type=None,
+            sort_by="total_amount",
+            sort_dir="asc",
+            limit=2,
+            after_id=cursor,
+        )
+        assert [(r.id, r.transaction_count, r.total_amount) for r in rest] == [
+            (empty.id, 0, 0)
+        ]
+        assert not has_more
+
+    async def test_list_by_name_aggregates_listed_accounts(
+        self, db_session, make_account, make_transaction
+    ):
+        big = await make_account("Big")
+        empty = await make_account("Empty")
+        await make_transaction(big.id, amount=Decimal("-50.00"))
+        await make_transaction(big.id, amount=Decimal("-25.00"))
+        aq = AccountQueries(db_session, user_id=1)
+        page, _, cursor = await aq.list(
+            name=None,
+            institution=None,
+            account_type=None,
+            sort_by="name",
+            sort_dir="asc",
+            limit=1,
+            after_id=None,
+        )
+        assert [(r.id, r.transaction_count, r.total_amount) for r in page] == [
+            (big.id, 2, Decimal("-75.00"))
+        ]
+        rest, _, _ = await aq.list(
+            name=None,
+            institution=None,
+            account_type=None,
+            sort_by="name",
+            sort_dir="asc",
+            limit=1,
+            after_id=cursor,
+        )
+        assert [(r.id, r.transaction_count, r.total_amount) for r in rest] == [
+            (empty.id, 0, 0)
+        ]
+
+    async def test_cursor_walk_through_ties_and_nulls(self, db_session, make_account):
+        a = await make_account("A", "Chase")
+        b = await make_account("B", "Chase")
+        c = await make_account("C", None)
+        d = await make_account("D", "Amex")
+        e = await make_account("E", None)
+        aq = AccountQueries(db_session, user_id=1)
+        seen, cursor = [], None
+        while True:
+            page, has_more, cursor = await aq.list(
+                name=None,
+                institution=None,
+                account_type=None,
+                sort_by="institution",
+                sort_dir="desc",
+                limit=1,
+                after_id=cursor,
+            )
+            seen.extend(r.id for r in page)
+            if not has_more:
+                break
+        assert seen == [b.id, a.id, d.id, e.id, c.id]
+
 
 # ---------------------------------------------------------------------------
 # CsvImportQueries
@@ -159,6 +261,70 @@ class TestCsvImportQueries:
         )
         assert count == 1
 
+    async def test_list_by_transaction_count(
+        self, db_session, make_account, make_transaction
+    ):
+        acct = await make_account("Checking")
+        csq = CsvImportQueries(db_session, user_id=1)
+        mapping = {"date": 0, "amount": 1, "description": 2}
+        busy = await csq.upsert(acct.id, "busy.csv", 2, mapping, None)
+        idle = await csq.upsert(acct.id, "idle.csv", 0, mapping, None)
+        await db_session.commit()
+        await make_transaction(acct.id, csv_import_id=busy.id, description="a")
+        await make_transaction(acct.id, csv_import_id=busy.id, description="b")
+        page, has_more, cursor = await csq.list(
+            filename=None,
+            account=None,
+            sort_by="transaction_count",
+            sort_dir="desc",
+            limit=1,
+            after_id=None,
+        )
+        assert [(r.filename, r.account, r.transaction_count) for r in page] == [
+            ("busy.csv", "Checking", 2)
+        ]
+        assert has_more and cursor == busy.id
+        rest, has_more, _ = await csq.list(
+            filename=None,
+            account=None,
+            sort_by="transaction_count",
+            sort_dir="desc",
+            limit=1,
+            after_id=cursor,
+        )
+        assert [(r.id, r.transaction_count) for r in rest] == [(idle.id, 0)]
+        assert not has_more
+
+    async def test_list_by_filename_counts_listed_imports(
+        self, db_session, make_account, make_transaction
+    ):
+        acct = await make_account("Checking")
+        csq = CsvImportQueries(db_session, user_id=1)
+        mapping = {"date": 0, "amount": 1, "description": 2}
+        busy = await csq.upsert(acct.id, "busy.csv", 2, mapping, None)
+        idle = await csq.upsert(acct.id, "idle.csv", 0, mapping, None)
+        await db_session.commit()
+        await make_transaction(acct.id, csv_import_id=busy.id, description="a")
+        await make_transaction(acct.id, csv_import_id=busy.id, description="b")
+        page, has_more, cursor = await csq.list(
+            filename=None,
+            account=None,
+            sort_by="filename",
+            sort_dir="asc",
+            limit=1,
+            after_id=None,
+        )
+        assert [(r.id, r.transaction_count) for r in page] == [(busy.id, 2)]
+        rest, _, _ = await csq.list(
+            filename=None,
+            account=None,
+            sort_by="filename",
+            sort_dir="asc",
+            limit=1,
+            after_id=cursor,
+        )
+        assert [(r.id, r.transaction_count) for r in rest] == [(idle.id, 0)]
+
     async def test_mark_complete(self, db_session, make_account):
         acct = await make_account()
         csq = CsvImportQueries(db_session, user_id=1)
@@ -283,6 +449,28 @@ class TestMerchantQueries:
         m = await db_session.get(Merchant, mid)
         assert m.location == "Austin, TX"
 
+    async def test_resolve_for_enrichment(self, db_session):
+        mq = MerchantQueries(db_session, user_id=1)
+        cache: dict = {}
+        existing = await mq.find_or_create_for_enrichment("Target", None, cache)
+        await db_session.commit()
+        cache.clear()
+        await mq.resolve_for_enrichment(
+            {"Target": ("Austin, TX", None), "Starbucks": (None, "starbucks.com")},
+            cache,
+        )
+        await db_session.commit()
+        assert cache["Target"] == (existing, True)
+        assert cache["Starbucks"][1] is False
+        m = await db_session.get(Merchant, existing)
+        await db_session.refresh(m)
+        assert m.location == "Austin, TX"
+        # Subsequent per-row lookups resolve from the warmed cache
+        assert (
+            await mq.find_or_create_for_enrichment("Starbucks", None, cache)
+            == cache["Starbucks"][0]
+        )
+
     async def test_merge(
         self, db_session, make_account, make_merchant, make_transaction
     ):
@@ -316,6 +504,75 @@ class TestMerchantQueries:
         assert rows[0].name == "Starbucks"
         assert rows[0].transaction_count == 2
 
+    async def test_paginate_by_transaction_count(
+        self, db_session, make_account, make_merchant, make_transaction
+    ):
+        acct = await make_account()
+        busy = await make_merchant("Busy")
+        quiet = await make_merchant("Quiet")
+        idle = await make_merchant("Idle")
+        for _ in range(3):
+            await make_transaction(acct.id, merchant_id=busy.id)
+        await make_transaction(acct.id, merchant_id=quiet.id)
+        mq = MerchantQueries(db_session, user_id=1)
+        page, has_more, cursor = await mq.paginate(
+            name=None,
+            location=None,
+            sort_by="transaction_count",
+            sort_dir="desc",
+            limit=2,
+            after_id=None,
+        )
+        assert [(m.name, m.transaction_count) for m in page] == [
+            ("Busy", 3),
+            ("Quiet", 1),
+        ]
+        assert has_more and cursor == quiet.id
+        rest, has_more, _ = await mq.paginate(
+            name=None,
+            location=None,
+            sort_by="transaction_count",
+            sort_dir="desc",
+            limit=2,
+            after_id=cursor,
+        )
+        assert [(m.id, m.transaction_count, m.total_amount) for m in rest] == [
+            (idle.id, 0, 0)
+        ]
+        assert not has_more
+
+    async def test_paginate_by_name_aggregates_listed_merchants(
+        self, db_session, make_account, make_merchant, make_transaction
+    ):
+        acct = await make_account()
+        busy = await make_merchant("Busy")
+        idle = await make_merchant("Idle")
+        await make_transaction(acct.id, merchant_id=busy.id, amount=Decimal("-3.00"))
+        await make_transaction(acct.id, merchant_id=busy.id, amount=Decimal("-4.00"))
+        mq = MerchantQueries(db_session, user_id=1)
+        page, has_more, cursor = await mq.paginate(
+            name=None,
+            location=None,
+            sort_by="name",
+            sort_dir="asc",
+            limit=1,
+            after_id=None,
+        )
+        assert [(m.id, m.transaction_count, m.total_amount) for m in page] == [
+            (busy.id, 2, Decimal("-7.00"))
+        ]
+        rest, _, _ = await mq.paginate(
+            name=None,
+            location=None,
+            sort_by="name",
+            sort_dir="asc",
+            limit=1,
+            after_id=cursor,
+        )
+        assert [(m.id, m.transaction_count, m.total_amount) for m in rest] == [
+            (idle.id, 0, 0)
+        ]
+
     async def test_list_location_filter(self, db_session, make_merchant):
         await make_merchant("Starbucks", "Seattle, WA")
         await make_merchant("Target", "Austin, TX")
@@ -383,6 +640,44 @@ class TestCategoryQueries:
         )
         assert sid1 == sid2
 
+    async def test_resolve_for_enrichment(self, db_session):
+        cq = CategoryQueries(db_session, user_id=1)
+        cat_cache: dict = {}
+        existing = await cq.find_or_create_for_enrichment("Shopping", cat_cache)
+        await db_session.commit()
+        cat_cache.clear()
+        await cq.resolve_for_enrichment({"Shopping", "Travel"}, cat_cache)
+        assert cat_cache["Shopping"] == existing
+        assert cat_cache["Travel"] != existing
+
+        sub_cache: dict = {}
+        await cq.resolve_subcategories_for_enrichment(
+            {(existing, "Clothing"): "want", (cat_cache["Travel"], "Flights"): None},
+            sub_cache,
+        )
+        await db_session.commit()
+        assert set(sub_cache) == {
+            (existing, "Clothing"),
+            (cat_cache["Travel"], "Flights"),
+        }
+        sc = await db_session.get(Subcategory, sub_cache[(existing, "Clothing")])
+        assert sc.classification == "want"
+
+    async def test_resolve_subcategories_fills_missing_classification(self, db_session):
+        cq = CategoryQueries(db_session, user_id=1)
+        cid = await cq.find_or_create_for_enrichment("Food & Drink", {})
+        sid = await cq.find_or_create_subcategory_for_enrichment(cid, "Restaurants", {})
+        await db_session.commit()
+        sub_cache: dict = {}
+        await cq.resolve_subcategories_for_enrichment(
+            {(cid, "Restaurants"): "need"}, sub_cache
+        )
+        await db_session.commit()
+        assert sub_cache[(cid, "Restaurants")] == sid
+        sc = await db_session.get(Subcategory, sid)
+        await db_session.refresh(sc)
+        assert sc.classification == "need"
+
     async def test_list_all(self, db_session):
         cq = CategoryQueries(db_session, user_id=1)
         cat_cache: dict = {}
@@ -580,6 +875,61 @@ class TestTransactionQueries:
         ids2 = {tx.id for tx in page2}
         assert ids1.isdisjoint(ids2)
 
+    async def test_list_cursor_by_merchant_ties_and_nulls(
+        self, db_session, make_account, make_merchant, make_transaction
+    ):
+        acct = await make_account()
+        apple = await make_merchant("Apple")
+        zoo = await make_merchant("Zoo")
+        expected = [
+            (await make_transaction(acct.id, merchant_id=apple.id)).id,
+            (await make_transaction(acct.id, merchant_id=apple.id)).id,
+            (await make_transaction(acct.id, merchant_id=zoo.id)).id,
+            (await make_transaction(acct.id)).id,
+            (await make_transaction(acct.id)).id,
+        ]
+        txq = TransactionQueries(db_session)
+        seen: list[int] = []
+        cursor = None
+        while True:
+            page, has_more, cursor = await txq.list(
+                [], sort_by="merchant", sort_dir="asc", limit=1, after_id=cursor
+            )
+            seen.extend(tx.id for tx in page)
+            if not has_more:
+                break
+        assert seen == expected
+
+    async def test_list_flat_rows_with_filters_and_tags(
+        self, db_session, make_account, make_merchant, make_category, make_transaction
+    ):
+        acct = await make_account("Checking")
+        cat, sub = await make_category("Food & Drink", "Coffee")
+        sbux = await make_merchant("Starbucks")
+        other = await make_merchant("Target")
+        tx = await make_transaction(acct.id, merchant_id=sbux.id, subcategory_id=sub.id)
+        await make_transaction(acct.id, merchant_id=other.id)
+        txq = TransactionQueries(db_session, user_id=1)
+        tag_ids: dict[str, int] = {}
+        await txq.resolve_tags_for_enrichment({"treat", "coffee"}, tag_ids)
+        await db_session.execute(
+            transaction_tags.insert().values(
+                [{"transaction_id": tx.id, "tag_id": t} for t in tag_ids.values()]
+            )
+        )
+        await db_session.commit()
+
+        conds = txq.build_conditions(merchant="star", category="food")
+        items, _, _ = await txq.list(
+            conds, sort_by="merchant", sort_dir="asc", limit=50, after_id=None
+        )
+        assert [
+            (r.id, r.account, r.merchant, r.category, r.subcategory) for r in items
+        ] == [(tx.id, "Checking", "Starbucks", "Food & Drink", "Coffee")]
+        assert await txq.tag_names_for([r.id for r in items]) == {
+            tx.id: ["coffee", "treat"]
+        }
+
     async def test_get_by_id_missing(self, db_session):
         txq = TransactionQueries(db_session)
         result = await txq.get_by_id(99999)
@@ -595,12 +945,35 @@ class TestTransactionQueries:
             acct.id, merchant_id=merchant.id, subcategory_id=sub.id
         )
         txq = TransactionQueries(db_session)
-        result = await txq.get_by_id(tx.id)
+        db_session.expunge_all()
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.bind.sync_engine, "before_cursor_execute", listener)
+        try:
+            result = await txq.get_by_id(tx.id)
+        finally:
+            event.remove(db_session.bind.sync_engine, "before_cursor_execute", listener)
         assert result is not None
         assert result.merchant.name == "Starbucks"
         assert result.subcategory.name == "Coffee & Tea"
         assert result.subcategory.category.name == "Food & Drink"
         assert result.account.name == "Checking"
+        # Many-to-ones joined into the row query; only tags need a second one
+        assert len(statements) == 2
+
+    async def test_get_by_id_raises_on_unloaded_relation(
+        self, db_session, make_account, make_transaction
+    ):
+        acct = await make_account()
+        tx = await make_transaction(acct.id)
+        db_session.expunge_all()
+        result = await TransactionQueries(db_session).get_by_id(tx.id)
+        assert result is not None
+        with pytest.raises(InvalidRequestError):
+            result.csv_import
 
     async def test_find_or_create_merchant(self, db_session):
         txq = TransactionQueries(db_session, user_id=1)
@@ -626,6 +999,17 @@ class TestTransactionQueries:
         sub2 = await txq.find_or_create_subcategory(cat.id, "Online Shopping")
         assert sub.id == sub2.id
 
+    async def test_find_or_create_merchant_lost_race(self, db_session, mocker):
+        txq = TransactionQueries(db_session, user_id=1)
+        m = await txq.find_or_create_merchant("Target")
+        await db_session.commit()
+        # Another request inserted the row after this one's lookup missed
+        missed = mocker.Mock()
+        missed.scalar_one_or_none.return_value = None
+        mocker.patch.object(db_session, "execute", return_value=missed)
+        m2 = await txq.find_or_create_merchant("Target")
+        assert m2.id == m.id
+
     async def test_get_by_ids_returns_transactions(
         self, db_session, make_account, make_merchant, make_category, make_transaction
     ):
@@ -728,6 +1112,15 @@ class TestCardHolderQueries:
         assert id1 == id2
         assert cache["9999"] == id1
 
+    async def test_resolve_for_enrichment(self, db_session, make_cardholder):
+        ch = await make_cardholder("5678")
+        chq = CardHolderQueries(db_session, user_id=ch.user_id)
+        cache: dict[str, int] = {}
+        await chq.resolve_for_enrichment({"5678", "4321"}, cache)
+        await db_session.commit()
+        assert cache["5678"] == ch.id
+        assert cache["4321"] != ch.id
+
     async def test_get_by_id_found(self, db_session, make_cardholder):
         ch = await make_cardholder("1234", name="Alice")
         chq = CardHolderQueries(db_session)
@@ -890,6 +1283,18 @@ class TestAnalyticsQueries:
         assert stats["income"] == Decimal("1000.00")
         assert stats["expenses"] == Decimal("-250.00")
 
+    async def test_get_month_stats_boundaries(
+        self, db_session, make_account, make_transaction
+    ):
+        acct = await make_account()
+        for d in (date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29)):
+            await make_transaction(acct.id, txn_date=d)
+        await make_transaction(acct.id, txn_date=date(2024, 3, 1))
+        aq = AnalyticsQueries(db_session)
+        assert (await aq.get_month_stats("2024-02"))["transaction_count"] == 2
+        assert (await aq.get_month_stats("2023-12"))["transaction_count"] == 0
+        assert (await aq.get_month_stats("bogus"))["transaction_count"] == 0
+
     async def test_get_overview_summary(
         self, db_session, make_account, make_transaction
     ):
@@ -941,6 +1346,22 @@ class TestAnalyticsQueries:
         assert rows[0].name == "Employer Inc"
         assert rows[0].total == Decimal("3000.00")
 
+    async def test_get_income_by_merchant_top_n_folds_tail(
+        self, db_session, make_account, make_merchant, make_transaction
+    ):
+        acct = await make_account()
+        for name, amt in [("A", "500"), ("B", "400"), ("C", "30"), ("D", "20")]:
+            m = await make_merchant(name)
+            await make_transaction(acct.id, amount=Decimal(amt), merchant_id=m.id)
+        aq = AnalyticsQueries(db_session)
+        rows = await aq.get_income_by_merchant(top_n=2)
+        assert [(r.name, r.total) for r in rows] == [
+            ("A", Decimal("500")),
+            ("B", Decimal("400")),
+            ("Other Income", Decimal("50")),
+        ]
+        assert len(await aq.get_income_by_merchant(top_n=4)) == 4
+
     async def test_get_expenses_by_category(
         self, db_session, make_account, make_category, make_transaction
     ):
@@ -954,17 +1375,51 @@ class TestAnalyticsQueries:
         assert rows[0].name == "Food & Drink"
         assert rows[0].total == Decimal("-75.00")
 
-    async def test_get_recurring_transactions(
+    async def test_get_recurring_series(
         self, db_session, make_account, make_merchant, make_transaction
     ):
         acct = await make_account()
         m = await make_merchant("Netflix")
-        await make_transaction(acct.id, merchant_id=m.id, is_recurring=True)
+        for d, amt in [
+            (date(2024, 1, 15), "-15.99"),
+            (date(2024, 2, 15), "-15.99"),
+            (date(2024, 3, 16), "-17.99"),
+            (date(2024, 4, 15), "-17.99"),
+        ]:
+            await make_transaction(
+                acct.id,
+                amount=Decimal(amt),
+                txn_date=d,
+                merchant_id=m.id,
+                is_recurring=True,
+            )
+        # No merchant: grouped by normalised description
+        await make_transaction(
+            acct.id, description="Gym ", txn_date=date(2024, 1, 1), is_recurring=True
+        )
+        await make_transaction(
+            acct.id, description="gym", txn_date=date(2024, 1, 8), is_recurring=True
+        )
+        await make_transaction(acct.id, is_recurring=True)  # single charge, dropped
         await make_transaction(acct.id, is_recurring=False)  # non-recurring, excluded
         aq = AnalyticsQueries(db_session)
-        rows = await aq.get_recurring_transactions()
-        assert len(rows) == 1
-        assert rows[0].merchant_name == "Netflix"
+        rows = await aq.get_recurring_series()
+        by_desc = {r.merchant_name or r.description: r for r in rows}
+        assert set(by_desc) == {"Netflix", "Gym "}
+
+        netflix = by_desc["Netflix"]
+        assert netflix.occurrences == 4
+        assert netflix.last_charge == date(2024, 4, 15)
+        # Gaps 31, 30, 30 → middle gap 30; amounts' two middle values differ
+        assert (netflix.gap_lo, netflix.gap_hi) == (30, 30)
+        assert (netflix.amount_lo, netflix.amount_hi) == (
+            Decimal("15.99"),
+            Decimal("17.99"),
+        )
+
+        gym = by_desc["Gym "]
+        assert gym.occurrences == 2
+        assert (gym.gap_lo, gym.gap_hi) == (7, 7)
 
 
 # ---------------------------------------------------------------------------